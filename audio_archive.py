@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Compact utterance audio archive for replay and regression corpora.
+
+Layout (one directory):
+  audio-<generation>.pcm - int16 mono PCM of every archived utterance, back to back
+  index.bin              - header (magic, generation) followed by fixed-size
+                           little-endian records: offset, size, samples, journal id,
+                           rate, time, flags
+
+Uncompressed utterances are read zero-copy as views into a memory map of the
+current audio-<generation>.pcm. Optionally each utterance can be stored
+delta-encoded and zlib compressed instead. When the data file grows past its
+size budget the oldest utterances are evicted by compacting into a new data file
+generation; replacing index.bin is the commit point, so a crash mid-eviction
+leaves the old archive intact.
+
+Tools that only read (list, replay, benchmarks) open it with read_only=True: a
+snapshot that deletes, rewrites and opens for writing nothing, so it is safe
+while the app is appending to or evicting from the same archive.
+
+Usage:
+    python audio_archive.py list
+    python audio_archive.py export-corpus regression_corpus/
+    python audio_archive.py replay --model base --limit 20
+"""
+
+import argparse
+import collections
+import os
+import struct
+import threading
+import time
+import wave
+import zlib
+
+import numpy as np
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_archive")
+INDEX_FILE = "index.bin"
+
+HEADER = struct.Struct("<4sI")
+MAGIC = b"UTTA"
+# offset, stored bytes, samples, journal entry id, sample rate, unix time, flags
+RECORD = struct.Struct("<QQIqIdB3x")
+FLAG_COMPRESSED = 0x01
+
+# After eviction the archive is compacted down to this fraction of the budget
+EVICT_TARGET_RATIO = 0.75
+
+ArchiveEntry = collections.namedtuple(
+    "ArchiveEntry", ["offset", "size", "samples", "entry_id", "sample_rate", "timestamp", "flags"]
+)
+
+
+def compress_pcm(samples):
+    """Delta-encode int16 samples (wrapping) and zlib-compress them."""
+    delta = np.diff(samples, prepend=np.int16(0)).astype(np.int16)
+    return zlib.compress(delta.tobytes(), 6)
+
+
+def decompress_pcm(data):
+    delta = np.frombuffer(zlib.decompress(data), dtype=np.int16)
+    return np.cumsum(delta, dtype=np.int16)
+
+
+class AudioArchive:
+    """Append-only int16 utterance store with a memory-mapped read path."""
+
+    def __init__(self, directory=DEFAULT_ARCHIVE_DIR, max_bytes=500 * 1024 * 1024,
+                 compress=False, read_only=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(directory, INDEX_FILE)
+        self._generation = 0
+        self._map = None
+        self._data = self._index = None
+        if read_only:
+            self._open_snapshot()
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        self._entries = self._load_index()
+        self._data_path = self._generation_path(self._generation)
+        self._remove_stale_generations()
+        self._data = open(self._data_path, "ab")
+        self._index = open(self._index_path, "ab")
+        if self._index.tell() == 0:
+            self._index.write(HEADER.pack(MAGIC, self._generation))
+            self._index.flush()
+
+    def _open_snapshot(self, attempts=5):
+        """Read-only open: the index as it is now, and a read handle on its data file."""
+        for _ in range(attempts):
+            self._load_index()
+            generation = self._generation
+            self._data_path = self._generation_path(generation)
+            try:
+                # Holding the file open keeps its data readable after an eviction unlinks it
+                self._data = open(self._data_path, "rb")
+            except FileNotFoundError:
+                self._data = None
+            # Read the index again now that the data file is held: if an eviction started a
+            # new generation in between, this snapshot is stale and is taken again
+            self._entries = self._load_index()
+            if self._generation == generation:
+                if self._data is None:
+                    self._entries = []
+                return
+            if self._data is not None:
+                self._data.close()
+        raise OSError(f"{self.directory} kept changing while it was being opened")
+
+    def _generation_path(self, generation):
+        return os.path.join(self.directory, f"audio-{generation:06d}.pcm")
+
+    def _remove_stale_generations(self):
+        current = os.path.basename(self._data_path)
+        for name in os.listdir(self.directory):
+            if name.startswith("audio-") and name.endswith((".pcm", ".pcm.tmp")) and name != current:
+                os.unlink(os.path.join(self.directory, name))
+
+    def _load_index(self):
+        entries = []
+        try:
+            with open(self._index_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return entries
+        if len(raw) < HEADER.size:
+            if not self.read_only:
+                os.unlink(self._index_path)
+            return entries
+        magic, self._generation = HEADER.unpack_from(raw)
+        if magic != MAGIC:
+            raise ValueError(f"{self._index_path} is not an audio archive index")
+
+        body = len(raw) - HEADER.size
+        usable = HEADER.size + body - body % RECORD.size  # Drop a torn trailing record
+        records = [ArchiveEntry(*RECORD.unpack_from(raw, start))
+                   for start in range(HEADER.size, usable, RECORD.size)]
+        data_path = self._generation_path(self._generation)
+        data_size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+        end = 0
+        for k, entry in enumerate(records):
+            # Data is written before its record, so a record's data ends before the next
+            # record's data starts; one whose data never made it to disk is skipped
+            limit = min(records[k + 1].offset, data_size) if k + 1 < len(records) else data_size
+            if entry.offset < end or entry.offset + entry.size > limit:
+                continue
+            entries.append(entry)
+            end = entry.offset + entry.size
+        if not self.read_only and (usable != len(raw) or len(entries) != len(records)):
+            # Rewrite without the damaged records so new ones are not appended behind them
+            self._write_index(self._generation, entries)
+        return entries
+
+    def _write_index(self, generation, entries):
+        """Replace index.bin atomically; this is the archive's commit point."""
+        tmp_index = self._index_path + ".tmp"
+        with open(tmp_index, "wb") as f:
+            f.write(HEADER.pack(MAGIC, generation))
+            for entry in entries:
+                f.write(RECORD.pack(*entry))
+        os.replace(tmp_index, self._index_path)
+
+    def _mapped(self, end):
+        """Return a memory map covering at least `end` bytes of the data file."""
+        if self._map is None or len(self._map) < end:
+            if self.read_only:
+                self._map = np.memmap(self._data, dtype=np.uint8, mode="r")
+            else:
+                self._data.flush()
+                self._map = np.memmap(self._data_path, dtype=np.uint8, mode="r")
+        return self._map
+
+    # ── writing ──────────────────────────────────────────────────────────────
+    def append(self, pcm, sample_rate=16000, entry_id=-1):
+        """Archive one utterance (int16 bytes or array). Returns its index."""
+        if self.read_only:
+            raise ValueError(f"{self.directory} was opened read-only")
+        samples = np.frombuffer(pcm, dtype=np.int16) if isinstance(pcm, (bytes, bytearray)) \
+            else np.asarray(pcm, dtype=np.int16)
+        if self.compress:
+            payload = compress_pcm(samples)
+            flags = FLAG_COMPRESSED
+        else:
+            payload = samples.tobytes()
+            flags = 0
+
+        with self._lock:
+            offset = self._data.tell()
+            self._data.write(payload)
+            self._data.flush()
+            entry = ArchiveEntry(offset, len(payload), len(samples), entry_id,
+                                 sample_rate, time.time(), flags)
+            self._index.write(RECORD.pack(*entry))
+            self._index.flush()
+            self._entries.append(entry)
+
+            if offset + len(payload) > self.max_bytes:
+                self._evict()
+            return len(self._entries) - 1
+
+    def _evict(self):
+        """Drop the oldest utterances and compact the archive below the budget."""
+        end = self._entries[-1].offset + self._entries[-1].size
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        keep_from = 0
+        while keep_from < len(self._entries) - 1 and \
+                end - self._entries[keep_from].offset > target:
+            keep_from += 1
+
+        base = self._entries[keep_from].offset
+        kept = [entry._replace(offset=entry.offset - base) for entry in self._entries[keep_from:]]
+
+        self._data.close()
+        self._index.close()
+        self._map = None
+
+        generation = self._generation + 1
+        new_data_path = self._generation_path(generation)
+        with open(self._data_path, "rb") as src, open(new_data_path, "wb") as dst:
+            src.seek(base)
+            while True:
+                chunk = src.read(1024 * 1024)
+                if not chunk:
+                    break
+                dst.write(chunk)
+        self._write_index(generation, kept)
+        old_data_path = self._data_path
+        self._generation = generation
+        self._data_path = new_data_path
+        try:
+            os.unlink(old_data_path)
+        except OSError:
+            pass  # Still mapped by a reader (Windows); removed on next open
+
+        self._entries = kept
+        self._data = open(self._data_path, "ab")
+        self._index = open(self._index_path, "ab")
+        print(f"🗑️  Audio archive: evicted {keep_from} oldest utterance(s)")
+
+    # ── reading ──────────────────────────────────────────────────────────────
+    def __len__(self):
+        return len(self._entries)
+
+    def entry(self, index):
+        return self._entries[index]
+
+    def samples(self, index):
+        """Return int16 samples; a zero-copy memmap view unless the utterance is compressed."""
+        with self._lock:
+            entry = self._entries[index]
+            if entry.size == 0:
+                return np.zeros(0, dtype=np.int16)
+            mapped = self._mapped(entry.offset + entry.size)
+            raw = mapped[entry.offset:entry.offset + entry.size]
+        if entry.flags & FLAG_COMPRESSED:
+            return decompress_pcm(raw.tobytes())
+        return raw.view(np.int16)
+
+    def iter_utterances(self, limit=None):
+        """Yield (entry, samples) from oldest to newest."""
+        count = len(self._entries) if limit is None else min(limit, len(self._entries))
+        for index in range(count):
+            yield self._entries[index], self.samples(index)
+
+    def total_bytes(self):
+        if not self._entries:
+            return 0
+        return self._entries[-1].offset + self._entries[-1].size
+
+    def close(self):
+        with self._lock:
+            self._map = None
+            for handle in (self._data, self._index):
+                if handle is not None:
+                    handle.close()
+
+
+def write_wav(path, samples, sample_rate):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(np.ascontiguousarray(samples).tobytes())
+
+
+def export_corpus(archive, output_dir, journal_dir=None):
+    """Write archived utterances as WAV files, with journal text as reference .txt files."""
+    os.makedirs(output_dir, exist_ok=True)
+    journal = None
+    if journal_dir and os.path.isdir(journal_dir):
+        from transcript_journal import TranscriptJournal
+        journal = TranscriptJournal(journal_dir)
+
+    exported = 0
+    try:
+        for index, (entry, samples) in enumerate(archive.iter_utterances()):
+            name = f"utt_{index:06d}"
+            write_wav(os.path.join(output_dir, name + ".wav"), samples, entry.sample_rate)
+            if journal and entry.entry_id >= 0:
+                record = journal.get(entry.entry_id)
+                if record:
+                    with open(os.path.join(output_dir, name + ".txt"), "w", encoding="utf-8") as f:
+                        f.write(record["text"] + "\n")
+            exported += 1
+    finally:
+        if journal:
+            journal.close()
+    return exported
+
+
+def replay(archive, model_size, device, compute_type, limit=None, profile="latency"):
+    """Run archived utterances through a model, decoded as the app does, and report timing."""
+    from decoding_profiles import transcribe_with_profile
+    from model_store import load_model
+
+    model = load_model(model_size, device=device, compute_type=compute_type)
+    total_audio = 0.0
+    total_decode = 0.0
+    for entry, samples in archive.iter_utterances(limit):
+        audio = samples.astype(np.float32) / 32768.0
+        start = time.perf_counter()
+        segments, info, _ = transcribe_with_profile(model, audio, profile)
+        text = " ".join(segment.text for segment in segments).strip()
+        elapsed = time.perf_counter() - start
+        duration = entry.samples / entry.sample_rate
+        total_audio += duration
+        total_decode += elapsed
+        print(f"  {duration:5.1f}s audio  {elapsed:6.3f}s decode  {text}")
+    if total_decode:
+        print(f"\n⚡ Real-time factor: {total_audio / total_decode:.2f}x over {total_audio:.1f}s of audio")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and replay the utterance audio archive")
+    parser.add_argument("--dir", default=DEFAULT_ARCHIVE_DIR, help="Archive directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="List archived utterances")
+
+    export_parser = sub.add_parser("export-corpus", help="Export WAV + reference text files")
+    export_parser.add_argument("output_dir")
+    export_parser.add_argument("--journal-dir", default=None,
+                               help="Transcript journal used for reference text")
+
+    replay_parser = sub.add_parser("replay", help="Re-transcribe archived audio")
+    replay_parser.add_argument("--model", default="base")
+    replay_parser.add_argument("--device", default="cpu")
+    replay_parser.add_argument("--compute-type", default="int8")
+    replay_parser.add_argument("--limit", type=int, default=None)
+    replay_parser.add_argument("--profile", default="latency", help="latency, balanced or accuracy")
+    args = parser.parse_args()
+
+    archive = AudioArchive(args.dir, read_only=True)
+    try:
+        if args.command == "list":
+            for index, (entry, _) in enumerate(archive.iter_utterances()):
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.timestamp))
+                kind = "zlib" if entry.flags & FLAG_COMPRESSED else "raw"
+                print(f"[{index}] {stamp}  {entry.samples / entry.sample_rate:5.1f}s  "
+                      f"{entry.size / 1024:7.1f} KB {kind}  journal #{entry.entry_id}")
+            print(f"\n📦 {len(archive)} utterance(s), {archive.total_bytes() / 1024**2:.1f} MB")
+        elif args.command == "export-corpus":
+            from transcript_journal import DEFAULT_JOURNAL_DIR
+            count = export_corpus(archive, args.output_dir, args.journal_dir or DEFAULT_JOURNAL_DIR)
+            print(f"✅ Exported {count} utterance(s) to {args.output_dir}")
+        else:
+            replay(archive, args.model, args.device, args.compute_type, args.limit, args.profile)
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
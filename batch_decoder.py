@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Batched decoding of several queued utterances in one model call.
+
+When utterances pile up (the decoder fell behind, batch files, several
+speakers), decoding them one model.transcribe() call at a time runs the
+encoder and decoder at batch size 1. transcribe_batch() concatenates the
+waiting utterances, marks each as a clip (clip_timestamps) and runs them
+through faster-whisper's BatchedInferencePipeline, which encodes and decodes
+up to `batch_size` clips per forward pass. The segments are then split back
+per utterance and shifted to utterance time.
+
+The batched pipeline decodes each clip as a single 30 s window, with one
+language and prompt for the whole batch and only the first temperature.
+Therefore:
+  - only utterances of at most 30 s are batched, and longer ones are decoded
+    on their own;
+  - callers batch only utterances that share decoding options;
+  - the profile's fallback still applies, and an utterance whose batched
+    result looks unreliable is re-decoded alone with beam search.
+
+Measure the throughput at several batch sizes on CPU:
+    python batch_decoder.py session.wav --model small --batch-sizes 1,2,4,8
+    python batch_decoder.py --archive audio_archive --model base
+"""
+
+import argparse
+import bisect
+import copy
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from decoding_profiles import (DECODING_PROFILES, FALLBACK_OPTIONS, collect_segments, get_profile,
+                               needs_fallback, transcribe_with_profile)
+
+SAMPLE_RATE = 16000
+MAX_CLIP_SEC = 30.0  # One Whisper window; longer clips would be truncated by the batched pipeline
+
+
+def batched_pipeline(model):
+    """faster-whisper's batched pipeline around a loaded WhisperModel (cheap to create)."""
+    from faster_whisper import BatchedInferencePipeline
+    return BatchedInferencePipeline(model)
+
+
+def sample_time(index):
+    """Seconds for a sample index that the pipeline's int(seconds * rate) maps back to it."""
+    return (index + 0.5) / SAMPLE_RATE
+
+
+def split_segments(segments, bounds):
+    """Assign segments of the concatenated audio to clips; times become clip-relative.
+
+    `bounds` are the clip start times in seconds, ascending.
+    """
+    per_clip = [[] for _ in bounds]
+    for segment in segments:
+        middle = (segment.start + segment.end) / 2
+        index = min(max(bisect.bisect_right(bounds, middle) - 1, 0), len(bounds) - 1)
+        moved = copy.copy(segment)
+        moved.start = round(max(0.0, segment.start - bounds[index]), 3)
+        moved.end = round(max(0.0, segment.end - bounds[index]), 3)
+        per_clip[index].append(moved)
+    return per_clip
+
+
+def transcribe_batch(model, audios, profile="latency", stats=None, cancel_event=None,
+                     batch_size=None, pipeline_factory=batched_pipeline, **overrides):
+    """Decode several float32 utterances together.
+
+    Returns [(segments, info, used_fallback, decode_time)] in input order. The
+    batch's decode time is shared out by audio length. Raises DecodeCancelled
+    if `cancel_event` is set while decoding.
+    """
+    results = [None] * len(audios)
+    batched = [i for i, audio in enumerate(audios) if 0 < len(audio) <= MAX_CLIP_SEC * SAMPLE_RATE]
+    if len(batched) < 2:
+        batched = []
+    for i in sorted(set(range(len(audios))) - set(batched)):
+        start = time.perf_counter()
+        segments, info, used_fallback = transcribe_with_profile(
+            model, audios[i], profile, stats=stats, cancel_event=cancel_event, **overrides
+        )
+        results[i] = (segments, info, used_fallback, time.perf_counter() - start)
+    if not batched:
+        return results
+
+    options = get_profile(profile)
+    options.update(overrides)
+    lengths = [len(audios[i]) for i in batched]
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    bounds = [offset / SAMPLE_RATE for offset in offsets[:-1]]
+    # Exact sample bounds, so each clip is exactly its utterance's samples
+    clips = [{"start": sample_time(offsets[k]), "end": sample_time(offsets[k + 1])}
+             for k in range(len(batched))]
+
+    start = time.perf_counter()
+    segments, info = pipeline_factory(model).transcribe(
+        np.concatenate([audios[i] for i in batched]), clip_timestamps=clips,
+        batch_size=batch_size or len(batched), **options
+    )
+    per_clip = split_segments(collect_segments(segments, cancel_event), bounds)
+    batch_time = time.perf_counter() - start
+
+    total = float(sum(lengths))
+    use_fallback = DECODING_PROFILES[profile]["fallback"]
+    for k, i in enumerate(batched):
+        share = batch_time * lengths[k] / total
+        clip_segments = per_clip[k]
+        clip_info = SimpleNamespace(language=info.language,
+                                    language_probability=info.language_probability,
+                                    duration=lengths[k] / SAMPLE_RATE)
+        fallback_time = None
+        if use_fallback and needs_fallback(clip_segments):
+            fallback_start = time.perf_counter()
+            clip_segments, clip_info = model.transcribe(audios[i], **{**options, **FALLBACK_OPTIONS})
+            clip_segments = collect_segments(clip_segments, cancel_event)
+            fallback_time = time.perf_counter() - fallback_start
+        if stats:
+            stats.record(share, fallback_time)
+        results[i] = (clip_segments, clip_info, fallback_time is not None,
+                      share + (fallback_time or 0.0))
+    return results
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Throughput measurement
+
+def benchmark(model, audios, batch_sizes=(1, 2, 4, 8), profile="latency", repeats=1):
+    """Audio seconds decoded per wall second at each batch size (1 = one call per utterance)."""
+    audios = [audio for audio in audios if len(audio) <= MAX_CLIP_SEC * SAMPLE_RATE]
+    audio_sec = sum(len(audio) for audio in audios) / SAMPLE_RATE
+    rows = []
+    for size in batch_sizes:
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for first in range(0, len(audios), size):
+                group = audios[first:first + size]
+                if size == 1:
+                    transcribe_with_profile(model, group[0], profile)
+                else:
+                    transcribe_batch(model, group, profile, batch_size=size)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        rows.append({"batch_size": size, "wall_sec": best, "audio_per_sec": audio_sec / best})
+    for row in rows:
+        row["speedup"] = row["audio_per_sec"] / rows[0]["audio_per_sec"]
+    return rows, audio_sec
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure batched decoding throughput")
+    parser.add_argument("recordings", nargs="*", help="16 kHz mono 16-bit WAV recordings")
+    parser.add_argument("--archive", default=None, help="Use utterances from an audio archive")
+    parser.add_argument("--limit", type=int, default=32, help="Utterances to decode")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--profile", default="latency", choices=list(DECODING_PROFILES))
+    parser.add_argument("--batch-sizes", default="1,2,4,8")
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.archive:
+        from audio_archive import AudioArchive
+
+        archive = AudioArchive(args.archive, read_only=True)
+        try:
+            utterances = [np.array(samples) for entry, samples in archive.iter_utterances(args.limit)
+                          if entry.sample_rate == SAMPLE_RATE]
+        finally:
+            archive.close()
+    elif args.recordings:
+        from speech_gate import cut_utterances
+        from transcribe_file import map_wav
+
+        utterances = []
+        for path in args.recordings:
+            utterances += [np.frombuffer(pcm, dtype=np.int16) for pcm in cut_utterances(map_wav(path))]
+        utterances = utterances[:args.limit]
+    else:
+        parser.error("give WAV recordings or --archive")
+    if not utterances:
+        parser.error("no utterances found")
+    audios = [samples.astype(np.float32) / 32768.0 for samples in utterances]
+
+    from model_store import load_model
+
+    model = load_model(args.model, device=args.device, compute_type=args.compute_type)
+    transcribe_with_profile(model, audios[0], args.profile)  # Warm-up
+    sizes = [int(size) for size in args.batch_sizes.split(",")]
+    rows, audio_sec = benchmark(model, audios, sizes, args.profile, args.repeats)
+    print(f"📦 {len(audios)} utterances, {audio_sec:.0f}s of audio, model '{args.model}' "
+          f"on {args.device} ({args.compute_type}), profile {args.profile}")
+    for row in rows:
+        print(f"   batch {row['batch_size']:2d}: {row['wall_sec']:7.2f}s wall, "
+              f"{row['audio_per_sec']:6.1f}s audio/s, {row['speedup']:.2f}x vs one at a time")
+
+
+if __name__ == "__main__":
+    main()
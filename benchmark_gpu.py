@@ -1,155 +1,403 @@
 """
 Benchmark script to compare different Whisper models on your RTX 5080
-Tests speed and shows GPU utilization
+Runs a non-interactive matrix (model size x device x compute type x beam size),
+keeps a results history and flags regressions against a stored baseline.
+Models imported into the local store (model_store.py) load from there; each
+configuration runs in a fresh process, so load_time is the cold-start time
+(page-in plus load).
+
+Usage:
+    python benchmark_gpu.py                                   # default matrix
+    python benchmark_gpu.py --models tiny,base --beam-sizes 1,5
+    python benchmark_gpu.py --archive audio_archive --update-baseline
+    python benchmark_gpu.py --threshold 0.10                  # fail on >10% slowdown
 """
 
-import torch
-import time
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
 import tempfile
+import time
 import wave
+
 import numpy as np
-from faster_whisper import WhisperModel
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY_FILE = os.path.join(SCRIPT_DIR, "benchmark_history.jsonl")
+DEFAULT_BASELINE_FILE = os.path.join(SCRIPT_DIR, "benchmark_baseline.json")
+DEFAULT_COMPUTE_TYPES = {"cuda": "float16", "cpu": "int8"}
+
+# Metrics compared against the baseline (lower is better)
+REGRESSION_METRICS = ["load_time", "cold_time", "avg_time"]
+
+
+def cuda_available():
+    """Check for a CUDA device without requiring torch."""
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        pass
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except ImportError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024**2
+    except (ImportError, AttributeError):
+        return None
+
 
 def generate_test_audio(duration_sec=10):
     """Generate a test audio file with silence + tone"""
     sample_rate = 16000
     samples = int(sample_rate * duration_sec)
-    
+
     # Generate a simple tone
     frequency = 440  # A4 note
     audio = np.sin(2 * np.pi * frequency * np.linspace(0, duration_sec, samples))
     audio = (audio * 32767 * 0.5).astype(np.int16)
-    
+
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
     with wave.open(temp_file.name, "wb") as wf:
         wf.setnchannels(1)
         wf.setsampwidth(2)
         wf.setframerate(sample_rate)
         wf.writeframes(audio.tobytes())
-    
+
     return temp_file.name
 
-def benchmark_model(model_size, device, compute_type, audio_file):
+
+def load_wav(path):
+    """Read a 16-bit mono WAV file as float32 samples in [-1, 1]."""
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono audio")
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    return pcm.astype(np.float32) / 32768.0
+
+
+def load_archive_audio(archive_dir, limit=None):
+    """Read utterances from the audio archive (zero-copy until float conversion)."""
+    from audio_archive import AudioArchive
+
+    archive = AudioArchive(archive_dir, read_only=True)
+    try:
+        return [samples.astype(np.float32) / 32768.0
+                for entry, samples in archive.iter_utterances(limit)
+                if entry.sample_rate == 16000]
+    finally:
+        archive.close()
+
+
+def config_key(result):
+    return f"{result['model']}/{result['device']}/{result['compute_type']}/beam{result['beam_size']}"
+
+
+def benchmark_model(model_size, device, compute_type, audio_inputs, beam_size=5, num_runs=3):
     """Benchmark a specific model configuration"""
     print(f"\n{'='*60}")
-    print(f"Testing: {model_size} ({compute_type}) on {device.upper()}")
+    print(f"Testing: {model_size} ({compute_type}, beam {beam_size}) on {device.upper()}")
     print(f"{'='*60}")
-    
+
     try:
+        from model_store import load_model
+
+        audio_duration = sum(len(audio) for audio in audio_inputs) / 16000
+
+        def transcribe_all():
+            start = time.perf_counter()
+            for audio in audio_inputs:
+                segments, info = model.transcribe(audio, beam_size=beam_size)
+                # Force evaluation of generator
+                list(segments)
+            return time.perf_counter() - start
+
         # Load model
         print("⏳ Loading model...")
-        load_start = time.time()
-        model = WhisperModel(model_size, device=device, compute_type=compute_type)
-        load_time = time.time() - load_start
+        load_start = time.perf_counter()
+        model = load_model(model_size, device=device, compute_type=compute_type)
+        load_time = time.perf_counter() - load_start
+        report = model.load_report
         print(f"✅ Model loaded in {load_time:.2f}s")
-        
-        # Warm-up run
-        print("🔥 Warming up...")
-        model.transcribe(audio_file, beam_size=5)
-        
+
+        # Cold run (first decode after load)
+        cold_time = transcribe_all()
+        print(f"🧊 Cold decode: {cold_time:.3f}s")
+
         # Benchmark runs
-        num_runs = 3
         times = []
-        print(f"🏃 Running {num_runs} benchmark iterations...")
-        
+        print(f"🏃 Running {num_runs} warm iterations...")
+
         for i in range(num_runs):
-            start = time.time()
-            segments, info = model.transcribe(audio_file, beam_size=5)
-            # Force evaluation of generator
-            list(segments)
-            elapsed = time.time() - start
+            elapsed = transcribe_all()
             times.append(elapsed)
             print(f"  Run {i+1}: {elapsed:.3f}s")
-        
+
         avg_time = sum(times) / len(times)
         print(f"\n📊 Average transcription time: {avg_time:.3f}s")
-        print(f"⚡ Real-time factor: {10.0 / avg_time:.2f}x")
-        
-        if device == "cuda":
-            vram_allocated = torch.cuda.memory_allocated() / 1024**3
-            vram_reserved = torch.cuda.memory_reserved() / 1024**3
-            print(f"💾 VRAM Used: {vram_allocated:.2f}GB (Reserved: {vram_reserved:.2f}GB)")
-        
-        return {
+        print(f"⚡ Real-time factor: {audio_duration / avg_time:.2f}x")
+
+        result = {
             "model": model_size,
             "device": device,
             "compute_type": compute_type,
+            "beam_size": beam_size,
+            "audio_sec": audio_duration,
             "load_time": load_time,
+            "page_in_time": report.page_in_time,
+            "model_version": report.version,  # None when loaded through the download cache
+            "cold_time": cold_time,
             "avg_time": avg_time,
-            "realtime_factor": 10.0 / avg_time
+            "realtime_factor": audio_duration / avg_time,
+            "peak_rss_mb": peak_rss_mb(),
         }
-    
+
+        if device == "cuda":
+            try:
+                import torch
+                result["vram_gb"] = torch.cuda.max_memory_allocated() / 1024**3
+                print(f"💾 VRAM Used: {result['vram_gb']:.2f}GB")
+            except ImportError:
+                pass
+
+        return result
+
     except Exception as e:
         print(f"❌ Error: {e}")
         return None
 
+
+def _isolated_worker(connection, args):
+    connection.send(benchmark_model(*args))
+    connection.close()
+
+
+def run_isolated(*args):
+    """Run one configuration in a fresh process so load time and peak RSS are not shared."""
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_isolated_worker, args=(child, args))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = None
+    process.join()
+    return result
+
+
+def compare_to_baseline(results, baseline, threshold, failed=()):
+    """Return (report lines, regression count, unchecked config keys) comparing results with the baseline.
+
+    Configurations without a baseline entry and configurations in `failed` (no
+    result at all) are marked in the report and returned as unchecked.
+    """
+    lines = [f"{'Config':<32} {'Metric':<10} {'Baseline':>10} {'Current':>10} {'Change':>9}"]
+    regressions = 0
+    unchecked = []
+    for result in results:
+        key = config_key(result)
+        if key not in baseline:
+            lines.append(f"{key:<32} ⚠️  NO BASELINE - not compared")
+            unchecked.append(key)
+            continue
+        for metric in REGRESSION_METRICS:
+            old = baseline[key].get(metric)
+            new = result.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            flag = ""
+            if change > threshold:
+                flag = "  ❌ REGRESSION"
+                regressions += 1
+            lines.append(f"{key:<32} {metric:<10} {old:>9.3f}s {new:>9.3f}s {change:>+8.1%}{flag}")
+    for key in failed:
+        lines.append(f"{key:<32} ❌ FAILED - no result")
+        unchecked.append(key)
+    return lines, regressions, unchecked
+
+
+def parse_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Non-interactive Whisper benchmark matrix")
+    parser.add_argument("--models", default="tiny,base,small,medium",
+                        help="Comma-separated model sizes")
+    parser.add_argument("--devices", default="auto",
+                        help="Comma-separated devices, or 'auto' (cuda if available, else cpu)")
+    parser.add_argument("--compute-types", default=None,
+                        help="Comma-separated compute types (default: float16 on cuda, int8 on cpu)")
+    parser.add_argument("--beam-sizes", default="5", help="Comma-separated beam sizes")
+    parser.add_argument("--runs", type=int, default=3, help="Warm runs per configuration")
+    parser.add_argument("--audio", default=None, help="16 kHz mono WAV file to decode")
+    parser.add_argument("--archive", default=None,
+                        help="Use utterances from an audio archive directory")
+    parser.add_argument("--archive-limit", type=int, default=50)
+    parser.add_argument("--history", default=DEFAULT_HISTORY_FILE, help="Results history file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_FILE, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Allowed slowdown vs baseline before failing (0.15 = 15%%)")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="Run all configurations in this process")
+    args = parser.parse_args()
+
     print("🎮 GPU-Accelerated Whisper Benchmark Tool")
     print("=" * 60)
-    
+
     # Check CUDA availability
-    if torch.cuda.is_available():
-        print(f"✅ CUDA Available")
-        print(f"   GPU: {torch.cuda.get_device_name(0)}")
-        print(f"   VRAM: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f}GB")
+    has_cuda = cuda_available()
+    if has_cuda:
+        print("✅ CUDA Available")
     else:
         print("❌ CUDA not available - will test CPU only")
-    
-    # Generate test audio
-    print("\n🎵 Generating 10-second test audio...")
-    audio_file = generate_test_audio(10)
-    print(f"✅ Test audio created: {audio_file}")
-    
+
+    devices = (["cuda"] if has_cuda else ["cpu"]) if args.devices == "auto" else parse_list(args.devices)
+    if not has_cuda and "cuda" in devices:
+        print("⚠️  Skipping cuda: no GPU detected")
+        devices = [device for device in devices if device != "cuda"] or ["cpu"]
+
+    # Test audio
+    temp_file = None
+    if args.archive:
+        audio_inputs = load_archive_audio(args.archive, args.archive_limit)
+        source = f"archive:{args.archive}"
+        print(f"\n🎵 Using {len(audio_inputs)} archived utterance(s)")
+    else:
+        if args.audio:
+            audio_file = args.audio
+        else:
+            print("\n🎵 Generating 10-second test audio...")
+            audio_file = temp_file = generate_test_audio(10)
+        audio_inputs = [load_wav(audio_file)]
+        source = args.audio or "sine-10s"
+    if temp_file:
+        os.unlink(temp_file)
+    if not audio_inputs:
+        print("❌ No audio to benchmark")
+        return 2
+
     # Test configurations
+    matrix = []
+    for device in devices:
+        compute_types = parse_list(args.compute_types) if args.compute_types \
+            else [DEFAULT_COMPUTE_TYPES.get(device, "int8")]
+        for model_size in parse_list(args.models):
+            for compute_type in compute_types:
+                for beam_size in parse_list(args.beam_sizes):
+                    matrix.append((model_size, device, compute_type, audio_inputs, int(beam_size), args.runs))
+
     results = []
-    
-    if torch.cuda.is_available():
-        # Test different models on GPU with FP16
-        models_to_test = ["tiny", "base", "small", "medium"]
-        
-        for model_size in models_to_test:
-            result = benchmark_model(model_size, "cuda", "float16", audio_file)
-            if result:
-                results.append(result)
-        
-        # Optionally test large-v2 if user has enough VRAM
-        print("\n" + "="*60)
-        test_large = input("Test large-v2 model? (requires ~10GB VRAM) [y/N]: ")
-        if test_large.lower() == 'y':
-            result = benchmark_model("large-v2", "cuda", "float16", audio_file)
-            if result:
-                results.append(result)
-    
-    # Test base model on CPU for comparison
-    print("\n" + "="*60)
-    test_cpu = input("Test CPU performance for comparison? [y/N]: ")
-    if test_cpu.lower() == 'y':
-        result = benchmark_model("base", "cpu", "int8", audio_file)
+    failed = []
+    for config in matrix:
+        result = benchmark_model(*config) if args.no_isolate else run_isolated(*config)
         if result:
             results.append(result)
-    
+        else:
+            model_size, device, compute_type, _, beam_size, _ = config
+            failed.append(config_key({"model": model_size, "device": device,
+                                      "compute_type": compute_type, "beam_size": beam_size}))
+
+    if not results:
+        print("❌ Every configuration failed")
+        return 1
+
     # Summary
     print("\n" + "="*60)
     print("📊 BENCHMARK SUMMARY")
     print("="*60)
-    print(f"{'Model':<15} {'Device':<8} {'Load Time':<12} {'Avg Time':<12} {'RT Factor':<12}")
-    print("-"*60)
-    
+    print(f"{'Config':<32} {'Load':>8} {'Cold':>8} {'Warm':>8} {'RTF':>8} {'Peak RSS':>10}")
+    print("-"*78)
+
     for r in results:
-        print(f"{r['model']:<15} {r['device']:<8} {r['load_time']:.2f}s{'':<7} {r['avg_time']:.3f}s{'':<7} {r['realtime_factor']:.2f}x")
-    
+        rss = f"{r['peak_rss_mb']:.0f}MB" if r.get("peak_rss_mb") else "n/a"
+        print(f"{config_key(r):<32} {r['load_time']:>7.2f}s {r['cold_time']:>7.3f}s "
+              f"{r['avg_time']:>7.3f}s {r['realtime_factor']:>7.2f}x {rss:>10}")
+    for key in failed:
+        print(f"{key:<32} ❌ FAILED (see the error above)")
+
     print("\n💡 Recommendations:")
     if results:
         fastest = min(results, key=lambda x: x['avg_time'])
-        print(f"   Fastest: {fastest['model']} ({fastest['avg_time']:.3f}s, {fastest['realtime_factor']:.1f}x realtime)")
-        
+        print(f"   Fastest: {config_key(fastest)} ({fastest['avg_time']:.3f}s, {fastest['realtime_factor']:.1f}x realtime)")
+
         # Find best balance
-        balanced = [r for r in results if r['realtime_factor'] > 5 and r['model'] in ['base', 'small', 'medium']]
+        order = ['base', 'small', 'medium']
+        balanced = [r for r in results if r['realtime_factor'] > 5 and r['model'] in order]
         if balanced:
-            best = max(balanced, key=lambda x: x['model'])
+            best = max(balanced, key=lambda x: order.index(x['model']))
             print(f"   Recommended: {best['model']} (good balance of speed and accuracy)")
-    
+
+    # History
+    run = {
+        "timestamp": time.time(),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "audio": source,
+        "results": results,
+        "failed": failed,
+    }
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run) + "\n")
+    print(f"\n🗂️  Results appended to {args.history}")
+
+    # Baseline comparison
+    exit_code = 0
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    elif not args.update_baseline:
+        print(f"\nℹ️  No baseline at {args.baseline} (create one with --update-baseline)")
+    lines, regressions, unchecked = compare_to_baseline(results, baseline, args.threshold, failed)
+    if baseline or failed:
+        print("\n📈 Comparison with baseline:")
+        for line in lines:
+            print("   " + line)
+    if regressions:
+        print(f"\n❌ {regressions} metric(s) slower than baseline by more than {args.threshold:.0%}")
+        exit_code = 1
+    if failed:
+        print(f"❌ {len(failed)} configuration(s) failed and have no result")
+        exit_code = 1
+    missing = len(unchecked) - len(failed)
+    if missing and not args.update_baseline:
+        print(f"❌ {missing} configuration(s) have no baseline and were not checked "
+              f"(add them with --update-baseline)")
+        exit_code = 1
+    if not exit_code:
+        print("\n✅ No regressions against baseline")
+
+    if args.update_baseline:
+        baseline.update({config_key(r): r for r in results})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"💾 Baseline updated: {args.baseline}")
+
     print("\n✅ Benchmark complete!")
+    return exit_code
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Single decode scheduler shared by hotkey and continuous transcription.
+
+All decodes run on one worker thread, so jobs never compete for the model.
+Hotkey jobs have a higher priority than continuous jobs and run ahead of any
+queued continuous work; jobs of equal priority run in submission order. Every
+job carries a cancel event which the decode checks between segments, so a
+sleep word or a superseding hotkey press stops wasted work right away.
+
+Kinds listed as preemptible (shadow decodes) are also cancelled while running
+as soon as a higher-priority job is submitted, so they never hold up real work
+for longer than one segment.
+"""
+
+import itertools
+import queue
+import threading
+import time
+
+HOTKEY_PRIORITY = 0
+CONTINUOUS_PRIORITY = 1
+SHADOW_PRIORITY = 2
+
+
+class DecodeCancelled(Exception):
+    """Raised inside a job when it is cancelled mid-decode."""
+
+
+class DecodeJob:
+    def __init__(self, kind, priority, func, args, kwargs):
+        self.kind = kind
+        self.priority = priority
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.cancel_event = threading.Event()
+        self.preempted = False
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def wait(self, timeout=None):
+        """Block until the job finished, was cancelled or failed. Returns its result."""
+        self._done.wait(timeout)
+        return self.result
+
+
+class DecodeScheduler:
+    """Priority queue of decode jobs served by a single worker thread."""
+
+    def __init__(self, preemptible_kinds=()):
+        self.preemptible_kinds = set(preemptible_kinds)
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._running = None
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.preempted = 0
+        self.queue_wait = {}  # kind -> [jobs, total seconds waiting]
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, kind, priority, func, *args, **kwargs):
+        """Queue func(job, *args, **kwargs). Returns the DecodeJob."""
+        job = DecodeJob(kind, priority, func, args, kwargs)
+        job.sequence = next(self._sequence)
+        with self._lock:
+            self._pending.add(job)
+            running = self._running
+        if (running is not None and running.kind in self.preemptible_kinds
+                and priority < running.priority and not running.cancelled):
+            running.preempted = True
+            running.cancel()
+            self.preempted += 1
+        self._queue.put((priority, job.sequence, job))
+        return job
+
+    def cancel(self, kind=None):
+        """Cancel queued and running jobs (optionally only those of one kind). Returns the count."""
+        with self._lock:
+            jobs = list(self._pending)
+            if self._running is not None:
+                jobs.append(self._running)
+        count = 0
+        for job in jobs:
+            if (kind is None or job.kind == kind) and not job.cancelled:
+                job.cancel()
+                count += 1
+        return count
+
+    def peek(self, kind, limit):
+        """Up to `limit` queued, uncancelled jobs of `kind`, in submission order."""
+        with self._lock:
+            jobs = sorted((job for job in self._pending if job.kind == kind and not job.cancelled),
+                          key=lambda job: job.sequence)
+        return jobs[:limit]
+
+    def pending(self, kind=None):
+        with self._lock:
+            return sum(1 for job in self._pending if kind is None or job.kind == kind)
+
+    def _run(self):
+        while True:
+            priority, sequence, job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._pending.discard(job)
+                self._running = job
+            try:
+                if job.cancelled:
+                    raise DecodeCancelled()
+                job.started_at = time.perf_counter()
+                stats = self.queue_wait.setdefault(job.kind, [0, 0.0])
+                stats[0] += 1
+                stats[1] += job.started_at - job.submitted_at
+                job.result = job.func(job, *job.args, **job.kwargs)
+                if job.cancelled:
+                    # The job handled the cancellation itself and returned early
+                    self.cancelled += 1
+                else:
+                    self.completed += 1
+            except DecodeCancelled:
+                self.cancelled += 1
+            except Exception as e:
+                job.error = e
+                self.failed += 1
+                print(f"❌ Decode job failed: {e}")
+            finally:
+                with self._lock:
+                    self._running = None
+                job._done.set()
+
+    def stop(self):
+        self.cancel()
+        self._queue.put((-1, -1, None))
+
+    def summary(self):
+        waits = ", ".join(
+            f"{kind} avg wait {total / count * 1000:.0f}ms"
+            for kind, (count, total) in self.queue_wait.items() if count
+        )
+        text = f"{self.completed} completed, {self.cancelled} cancelled, {self.failed} failed"
+        if self.preempted:
+            text += f", {self.preempted} preempted"
+        return f"{text} | {waits}" if waits else text
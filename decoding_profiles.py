@@ -0,0 +1,161 @@
+"""
+Named decoding profiles for faster-whisper with confidence-triggered beam fallback.
+
+Profiles:
+  latency  - greedy decode, no timestamps, no context. Re-decodes with beam search
+             only when the greedy result looks poor (low avg_logprob or a high
+             compression ratio, which usually means repetition).
+  balanced - small beam, short temperature ladder, same confidence fallback.
+  accuracy - beam search with the full temperature fallback, timestamps and
+             conditioning on previous text (the original behaviour).
+"""
+
+import threading
+import time
+
+from decode_scheduler import DecodeCancelled
+
+DEFAULT_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+DECODING_PROFILES = {
+    "latency": {
+        "beam_size": 1,
+        "temperature": 0.0,
+        "without_timestamps": True,
+        "condition_on_previous_text": False,
+        "fallback": True,
+    },
+    "balanced": {
+        "beam_size": 2,
+        "temperature": (0.0, 0.4, 0.8),
+        "without_timestamps": True,
+        "condition_on_previous_text": False,
+        "fallback": True,
+    },
+    "accuracy": {
+        "beam_size": 5,
+        "temperature": DEFAULT_TEMPERATURES,
+        "without_timestamps": False,
+        "condition_on_previous_text": True,
+        "fallback": False,
+    },
+}
+
+# Options applied on top of a profile when its first pass is rejected
+FALLBACK_OPTIONS = {
+    "beam_size": 5,
+    "temperature": DEFAULT_TEMPERATURES,
+}
+
+# Same thresholds Whisper itself uses for its temperature fallback
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+
+
+def get_profile(name):
+    """Return the transcribe() options for a profile name (without the fallback flag)."""
+    if name not in DECODING_PROFILES:
+        raise ValueError(
+            f"Unknown decoding profile '{name}' (choose from: {', '.join(DECODING_PROFILES)})"
+        )
+    options = dict(DECODING_PROFILES[name])
+    options.pop("fallback")
+    return options
+
+
+def needs_fallback(segments,
+                   logprob_threshold=LOGPROB_THRESHOLD,
+                   compression_ratio_threshold=COMPRESSION_RATIO_THRESHOLD):
+    """Check whether any decoded segment is below the confidence thresholds."""
+    for segment in segments:
+        if segment.avg_logprob < logprob_threshold:
+            return True
+        if segment.compression_ratio > compression_ratio_threshold:
+            return True
+    return False
+
+
+class FallbackStats:
+    """Thread-safe counters for how often the beam fallback fires and what it costs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.decodes = 0
+        self.fallbacks = 0
+        self.first_pass_time = 0.0
+        self.fallback_time = 0.0
+
+    def record(self, first_pass_time, fallback_time=None):
+        with self._lock:
+            self.decodes += 1
+            self.first_pass_time += first_pass_time
+            if fallback_time is not None:
+                self.fallbacks += 1
+                self.fallback_time += fallback_time
+
+    @property
+    def fallback_rate(self):
+        return self.fallbacks / self.decodes if self.decodes else 0.0
+
+    def summary(self):
+        with self._lock:
+            if not self.decodes:
+                return "No decodes recorded"
+            avg_first = self.first_pass_time / self.decodes
+            avg_fallback = self.fallback_time / self.fallbacks if self.fallbacks else 0.0
+            total = self.first_pass_time + self.fallback_time
+            overhead = self.fallback_time / total * 100 if total else 0.0
+            return (
+                f"{self.decodes} decodes, {self.fallbacks} fallbacks ({self.fallback_rate:.1%}) | "
+                f"first pass avg {avg_first * 1000:.0f}ms | "
+                f"fallback avg {avg_fallback * 1000:.0f}ms | "
+                f"fallback share of decode time {overhead:.1f}%"
+            )
+
+
+def collect_segments(segments, cancel_event=None):
+    """Materialize the lazy segment generator, stopping early if cancelled.
+
+    faster-whisper decodes each segment as it is iterated, so abandoning the
+    generator stops the remaining decoder work.
+    """
+    collected = []
+    for segment in segments:
+        if cancel_event is not None and cancel_event.is_set():
+            raise DecodeCancelled()
+        collected.append(segment)
+    if cancel_event is not None and cancel_event.is_set():
+        raise DecodeCancelled()
+    return collected
+
+
+def transcribe_with_profile(model, audio, profile="latency", stats=None, cancel_event=None,
+                            **overrides):
+    """Transcribe `audio` with a named profile, re-decoding with beam search if needed.
+
+    Returns (segments, info, used_fallback) with the segment generator materialized.
+    Extra keyword arguments are passed to model.transcribe() for both passes.
+    Raises DecodeCancelled if `cancel_event` is set while decoding.
+    """
+    options = get_profile(profile)
+    options.update(overrides)
+
+    start = time.perf_counter()
+    segments, info = model.transcribe(audio, **options)
+    segments = collect_segments(segments, cancel_event)
+    first_pass_time = time.perf_counter() - start
+
+    if not DECODING_PROFILES[profile]["fallback"] or not needs_fallback(segments):
+        if stats:
+            stats.record(first_pass_time)
+        return segments, info, False
+
+    options.update(FALLBACK_OPTIONS)
+    start = time.perf_counter()
+    segments, info = model.transcribe(audio, **options)
+    segments = collect_segments(segments, cancel_event)
+    fallback_time = time.perf_counter() - start
+
+    if stats:
+        stats.record(first_pass_time, fallback_time)
+    return segments, info, True
@@ -0,0 +1,97 @@
+"""
+VAD endpointing shared by the live microphone loop and the stdin stream mode.
+
+Speech frames are buffered until the VAD reports SILENCE_DURATION_SEC of
+non-speech, then the buffered speech is emitted as one utterance. Silence is
+measured in audio frames, not wall-clock time, so a stream read faster than
+real time (a file or pipe) endpoints exactly like the live microphone.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# pcm: int16 bytes of the speech frames; start/end: stream position in seconds;
+# features: (audio, log-mel) from the feature accumulator, if one was given
+Utterance = namedtuple("Utterance", ["pcm", "start", "end", "features"], defaults=[None])
+
+
+class Endpointer:
+    """Turns a sequence of (frame, is_speech) pairs into utterances."""
+
+    def __init__(self, sample_rate=16000, frame_ms=30, silence_sec=1.0,
+                 max_buffer_bytes=None, check_interval=100, features=None):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.silence_frames = max(1, round(silence_sec * 1000 / frame_ms))
+        self.max_buffer_bytes = max_buffer_bytes
+        self.check_interval = check_interval
+        self.features = features  # Factory for an accumulator fed each speech frame (may return None)
+        self._accumulator = None
+        self.forced = 0  # Utterances cut because the buffer grew too large
+        self._buffer = bytearray()
+        self._position = 0  # Samples seen so far
+        self._start = None
+        self._end = None
+        self._silent = 0
+        self._speech_frames = 0
+
+    @property
+    def frame_bytes(self):
+        return int(self.sample_rate * self.frame_ms / 1000) * 2
+
+    @property
+    def buffered_bytes(self):
+        return len(self._buffer)
+
+    def push(self, frame, is_speech):
+        """Add one frame. Returns an Utterance when one just ended, else None."""
+        frame_start = self._position
+        self._position += len(frame) // 2
+
+        if is_speech:
+            if not self._buffer:
+                self._start = frame_start
+                if self.features is not None:
+                    self._accumulator = self.features()
+            self._buffer.extend(frame)
+            if self._accumulator is not None:
+                self._accumulator.push(frame)
+            self._end = self._position
+            self._silent = 0
+
+            # Check buffer size periodically to prevent excessive memory usage
+            self._speech_frames += 1
+            if (self.max_buffer_bytes and self._speech_frames % self.check_interval == 0
+                    and len(self._buffer) > self.max_buffer_bytes):
+                self.forced += 1
+                return self._emit()
+        elif self._buffer:
+            self._silent += 1
+            if self._silent >= self.silence_frames:
+                return self._emit()
+        return None
+
+    def flush(self):
+        """Emit whatever speech is buffered (end of stream). Returns an Utterance or None."""
+        return self._emit() if self._buffer else None
+
+    def reset(self):
+        """Drop buffered speech, e.g. when transcription is switched off."""
+        self._buffer.clear()
+        self._accumulator = None
+        self._silent = 0
+        self._speech_frames = 0
+
+    def _emit(self):
+        utterance = Utterance(bytes(self._buffer), self._start / self.sample_rate,
+                              self._end / self.sample_rate,
+                              self._accumulator.finalize() if self._accumulator else None)
+        self.reset()
+        return utterance
+
+
+def level_vad(frame, threshold=150.0):
+    """Stand-in for webrtcvad when it is not installed: RMS of int16 PCM above `threshold`."""
+    x = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    return float(np.dot(x, x)) / len(x) > threshold ** 2
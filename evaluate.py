@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Accuracy-versus-speed evaluation harness.
+
+Runs a labelled local corpus (16 kHz mono WAV files, each with a .txt file of
+the same name holding the reference text) through one or more model/decoding/
+VAD configurations. Reports WER and CER next to real-time factor and
+per-utterance latency, and writes a Pareto-frontier report to pick
+production settings from.
+
+Usage:
+    python evaluate.py corpus/ --models tiny,base,small --profiles latency,accuracy
+    python evaluate.py corpus/ --configs eval_configs.json --report eval_report.md
+
+A configs file is a JSON list such as:
+    [{"name": "small-fast", "model": "small", "profile": "latency", "vad_filter": true}]
+
+Configurations with "session": true decode the corpus in order as one dictation
+session (language pinned after the first confident detection, prompt carried
+forward), so the accuracy and latency effect of the session lock can be compared.
+
+With --cache, utterance/configuration pairs decoded by an earlier run are read
+back instead of decoded (reported at their original latency), so adding one
+configuration to a grid only decodes the new one.
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import re
+import time
+import wave
+
+import numpy as np
+
+from decoding_profiles import transcribe_with_profile
+from session_context import SessionContext
+from transcription_cache import DEFAULT_CACHE_DIR, CachedModel, TranscriptionCache
+
+PUNCTUATION_RE = re.compile(r"[^\w\s']")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Edit distance and error rates
+
+def edit_distance(reference, hypothesis):
+    """Levenshtein distance between two sequences.
+
+    Bit-parallel (Myers/Hyyrö): each reference position is one bit of a Python
+    int, so every hypothesis token costs a handful of big-int operations instead
+    of a full DP row.
+    """
+    if not reference:
+        return len(hypothesis)
+    if not hypothesis:
+        return len(reference)
+
+    length = len(reference)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+
+    match_masks = {}
+    for position, token in enumerate(reference):
+        match_masks[token] = match_masks.get(token, 0) | (1 << position)
+
+    positive = full  # Vertical +1 deltas
+    negative = 0     # Vertical -1 deltas
+    score = length
+    for token in hypothesis:
+        eq = match_masks.get(token, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        horizontal_pos = (negative | ~(xh | positive)) & full
+        horizontal_neg = positive & xh
+        if horizontal_pos & last:
+            score += 1
+        elif horizontal_neg & last:
+            score -= 1
+        horizontal_pos = ((horizontal_pos << 1) | 1) & full
+        horizontal_neg = (horizontal_neg << 1) & full
+        positive = (horizontal_neg | ~(xv | horizontal_pos)) & full
+        negative = horizontal_pos & xv
+    return score
+
+
+def normalize_text(text):
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(PUNCTUATION_RE.sub(" ", text.lower()).split())
+
+
+def word_errors(reference, hypothesis):
+    """Return (word edits, reference word count) after normalization."""
+    ref_words = normalize_text(reference).split()
+    hyp_words = normalize_text(hypothesis).split()
+    return edit_distance(ref_words, hyp_words), len(ref_words)
+
+
+def char_errors(reference, hypothesis):
+    """Return (character edits, reference character count) after normalization."""
+    ref_chars = normalize_text(reference)
+    hyp_chars = normalize_text(hypothesis)
+    return edit_distance(ref_chars, hyp_chars), len(ref_chars)
+
+
+def wer(reference, hypothesis):
+    edits, words = word_errors(reference, hypothesis)
+    return edits / words if words else float(edits > 0)
+
+
+def cer(reference, hypothesis):
+    edits, chars = char_errors(reference, hypothesis)
+    return edits / chars if chars else float(edits > 0)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Corpus and configurations
+
+def load_corpus(directory):
+    """Return [(name, float32 audio, reference text)] for every WAV with a .txt file."""
+    corpus = []
+    for wav_path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        txt_path = os.path.splitext(wav_path)[0] + ".txt"
+        if not os.path.exists(txt_path):
+            continue
+        with wave.open(wav_path, "rb") as wf:
+            if wf.getframerate() != 16000 or wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+                print(f"⚠️  Skipping {wav_path}: expected 16 kHz 16-bit mono")
+                continue
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        with open(txt_path, encoding="utf-8") as f:
+            reference = f.read().strip()
+        corpus.append((os.path.basename(wav_path), pcm.astype(np.float32) / 32768.0, reference))
+    return corpus
+
+
+def build_grid(models, profiles, vad_options, device, compute_type, session_options=(False,)):
+    configs = []
+    for model_size, profile, vad_filter, session in itertools.product(
+            models, profiles, vad_options, session_options):
+        configs.append({
+            "name": f"{model_size}-{profile}{'-vad' if vad_filter else ''}{'-session' if session else ''}",
+            "model": model_size,
+            "device": device,
+            "compute_type": compute_type,
+            "profile": profile,
+            "vad_filter": vad_filter,
+            "session": session,
+        })
+    return configs
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def evaluate_config(model, config, corpus):
+    """Decode the corpus with one configuration and aggregate its metrics."""
+    options = {key: value for key, value in config.items()
+               if key not in ("name", "model", "device", "compute_type", "profile", "session")}
+    session = SessionContext() if config.get("session") else None
+    word_edits = word_total = char_edits = char_total = 0
+    latencies = []
+    audio_total = 0.0
+    utterances = []
+
+    for name, audio, reference in corpus:
+        utterance_options = dict(options)
+        if session:
+            utterance_options.update(session.transcribe_options())
+        replayed = getattr(model, "replayed_sec", 0.0)
+        start = time.perf_counter()
+        segments, info, used_fallback = transcribe_with_profile(
+            model, audio, config.get("profile", "accuracy"), **utterance_options
+        )
+        hypothesis = " ".join(segment.text for segment in segments).strip()
+        # Results served by a transcription cache count at their original decode time
+        latency = time.perf_counter() - start + getattr(model, "replayed_sec", 0.0) - replayed
+        if session:
+            session.update(info, hypothesis, latency, len(audio) / 16000)
+
+        w_edits, w_count = word_errors(reference, hypothesis)
+        c_edits, c_count = char_errors(reference, hypothesis)
+        word_edits += w_edits
+        word_total += w_count
+        char_edits += c_edits
+        char_total += c_count
+        latencies.append(latency)
+        audio_total += len(audio) / 16000
+        utterances.append({"name": name, "hypothesis": hypothesis, "latency": latency,
+                           "wer": w_edits / w_count if w_count else float(w_edits > 0)})
+
+    decode_total = sum(latencies)
+    return {
+        "name": config["name"],
+        "config": config,
+        "wer": word_edits / word_total if word_total else 0.0,
+        "cer": char_edits / char_total if char_total else 0.0,
+        "rtf": audio_total / decode_total if decode_total else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "session": session.summary() if session else None,
+        "utterances": utterances,
+    }
+
+
+def pareto_frontier(results, cost="latency_p50"):
+    """Results not dominated on (WER, cost): nothing else is at least as good on both and better on one."""
+    frontier = []
+    for candidate in results:
+        dominated = any(
+            other is not candidate
+            and other["wer"] <= candidate["wer"] and other[cost] <= candidate[cost]
+            and (other["wer"] < candidate["wer"] or other[cost] < candidate[cost])
+            for other in results
+        )
+        if not dominated:
+            frontier.append(candidate)
+    return sorted(frontier, key=lambda result: result[cost])
+
+
+def write_report(results, frontier, path, corpus_size, failed=()):
+    """Markdown report plus a JSON copy; `failed` configurations are listed as FAILED rows."""
+    frontier_names = {result["name"] for result in frontier}
+    lines = [
+        "# Accuracy vs speed evaluation",
+        "",
+        f"Corpus: {corpus_size} utterances",
+        "",
+        "| Config | WER | CER | RTF | p50 latency | p95 latency | Pareto |",
+        "|--------|-----|-----|-----|-------------|-------------|--------|",
+    ]
+    for result in sorted(results, key=lambda r: r["latency_p50"]):
+        mark = "✅" if result["name"] in frontier_names else ""
+        lines.append(
+            f"| {result['name']} | {result['wer']:.2%} | {result['cer']:.2%} | "
+            f"{result['rtf']:.1f}x | {result['latency_p50'] * 1000:.0f}ms | "
+            f"{result['latency_p95'] * 1000:.0f}ms | {mark} |"
+        )
+    for failure in failed:
+        lines.append(f"| {failure['name']} | ❌ FAILED: {failure['error']} | | | | | |")
+    lines += ["", "## Pareto frontier (fastest first)", ""]
+    for result in frontier:
+        lines.append(f"- **{result['name']}**: WER {result['wer']:.2%}, "
+                     f"p50 {result['latency_p50'] * 1000:.0f}ms")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    json_path = os.path.splitext(path)[0] + ".json"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"results": results, "frontier": [r["name"] for r in frontier],
+                   "failed": list(failed)}, f, indent=2)
+    return json_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate WER/CER versus speed on a local corpus")
+    parser.add_argument("corpus", help="Directory of .wav files with matching .txt references")
+    parser.add_argument("--configs", default=None, help="JSON list of configurations")
+    parser.add_argument("--models", default="base", help="Comma-separated model sizes")
+    parser.add_argument("--profiles", default="latency,accuracy",
+                        help="Comma-separated decoding profiles")
+    parser.add_argument("--vad", default="off", help="Comma-separated VAD filter settings (off,on)")
+    parser.add_argument("--session", default="off",
+                        help="Comma-separated session language lock settings (off,on)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--report", default="eval_report.md", help="Markdown report path")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_DIR, default=None,
+                        help="Reuse results of unchanged utterance/config pairs from this directory")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"❌ No labelled audio found in {args.corpus}")
+        return 1
+    print(f"📚 Loaded {len(corpus)} labelled utterance(s)")
+
+    if args.configs:
+        with open(args.configs, encoding="utf-8") as f:
+            configs = json.load(f)
+    else:
+        configs = build_grid(
+            args.models.split(","), args.profiles.split(","),
+            [value.strip() == "on" for value in args.vad.split(",")],
+            args.device, args.compute_type,
+            [value.strip() == "on" for value in args.session.split(",")],
+        )
+
+    from model_store import ModelStore, load_model
+
+    cache = TranscriptionCache(directory=args.cache) if args.cache else None
+    models = {}
+    results = []
+    failed = []
+    for config in configs:
+        key = (config["model"], config.get("device", args.device),
+               config.get("compute_type", args.compute_type))
+        try:
+            if key not in models:
+                print(f"⏳ Loading {key[0]} on {key[1]} ({key[2]})...")
+                model = load_model(key[0], device=key[1], compute_type=key[2])
+                # Warm up so the first utterance does not carry the cold-start cost
+                segments, info = model.transcribe(np.zeros(16000, dtype=np.float32))
+                list(segments)
+                if cache is not None:
+                    model = CachedModel(model, cache,
+                                        "/".join((ModelStore().model_id(key[0]),) + key[1:]))
+                models[key] = model
+            print(f"🏃 Evaluating {config['name']}...")
+            result = evaluate_config(models[key], config, corpus)
+        except Exception as e:
+            # Reported as a failure, never as a (missing) row of the comparison
+            print(f"❌ {config['name']} failed: {e}")
+            failed.append({"name": config["name"], "config": config, "error": str(e)})
+            continue
+        print(f"   WER {result['wer']:.2%}  CER {result['cer']:.2%}  RTF {result['rtf']:.1f}x  "
+              f"p50 {result['latency_p50'] * 1000:.0f}ms")
+        results.append(result)
+
+    if cache is not None:
+        print(f"🗃️  Result cache: {cache.summary()}")
+    frontier = pareto_frontier(results)
+    json_path = write_report(results, frontier, args.report, len(corpus), failed)
+    print(f"\n📄 Report written to {args.report} (details in {json_path})")
+    print("🏆 Pareto frontier: " + ", ".join(result["name"] for result in frontier))
+    if failed:
+        print(f"❌ {len(failed)} configuration(s) failed: " + ", ".join(f["name"] for f in failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
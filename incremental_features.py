@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Incremental log-mel features computed while an utterance is still being captured.
+
+faster-whisper computes the log-mel spectrogram of the whole utterance inside
+transcribe(), after the endpoint. IncrementalLogMel computes every STFT frame
+whose window is already complete as audio arrives, so at the endpoint only the
+last couple of frames (which see the end padding) and Whisper's global
+max-clamp remain. The result matches FeatureExtractor(audio) exactly.
+
+PrecomputedFeatureExtractor wraps model.feature_extractor and hands the
+finished features to transcribe() when it is called with the same audio array
+(or, for the clips of a batched decode, with the same samples).
+
+Benchmark the endpoint latency this removes:
+    python incremental_features.py
+"""
+
+import argparse
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+N_FFT = 400
+HOP_LENGTH = 160
+PAD = N_FFT // 2  # Reflect padding of the centered STFT
+TAIL_PADDING = 160  # Zeros FeatureExtractor appends before the STFT
+
+
+@lru_cache(maxsize=4)
+def mel_filters(n_mels):
+    """Whisper's mel filterbank, built once per mel count."""
+    from faster_whisper.feature_extractor import FeatureExtractor
+    return FeatureExtractor.get_mel_filters(SAMPLE_RATE, N_FFT, n_mels=n_mels).astype(np.float32)
+
+
+@lru_cache(maxsize=1)
+def hann_window():
+    return np.hanning(N_FFT + 1)[:-1].astype(np.float32)
+
+
+def log_mel_frames(centered, count, filters):
+    """Raw log10 mel energies for `count` frames, the first starting at `centered[0]`."""
+    frames = np.lib.stride_tricks.as_strided(
+        centered, (count, N_FFT), (HOP_LENGTH * centered.strides[0], centered.strides[0])
+    )
+    spectrum = np.fft.rfft(frames * hann_window(), axis=-1).astype(np.complex64)
+    power = (np.abs(spectrum) ** 2).T
+    return np.log10(np.clip(filters @ power, 1e-10, None))
+
+
+class IncrementalLogMel:
+    """Accumulates int16 PCM frames and their log-mel features."""
+
+    def __init__(self, n_mels=80, stats=None):
+        self.n_mels = n_mels
+        self.stats = stats
+        self._filters = mel_filters(n_mels)
+        self._audio = np.empty(SAMPLE_RATE * 10 + PAD, dtype=np.float32)  # PAD reflect slots first
+        self._samples = 0
+        self._log_spec = np.empty((n_mels, 1000), dtype=np.float32)
+        self._frames = 0
+        self.push_time = 0.0  # Seconds spent while capturing (off the critical path)
+        self.finalize_time = 0.0  # Seconds spent at the endpoint
+
+    @property
+    def audio(self):
+        return self._audio[PAD:PAD + self._samples]
+
+    def _grow(self, array, needed, axis):
+        size = array.shape[axis]
+        if needed <= size:
+            return array
+        shape = list(array.shape)
+        shape[axis] = max(needed, size * 2)
+        grown = np.empty(shape, dtype=array.dtype)
+        index = [slice(None)] * array.ndim
+        index[axis] = slice(0, size)
+        grown[tuple(index)] = array
+        return grown
+
+    def push(self, pcm):
+        """Add int16 PCM bytes and compute every frame that no longer depends on the end."""
+        start = time.perf_counter()
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        self._audio = self._grow(self._audio, PAD + self._samples + len(samples), 0)
+        self._audio[PAD + self._samples:PAD + self._samples + len(samples)] = samples / 32768.0
+        before = self._samples
+        self._samples += len(samples)
+
+        if before <= PAD < self._samples:
+            # Left reflect padding is known once sample PAD has arrived
+            self._audio[:PAD] = self._audio[2 * PAD:PAD:-1]
+
+        # Frame k covers samples [k*hop - PAD, k*hop + PAD); it is final once that is all audio
+        stable = (self._samples - PAD) // HOP_LENGTH + 1 if self._samples > PAD else 0
+        if stable > self._frames:
+            count = stable - self._frames
+            self._log_spec = self._grow(self._log_spec, stable, 1)
+            self._log_spec[:, self._frames:stable] = log_mel_frames(
+                self._audio[self._frames * HOP_LENGTH:], count, self._filters
+            )
+            self._frames = stable
+        self.push_time += time.perf_counter() - start
+
+    def finalize(self):
+        """Return (audio, features) for the utterance, matching FeatureExtractor(audio)."""
+        start = time.perf_counter()
+        audio = self.audio
+        total_frames = len(audio) // HOP_LENGTH + 1
+        done = self._frames
+        if done < 2:
+            # Too short to have any stable frames worth keeping: compute it all
+            from faster_whisper.feature_extractor import FeatureExtractor
+            extractor = FeatureExtractor(feature_size=self.n_mels)
+            features = extractor(audio)
+            self.finalize_time += time.perf_counter() - start
+            if self.stats:
+                self.stats.record(self)
+            return audio, features
+
+        # Rebuild the padded signal from the first unfinished frame onwards
+        first_sample = done * HOP_LENGTH - PAD
+        tail = np.concatenate((audio[first_sample:], np.zeros(TAIL_PADDING, dtype=np.float32)))
+        tail = np.pad(tail, (0, PAD), mode="reflect")
+        log_spec = self._log_spec[:, :total_frames]
+        if total_frames > done:
+            log_spec = self._grow(self._log_spec, total_frames, 1)[:, :total_frames]
+            log_spec[:, done:] = log_mel_frames(tail, total_frames - done, self._filters)
+
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        features = (log_spec + 4.0) / 4.0
+        self.finalize_time += time.perf_counter() - start
+        if self.stats:
+            self.stats.record(self)
+        return audio, features
+
+
+class PrecomputedFeatureExtractor:
+    """Drop-in for model.feature_extractor that returns features computed ahead of time."""
+
+    def __init__(self, inner):
+        self._inner = inner
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def provide(self, audio, features):
+        """Use `features` when transcribe() extracts features from this exact `audio` array."""
+        with self._providing([(audio, features)], by_content=False):
+            yield
+
+    @contextmanager
+    def provide_many(self, entries):
+        """provide() for several (audio, features) pairs, e.g. the clips of a batched decode.
+
+        The batched pipeline slices each clip out of one concatenated array, so here a
+        waveform also matches an entry holding the same samples.
+        """
+        with self._providing(entries, by_content=True):
+            yield
+
+    @contextmanager
+    def _providing(self, entries, by_content):
+        self._local.entries = (entries, by_content)
+        try:
+            yield
+        finally:
+            self._local.entries = None
+
+    def __call__(self, waveform, padding=TAIL_PADDING, chunk_length=None):
+        provided = getattr(self._local, "entries", None)
+        if provided is not None:
+            entries, by_content = provided
+            for audio, features in entries:
+                if waveform is audio or (by_content and len(waveform) == len(audio)
+                                         and np.array_equal(waveform, audio)):
+                    break
+            else:
+                audio = features = None
+            if (audio is not None and padding == TAIL_PADDING and chunk_length is None
+                    and features.shape == (self._inner.mel_filters.shape[0],
+                                           len(audio) // HOP_LENGTH + 1)):
+                self.hits += 1
+                return features
+            self.misses += 1  # e.g. vad_filter rewrote the audio, or a different mel count
+        return self._inner(waveform, padding=padding, chunk_length=chunk_length)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+
+def attach_precomputed_features(model):
+    """Install the precomputed-feature hook on a WhisperModel (idempotent). Returns it."""
+    if not isinstance(model.feature_extractor, PrecomputedFeatureExtractor):
+        model.feature_extractor = PrecomputedFeatureExtractor(model.feature_extractor)
+    return model.feature_extractor
+
+
+class FeatureStats:
+    """Thread-safe totals of incremental vs endpoint feature time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.utterances = 0
+        self.push_time = 0.0
+        self.finalize_time = 0.0
+
+    def record(self, mel):
+        with self._lock:
+            self.utterances += 1
+            self.push_time += mel.push_time
+            self.finalize_time += mel.finalize_time
+
+    def summary(self):
+        with self._lock:
+            if not self.utterances:
+                return "No precomputed features"
+            return (f"{self.utterances} utterances | endpoint cost avg "
+                    f"{self.finalize_time / self.utterances * 1000:.1f}ms | computed during capture avg "
+                    f"{self.push_time / self.utterances * 1000:.1f}ms")
+
+
+def benchmark(durations=(2, 5, 10, 20, 30), n_mels=80, repeats=5, frame_ms=30):
+    """Compare full extraction at the endpoint with the incremental endpoint cost."""
+    from faster_whisper.feature_extractor import FeatureExtractor
+
+    extractor = FeatureExtractor(feature_size=n_mels)
+    rng = np.random.default_rng(0)
+    frame = SAMPLE_RATE * frame_ms // 1000
+    rows = []
+    for seconds in durations:
+        pcm = (rng.standard_normal(SAMPLE_RATE * seconds) * 3000).astype(np.int16)
+        full, finalize, capture = [], [], []
+        for _ in range(repeats):
+            audio = pcm.astype(np.float32) / 32768.0
+            start = time.perf_counter()
+            extractor(audio)
+            full.append(time.perf_counter() - start)
+
+            mel = IncrementalLogMel(n_mels)
+            for offset in range(0, len(pcm), frame):
+                mel.push(pcm[offset:offset + frame].tobytes())
+            mel.finalize()
+            finalize.append(mel.finalize_time)
+            capture.append(mel.push_time)
+        rows.append((seconds, min(full), min(finalize), min(capture)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint latency saved by incremental log-mel features")
+    parser.add_argument("--mels", type=int, default=80, help="80, or 128 for large-v3 models")
+    args = parser.parse_args()
+
+    print(f"{'Utterance':>9} {'Full at endpoint':>17} {'Incremental endpoint':>21} "
+          f"{'Saved':>8} {'During capture':>15}")
+    for seconds, full, finalize, capture in benchmark(n_mels=args.mels):
+        print(f"{seconds:>8}s {full * 1000:>15.1f}ms {finalize * 1000:>19.1f}ms "
+              f"{(full - finalize) * 1000:>6.1f}ms {capture * 1000:>13.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Idle model eviction with predictive preload.
+
+ModelManager owns the Whisper model. After a configurable period without any
+transcription it drops the model to free RAM/VRAM. `preload()` starts loading
+again in the background (called the moment the wake word fires or the hotkey
+is pressed) and finishes with a short warm-up decode, so by the time the
+first utterance has been spoken the model is usually ready. Callers that need
+the model before then simply block in `use()` while audio keeps buffering.
+"""
+
+import contextlib
+import gc
+import threading
+import time
+
+import numpy as np
+
+WARMUP_SECONDS = 1.0
+
+
+def warm_up(model):
+    """Run one tiny decode so the first real utterance does not pay cold-start costs."""
+    segments, info = model.transcribe(
+        np.zeros(int(16000 * WARMUP_SECONDS), dtype=np.float32),
+        beam_size=1, without_timestamps=True, language="en",
+    )
+    list(segments)
+
+
+def release_gpu_memory():
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+class ModelManager:
+    """Lazily loaded model that unloads itself when idle."""
+
+    def __init__(self, loader, idle_unload_sec=900, warmup=True):
+        self._loader = loader
+        self.idle_unload_sec = idle_unload_sec
+        self.warmup = warmup
+        self._condition = threading.Condition()
+        self._model = None
+        self._loading = False
+        self._load_error = None
+        self._in_use = 0
+        self._last_used = time.monotonic()
+        self._closed = False
+        self.loads = 0
+        self.unloads = 0
+        self.last_load_time = None
+        self.wait_time = 0.0  # Time callers spent blocked waiting for a load
+
+        if idle_unload_sec:
+            threading.Thread(target=self._idle_watch, daemon=True).start()
+
+    @property
+    def loaded(self):
+        with self._condition:
+            return self._model is not None
+
+    # ── loading ──────────────────────────────────────────────────────────────
+    def _load(self):
+        start = time.perf_counter()
+        model = error = None
+        try:
+            model = self._loader()
+            if self.warmup:
+                warm_up(model)
+        except Exception as e:
+            error = e
+        elapsed = time.perf_counter() - start
+
+        with self._condition:
+            self._loading = False
+            self._load_error = error
+            if model is not None:
+                self._model = model
+                self._last_used = time.monotonic()
+                self.loads += 1
+                self.last_load_time = elapsed
+            self._condition.notify_all()
+        if error is None:
+            print(f"✅ Model ready in {elapsed:.2f}s")
+        else:
+            print(f"❌ Model load failed: {error}")
+
+    def preload(self):
+        """Start loading in the background if the model is not resident. Returns immediately."""
+        with self._condition:
+            self._last_used = time.monotonic()
+            if self._model is not None or self._loading:
+                return False
+            self._loading = True
+        print("🔄 Loading model in the background...")
+        threading.Thread(target=self._load, daemon=True).start()
+        return True
+
+    def load(self):
+        """Load synchronously (used at startup)."""
+        with self._condition:
+            if self._model is not None:
+                return self._model
+            if not self._loading:
+                self._loading = True
+                start_here = True
+            else:
+                start_here = False
+        if start_here:
+            self._load()
+        with self._condition:
+            self._condition.wait_for(lambda: not self._loading)
+            if self._model is None:
+                raise RuntimeError(f"Model failed to load: {self._load_error}")
+            return self._model
+
+    @contextlib.contextmanager
+    def use(self):
+        """Borrow the model for one decode, loading it first if it was evicted."""
+        start = time.perf_counter()
+        self.preload()
+        with self._condition:
+            self._condition.wait_for(lambda: not self._loading)
+            if self._model is None:
+                raise RuntimeError(f"Model failed to load: {self._load_error}")
+            self._in_use += 1
+            model = self._model
+        waited = time.perf_counter() - start
+        if waited > 0.05:
+            self.wait_time += waited
+            print(f"⏳ Waited {waited:.2f}s for the model to load")
+        try:
+            yield model
+        finally:
+            with self._condition:
+                self._in_use -= 1
+                self._last_used = time.monotonic()
+                self._condition.notify_all()
+
+    # ── eviction ─────────────────────────────────────────────────────────────
+    def unload(self):
+        """Drop the model now unless a decode is running."""
+        with self._condition:
+            if self._model is None or self._in_use or self._loading:
+                return False
+            self._model = None
+            self.unloads += 1
+        gc.collect()
+        release_gpu_memory()
+        print("💤 Model unloaded after idle period")
+        return True
+
+    def _idle_watch(self):
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                if self._model is None or self._in_use:
+                    # Nothing to evict until a load or decode finishes
+                    self._condition.wait()
+                    continue
+                remaining = self._last_used + self.idle_unload_sec - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(timeout=remaining)
+                    continue
+            self.unload()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def summary(self):
+        load = f", last load {self.last_load_time:.2f}s" if self.last_load_time else ""
+        return f"{self.loads} load(s), {self.unloads} idle unload(s){load}, waited {self.wait_time:.2f}s"
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Local store of pre-converted Whisper models.
+
+Loading a model by name makes faster-whisper go through the Hugging Face
+download cache on every start. That fails offline, and a model stored as
+float16 is converted to int8 again on every load. The store keeps converted
+models in versioned directories:
+
+  models/<name>/v<N>/      CTranslate2 model files plus manifest.json
+                           (sha256 and size of every file, the stored
+                           quantization, source, converter versions)
+  models/<name>/CURRENT    the version that load_model() uses
+
+An import goes into a staging directory, and CURRENT is switched only after
+every file has been written and hashed, so a failed import leaves the
+previous version in use. load_model() resolves a name through the store and
+loads it with local_files_only. Names that are not in the store still load
+from the hub cache as before.
+
+CTranslate2 reads model.bin into its own buffers and cannot map it
+directly. Before loading, load_model() memory-maps the weight files and
+touches every page. This brings the file into the OS page cache once, and
+other processes loading the same version (decode workers, tools) read those
+shared pages instead of the disk. Storing the weights already in the compute
+type they run as means no conversion on load. Every load records a
+LoadReport with the page-in and load times, so cold starts can be compared.
+
+Usage:
+    python model_store.py import small --quantization int8      # convert from openai/whisper-small
+    python model_store.py import small --from-ct2                # copy faster-whisper's converted model
+    python model_store.py import small --from-ct2 path/to/ct2-model
+    python model_store.py list
+    python model_store.py verify small
+    python model_store.py load-time small --compute-type int8
+    python model_store.py prune small --keep 2
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+MANIFEST_VERSION = 1
+# Extra files the converter copies next to model.bin (feature extractor and tokenizer settings)
+COPY_FILES = ["tokenizer.json", "preprocessor_config.json"]
+PAGE_SIZE = mmap.PAGESIZE
+# CTranslate2's DataType enum order, as stored in model.bin variable headers
+CT2_DTYPES = ("float32", "int8", "int16", "int32", "float16", "bfloat16")
+CT2_BINARY_VERSION = 6
+
+LoadReport = collections.namedtuple(
+    "LoadReport", ["name", "path", "version", "quantization", "page_in_time", "load_time"]
+)
+
+
+def stored_quantization(path):
+    """Quantization of a CTranslate2 model.bin, read from its variable headers.
+
+    Named like the --quantization that produces it: the type of the matrix weights, plus
+    the type of the other float variables for int8/int16 (e.g. int8_float16). None if the
+    file is missing or not in the binary format this knows.
+    """
+    try:
+        with open(path, "rb") as f:
+            def unpack(fmt):
+                data = f.read(struct.calcsize(fmt))
+                if len(data) != struct.calcsize(fmt):
+                    raise ValueError("truncated")
+                return struct.unpack(fmt, data)
+
+            def skip_string():
+                f.seek(unpack("<H")[0], os.SEEK_CUR)
+
+            if unpack("<I")[0] != CT2_BINARY_VERSION:
+                return None
+            skip_string()  # Spec name
+            _, count = unpack("<II")  # Spec revision, variable count
+            weights, others = set(), set()
+            for _ in range(count):
+                (length,) = unpack("<H")
+                name = f.read(length).rstrip(b"\0").decode("utf-8", "replace")
+                (rank,) = unpack("<B")
+                unpack(f"<{rank}I")
+                type_id, size = unpack("<BI")
+                f.seek(size, os.SEEK_CUR)
+                if type_id >= len(CT2_DTYPES):
+                    return None
+                dtype = CT2_DTYPES[type_id]
+                if rank == 2 and name.endswith("weight"):
+                    weights.add(dtype)
+                elif dtype in ("float16", "bfloat16", "float32") and not name.endswith("_scale"):
+                    others.add(dtype)  # Biases, norms, convolutions: unquantized
+    except (OSError, ValueError, struct.error):
+        return None
+    weight = next((t for t in ("int8", "int16", "float16", "bfloat16", "float32") if t in weights), None)
+    if weight in ("int8", "int16"):
+        other = next((t for t in ("float16", "bfloat16") if t in others), None)
+        return f"{weight}_{other}" if other else weight
+    return weight
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def page_in(paths):
+    """Map each file and touch one byte per page so it is resident in the page cache.
+
+    Returns the number of bytes paged in.
+    """
+    total = 0
+    for path in paths:
+        size = os.path.getsize(path)
+        if not size:
+            continue
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+                mapped.madvise(mmap.MADV_WILLNEED)
+            pages = np.frombuffer(mapped, dtype=np.uint8)[::PAGE_SIZE]
+            int(pages.sum())  # Faults in every page; read-ahead makes this sequential I/O
+            del pages  # Release the buffer export before the map closes
+        total += size
+    return total
+
+
+class ModelStore:
+    """Versioned directory of converted models, one subdirectory per model name."""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+
+    def _dir(self, name):
+        return os.path.join(self.root, name)
+
+    def names(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if self.versions(name))
+
+    def versions(self, name):
+        """Version directory names, oldest first."""
+        directory = self._dir(name)
+        if not os.path.isdir(directory):
+            return []
+        found = [entry for entry in os.listdir(directory)
+                 if entry.startswith("v") and entry[1:].isdigit()
+                 and os.path.isfile(os.path.join(directory, entry, MANIFEST_FILE))]
+        return sorted(found, key=lambda version: int(version[1:]))
+
+    def current(self, name):
+        try:
+            with open(os.path.join(self._dir(name), CURRENT_FILE), encoding="utf-8") as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version if version in self.versions(name) else None
+
+    def path(self, name, version=None):
+        """Directory of a stored model version (default: CURRENT), or None."""
+        version = version or self.current(name)
+        return os.path.join(self._dir(name), version) if version else None
+
+    def manifest(self, name, version=None):
+        path = self.path(name, version)
+        if path is None:
+            return None
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+
+    def model_id(self, name):
+        """Name plus stored version and quantization, e.g. 'small@v2:int8'; the name if not stored."""
+        manifest = self.manifest(name) if self.current(name) else None
+        if manifest is None:
+            return name
+        return f"{name}@{manifest['version']}:{manifest.get('quantization') or 'as-converted'}"
+
+    # ── import ───────────────────────────────────────────────────────────────
+    def _staging(self, name):
+        staging = os.path.join(self._dir(name), f".staging-{os.getpid()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        return staging
+
+    def _commit(self, name, staging, quantization, source):
+        """Hash the staged files, write the manifest, publish as the next version."""
+        files = {}
+        for entry in sorted(os.listdir(staging)):
+            path = os.path.join(staging, entry)
+            if os.path.isfile(path):
+                files[entry] = {"sha256": file_sha256(path), "size": os.path.getsize(path)}
+        if "model.bin" not in files:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise ValueError(f"{source}: no model.bin, not a CTranslate2 model")
+
+        existing = self.versions(name)
+        version = f"v{int(existing[-1][1:]) + 1 if existing else 1}"
+        manifest = {
+            "format": MANIFEST_VERSION,
+            "name": name,
+            "version": version,
+            "quantization": quantization,
+            "source": source,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "converter": _converter_versions(),
+            "files": files,
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(staging, os.path.join(self._dir(name), version))
+        self.set_current(name, version)
+        return version
+
+    def set_current(self, name, version):
+        if version not in self.versions(name):
+            raise ValueError(f"{name}: no version {version}")
+        pointer = os.path.join(self._dir(name), CURRENT_FILE)
+        with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+        os.replace(pointer + ".tmp", pointer)
+
+    def import_ct2(self, name, source_dir, source=None):
+        """Copy an already converted CTranslate2 model directory in. Returns the version.
+
+        The files are copied as they are, so the manifest records the quantization read
+        from model.bin (None when it cannot be read).
+        """
+        staging = self._staging(name)
+        try:
+            for entry in os.listdir(source_dir):
+                path = os.path.join(source_dir, entry)
+                if os.path.isfile(path) and not entry.startswith("."):
+                    shutil.copyfile(os.path.realpath(path), os.path.join(staging, entry))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        quantization = stored_quantization(os.path.join(staging, "model.bin"))
+        return self._commit(name, staging, quantization, source or os.path.abspath(source_dir))
+
+    def convert(self, name, hf_model, quantization="int8"):
+        """Convert a Transformers Whisper checkpoint with the weights quantized. Returns the version.
+
+        Needs the `transformers` package (and torch) in addition to ctranslate2.
+        """
+        from ctranslate2.converters import TransformersConverter
+
+        staging = self._staging(name)
+        try:
+            converter = TransformersConverter(hf_model, copy_files=COPY_FILES)
+            converter.convert(staging, quantization=quantization, force=True)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return self._commit(name, staging, quantization, hf_model)
+
+    # ── maintenance ──────────────────────────────────────────────────────────
+    def verify(self, name, version=None, full=True):
+        """Problems found in a stored version (empty if intact). `full` re-hashes every file."""
+        path = self.path(name, version)
+        if path is None:
+            return [f"{name}: not in the store"]
+        problems = []
+        for entry, expected in self.manifest(name, version)["files"].items():
+            file_path = os.path.join(path, entry)
+            if not os.path.isfile(file_path):
+                problems.append(f"{entry}: missing")
+            elif os.path.getsize(file_path) != expected["size"]:
+                problems.append(f"{entry}: size {os.path.getsize(file_path)} != {expected['size']}")
+            elif full and file_sha256(file_path) != expected["sha256"]:
+                problems.append(f"{entry}: checksum mismatch")
+        return problems
+
+    def prune(self, name, keep=2):
+        """Delete old versions, keeping the newest `keep` and CURRENT. Returns those removed."""
+        versions = self.versions(name)
+        current = self.current(name)
+        kept = set(versions[-keep:]) if keep > 0 else set()
+        removed = [version for version in versions if version not in kept and version != current]
+        for version in removed:
+            shutil.rmtree(os.path.join(self._dir(name), version))
+        return removed
+
+
+def _converter_versions():
+    versions = {}
+    for package in ("ctranslate2", "faster_whisper", "transformers"):
+        module = sys.modules.get(package)
+        if module is None:
+            try:
+                module = __import__(package)
+            except ImportError:
+                continue
+        versions[package] = getattr(module, "__version__", "unknown")
+    return versions
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Loading
+
+def load_model(name, device="cpu", compute_type="default", store=None, prefault=True,
+               factory=None, **kwargs):
+    """WhisperModel for `name`, from the store when it holds the model.
+
+    The LoadReport is attached to the model as `load_report`. `factory` replaces
+    WhisperModel (same signature), e.g. for a different model class.
+    """
+    if factory is None:
+        from faster_whisper import WhisperModel as factory
+    store = store if isinstance(store, ModelStore) else ModelStore(store or DEFAULT_STORE_DIR)
+    path = store.path(name)
+    page_in_time = 0.0
+    if path is None:
+        manifest = None
+        start = time.perf_counter()
+        model = factory(name, device=device, compute_type=compute_type, **kwargs)
+    else:
+        manifest = store.manifest(name)
+        stored = manifest.get("quantization")
+        if stored and compute_type not in ("default", "auto", stored):
+            print(f"⚠️  {name} is stored as {stored}; it is converted to {compute_type} on every "
+                  f"load (import it with --quantization {compute_type} to skip that)")
+        if prefault:
+            start = time.perf_counter()
+            page_in([os.path.join(path, entry) for entry in manifest["files"]])
+            page_in_time = time.perf_counter() - start
+        start = time.perf_counter()
+        model = factory(path, device=device, compute_type=compute_type, local_files_only=True,
+                        **kwargs)
+    report = LoadReport(name, path or name, manifest["version"] if manifest else None,
+                        manifest.get("quantization") if manifest else None,
+                        page_in_time, time.perf_counter() - start)
+    try:
+        model.load_report = report
+    except AttributeError:
+        pass  # Model classes with __slots__
+    print(f"📦 {describe_load(report)}")
+    return model
+
+
+def describe_load(report):
+    if report.version is None:
+        return f"'{report.name}' loaded from the download cache in {report.load_time:.2f}s"
+    return (f"'{report.name}' {report.version} ({report.quantization or 'as converted'}) loaded "
+            f"from the model store: page-in {report.page_in_time:.2f}s, load {report.load_time:.2f}s")
+
+
+def drop_page_cache(path):
+    """Ask the OS to evict a stored model's pages (POSIX only) to measure a cold start."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for entry in os.listdir(path):
+        file_path = os.path.join(path, entry)
+        if os.path.isfile(file_path):
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local Whisper model store")
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR, help="Store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = sub.add_parser("import", help="Convert or copy a model into the store")
+    import_parser.add_argument("name", help="Store name, e.g. small or large-v3")
+    import_parser.add_argument("--quantization", default=None,
+                               help="Weight type to convert to (int8, int8_float16, float16, ...); "
+                                    "not with --from-ct2")
+    import_parser.add_argument("--from-hf", default=None,
+                               help="Transformers checkpoint to convert (default openai/whisper-<name>)")
+    import_parser.add_argument("--from-ct2", nargs="?", const="", default=None,
+                               help="Copy a converted model: a directory, or faster-whisper's "
+                                    "download of <name> when no path is given")
+
+    sub.add_parser("list", help="List stored models and versions")
+    verify_parser = sub.add_parser("verify", help="Check stored files against their checksums")
+    verify_parser.add_argument("name")
+    verify_parser.add_argument("--version", default=None)
+    time_parser = sub.add_parser("load-time", help="Measure cold and warm load time")
+    time_parser.add_argument("name")
+    time_parser.add_argument("--device", default="cpu")
+    time_parser.add_argument("--compute-type", default="default")
+    prune_parser = sub.add_parser("prune", help="Delete old versions")
+    prune_parser.add_argument("name")
+    prune_parser.add_argument("--keep", type=int, default=2)
+    args = parser.parse_args()
+
+    store = ModelStore(args.store)
+    if args.command == "import":
+        if args.from_ct2 is not None:
+            if args.quantization:
+                parser.error("--from-ct2 copies the model as it was converted; its quantization is "
+                             "read from model.bin (use --from-hf to convert with --quantization)")
+            source = args.from_ct2
+            if not source:
+                from faster_whisper.utils import download_model
+                print(f"⬇️  Fetching the converted '{args.name}' model...")
+                source = download_model(args.name)
+            version = store.import_ct2(args.name, source)
+        else:
+            hf_model = args.from_hf or f"openai/whisper-{args.name}"
+            print(f"🔄 Converting {hf_model} ({args.quantization or 'float32'})...")
+            version = store.convert(args.name, hf_model, args.quantization)
+        manifest = store.manifest(args.name, version)
+        size = sum(f["size"] for f in manifest["files"].values())
+        print(f"✅ Stored {args.name} {version} ({size / 1024**2:.0f} MB) in {store.path(args.name)}")
+    elif args.command == "list":
+        for name in store.names():
+            current = store.current(name)
+            for version in store.versions(name):
+                manifest = store.manifest(name, version)
+                size = sum(f["size"] for f in manifest["files"].values())
+                marker = "*" if version == current else " "
+                print(f"{marker} {name:16s} {version:4s} {manifest.get('quantization') or '-':14s} "
+                      f"{size / 1024**2:7.0f} MB  {manifest['created']}  {manifest['source']}")
+    elif args.command == "verify":
+        problems = store.verify(args.name, args.version)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            return 1
+        print(f"✅ {args.name} {args.version or store.current(args.name)}: all checksums match")
+    elif args.command == "load-time":
+        path = store.path(args.name)
+        if path is not None and drop_page_cache(path):
+            model = load_model(args.name, args.device, args.compute_type, store)
+            cold = model.load_report
+            del model
+            print(f"🧊 Cold: page-in {cold.page_in_time:.2f}s + load {cold.load_time:.2f}s")
+        model = load_model(args.name, args.device, args.compute_type, store)
+        warm = model.load_report
+        print(f"🔥 Warm: page-in {warm.page_in_time:.2f}s + load {warm.load_time:.2f}s")
+    elif args.command == "prune":
+        removed = store.prune(args.name, args.keep)
+        print(f"🧹 Removed {', '.join(removed) if removed else 'nothing'}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Multi-process capture/inference split over shared memory.
+
+The front-end process keeps only the light work (audio capture, VAD,
+Porcupine, hotkeys, pasting). Whisper decoding runs in separate worker
+processes so its GIL-holding Python parts cannot delay the audio callback.
+
+Utterance PCM travels through a multiprocessing.shared_memory ring buffer;
+only small JSON descriptors (offset, size, decode options) go over the worker
+pipes. The ring header also holds one cancel slot per worker, which the worker
+checks between segments.
+
+Workers are started as `python multiprocess_pipeline.py worker ...` rather than
+through multiprocessing's spawn, so they never re-import the main script and
+its audio/Porcupine setup.
+
+Usage:
+    python multiprocess_pipeline.py bench --mode both --seconds 20
+"""
+
+import argparse
+import collections
+import json
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+from decode_scheduler import DecodeCancelled
+
+MAX_WORKERS = 16
+HEADER_BYTES = 4096  # Cancel slots live here; PCM data starts page-aligned after it
+CANCEL_SLOT = struct.Struct("<q")
+CANCEL_POLL_SEC = 0.05  # How often a waiting caller checks its cancel event
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Shared-memory ring
+
+class SharedPcmRing:
+    """Ring buffer of variable-size PCM allocations in shared memory.
+
+    Allocation and release happen only in the owning (front-end) process.
+    Allocations never wrap; if an utterance does not fit before the end of the
+    ring it is placed at the start instead.
+    """
+
+    def __init__(self, capacity_bytes):
+        self.capacity = capacity_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + capacity_bytes)
+        self.shm.buf[:HEADER_BYTES] = bytes(HEADER_BYTES)
+        self._lock = threading.Condition()
+        self._live = collections.deque()  # [offset, nbytes, released]
+        self._by_offset = {}
+        self._tail = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _find_space(self, nbytes):
+        if not self._live:
+            self._tail = 0
+            return 0 if nbytes <= self.capacity else None
+        head = self._live[0][0]
+        if self._tail >= head:
+            if self._tail + nbytes <= self.capacity:
+                return self._tail
+            if nbytes <= head:
+                return 0
+            return None
+        if self._tail + nbytes <= head:
+            return self._tail
+        return None
+
+    def write(self, pcm, timeout=None):
+        """Copy PCM bytes into the ring. Returns the data offset, or None if no space in time."""
+        nbytes = len(pcm)
+        with self._lock:
+            if not self._lock.wait_for(
+                    lambda: self._find_space(nbytes) is not None, timeout):
+                return None
+            offset = self._find_space(nbytes)
+            start = HEADER_BYTES + offset
+            self.shm.buf[start:start + nbytes] = pcm
+            entry = [offset, nbytes, False]
+            self._live.append(entry)
+            self._by_offset[offset] = entry
+            self._tail = offset + nbytes
+            return offset
+
+    def release(self, offset):
+        """Free an allocation once its worker has finished with it."""
+        with self._lock:
+            entry = self._by_offset.pop(offset, None)
+            if entry is None:
+                return
+            entry[2] = True
+            while self._live and self._live[0][2]:
+                self._live.popleft()
+            self._lock.notify_all()
+
+    def set_cancel(self, slot, job_id):
+        CANCEL_SLOT.pack_into(self.shm.buf, slot * CANCEL_SLOT.size, job_id)
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def attach_ring(name):
+    """Attach to an existing ring from a worker without taking ownership of it."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # Python < 3.13 registers attachments with the resource tracker, which
+        # would unlink the segment when the worker exits
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Worker process
+
+class FakeDecoder:
+    """CPU-bound stand-in for Whisper used by the benchmark: pure Python, holds the GIL."""
+
+    def __init__(self, cost_per_audio_sec=0.15):
+        self.cost_per_audio_sec = cost_per_audio_sec
+
+    def transcribe(self, audio, **options):
+        duration = len(audio) / 16000
+        info = SimpleNamespace(language="en", language_probability=1.0, duration=duration)
+        return self._segments(duration), info
+
+    def _segments(self, duration):
+        # Lazy like faster-whisper: the work for each segment happens as it is iterated
+        start = 0.0
+        while start < duration:
+            end = min(start + 1.0, duration)
+            deadline = time.perf_counter() + (end - start) * self.cost_per_audio_sec
+            total = 0
+            while time.perf_counter() < deadline:
+                for i in range(1000):
+                    total += i * i
+            yield SimpleNamespace(text=" fake transcription", avg_logprob=-0.1,
+                                  compression_ratio=1.0, start=start, end=end)
+            start = end
+
+
+class SharedCancelFlag:
+    """Looks like a threading.Event to collect_segments; set when our job id is cancelled."""
+
+    def __init__(self, shm, slot, job_id):
+        self.shm = shm
+        self.slot = slot
+        self.job_id = job_id
+
+    def is_set(self):
+        return CANCEL_SLOT.unpack_from(self.shm.buf, self.slot * CANCEL_SLOT.size)[0] == self.job_id
+
+
+def decode_to_result(model, audio, profile, options, cancel_event=None):
+    """Run one decode and describe it as a JSON-safe dict (also used by remote workers)."""
+    from decoding_profiles import FallbackStats, transcribe_with_profile
+
+    result = {}
+    stats = FallbackStats()  # Per job, so the front-end can merge the timings
+    decode_start = time.perf_counter()
+    try:
+        segments, info, used_fallback = transcribe_with_profile(
+            model, audio, profile, stats=stats, cancel_event=cancel_event, **options
+        )
+        result.update({
+            "segments": [{"text": s.text, "start": s.start, "end": s.end,
+                          "avg_logprob": s.avg_logprob, "compression_ratio": s.compression_ratio}
+                         for s in segments],
+            "language": getattr(info, "language", None),
+            "language_probability": getattr(info, "language_probability", 0.0),
+            "used_fallback": used_fallback,
+            "first_pass_time": stats.first_pass_time,
+            "fallback_time": stats.fallback_time,
+        })
+    except DecodeCancelled:
+        result["cancelled"] = True
+    except Exception as e:
+        result["error"] = str(e)
+    result["decode_time"] = time.perf_counter() - decode_start
+    return result
+
+
+def unpack_result(result, stats=None):
+    """Turn a decode_to_result() dict back into (segments, info, used_fallback, decode_time)."""
+    if result.get("cancelled"):
+        raise DecodeCancelled()
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    if stats:
+        stats.record(result["first_pass_time"],
+                     result["fallback_time"] if result["used_fallback"] else None)
+    segments = [SimpleNamespace(**segment) for segment in result["segments"]]
+    info = SimpleNamespace(language=result["language"],
+                           language_probability=result["language_probability"])
+    return segments, info, result["used_fallback"], result["decode_time"]
+
+
+def worker_main(args):
+    # The protocol gets a private copy of the stdout pipe, and fd 1 itself is pointed at
+    # stderr, so prints and native-library output (CTranslate2, CUDA) cannot interleave
+    sys.stdout.flush()
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    shm = attach_ring(args.ring)
+    if args.fake:
+        model = FakeDecoder()
+    else:
+        from model_store import load_model
+        # Workers loading the same stored version read it from the shared page cache
+        model = load_model(args.model, device=args.device, compute_type=args.compute_type,
+                           store=args.store, cpu_threads=args.cpu_threads)
+    protocol.write(json.dumps({"ready": True}) + "\n")
+    protocol.flush()
+
+    for line in sys.stdin:
+        job = json.loads(line)
+        if job.get("stop"):
+            break
+        start = HEADER_BYTES + job["offset"]
+        pcm = np.ndarray((job["nbytes"] // 2,), dtype=np.int16, buffer=shm.buf, offset=start)
+        audio = pcm.astype(np.float32) / 32768.0  # Copy out so the slot can be reused
+        del pcm
+        result = decode_to_result(model, audio, job["profile"], job["options"],
+                                  SharedCancelFlag(shm, args.slot, job["id"]))
+        result["id"] = job["id"]
+        protocol.write(json.dumps(result) + "\n")
+        protocol.flush()
+    shm.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Front-end side
+
+class _Worker:
+    def __init__(self, slot, process):
+        self.slot = slot
+        self.process = process
+        self.outstanding = 0
+        self.ready = threading.Event()
+
+
+class ProcessDecodePool:
+    """Dispatches utterances to decode worker processes through a shared-memory ring.
+
+    transcribe() blocks its caller, so decodes only overlap when several threads
+    call it. The app's DecodeScheduler runs one job at a time (results paste in
+    order), so there extra workers sit idle; use workers > 1 from threaded callers.
+    """
+
+    def __init__(self, workers=1, model_size="small", device="cpu", compute_type="int8",
+                 ring_mb=64, cpu_threads=0, fake=False, store=None):
+        if not 1 <= workers <= MAX_WORKERS:
+            raise ValueError(f"workers must be between 1 and {MAX_WORKERS}")
+        self.ring = SharedPcmRing(ring_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._pending = {}
+        self._workers = []
+        script = os.path.abspath(__file__)
+        for slot in range(workers):
+            command = [sys.executable, script, "worker", "--ring", self.ring.name,
+                       "--slot", str(slot), "--model", model_size, "--device", device,
+                       "--compute-type", compute_type, "--cpu-threads", str(cpu_threads)]
+            if fake:
+                command.append("--fake")
+            if store:
+                command += ["--store", store]
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       text=True, bufsize=1)
+            worker = _Worker(slot, process)
+            self._workers.append(worker)
+            threading.Thread(target=self._read_results, args=(worker,), daemon=True).start()
+
+    def wait_ready(self, timeout=None):
+        """Wait for every worker to load its model. False if one failed or timed out."""
+        return all(worker.ready.wait(timeout) and worker.process.poll() is None
+                   for worker in self._workers)
+
+    def _read_results(self, worker):
+        for line in worker.process.stdout:
+            try:
+                message = json.loads(line)
+                job_id = None if message.get("ready") else message["id"]
+            except (ValueError, KeyError, TypeError, AttributeError):
+                # Nothing else writes to the protocol pipe, so a result was garbled and
+                # its job would never be answered: stop the worker and fail its jobs below
+                print(f"⚠️  Decode worker {worker.slot} sent an invalid message ({line[:80]!r}); "
+                      f"stopping it", file=sys.stderr)
+                worker.process.kill()
+                break
+            if job_id is None:
+                worker.ready.set()
+                continue
+            with self._lock:
+                pending = self._pending.pop(job_id, None)
+                worker.outstanding -= 1
+            if pending is not None:
+                self.ring.release(pending["offset"])
+                pending["result"] = message
+                pending["done"].set()
+        # Worker exited: unblock wait_ready() and fail everything still assigned to it
+        worker.process.wait()
+        worker.ready.set()
+        with self._lock:
+            orphaned = [p for p in self._pending.values() if p["worker"] is worker]
+            for pending in orphaned:
+                self._pending.pop(pending["id"])
+        for pending in orphaned:
+            self.ring.release(pending["offset"])
+            pending["result"] = {"error": "decode worker exited"}
+            pending["done"].set()
+
+    def transcribe(self, pcm, profile, options=None, stats=None, cancel_event=None):
+        """Decode int16 PCM bytes in a worker. Returns (segments, info, used_fallback, decode_time).
+
+        Mirrors transcribe_with_profile(): fallback timings go to `stats` and
+        DecodeCancelled is raised if `cancel_event` is set while decoding.
+        """
+        offset = self.ring.write(pcm, timeout=30)
+        if offset is None:
+            raise RuntimeError("Shared audio ring is full")
+        with self._lock:
+            # A worker that exited can never answer; only running ones get new jobs
+            alive = [w for w in self._workers if w.process.poll() is None]
+            if not alive:
+                self.ring.release(offset)
+                raise RuntimeError("No decode worker is running")
+            job_id = self._next_id
+            self._next_id += 1
+            worker = min(alive, key=lambda w: w.outstanding)
+            worker.outstanding += 1
+            pending = {"id": job_id, "offset": offset, "worker": worker,
+                       "done": threading.Event(), "result": None}
+            self._pending[job_id] = pending
+        try:
+            worker.process.stdin.write(json.dumps({
+                "id": job_id, "offset": offset, "nbytes": len(pcm),
+                "profile": profile, "options": options or {},
+            }) + "\n")
+            worker.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            # The worker died between the check and the write; unless its reader thread
+            # already failed the job, give back the slot and the ring space here
+            with self._lock:
+                orphaned = self._pending.pop(job_id, None) is not None
+                worker.outstanding -= 1
+            if orphaned:
+                self.ring.release(offset)
+            raise RuntimeError(f"Could not send the job to decode worker {worker.slot}: {e}")
+
+        # Short waits only so a cancel reaches the worker promptly; the result wakes us immediately
+        while not pending["done"].wait(CANCEL_POLL_SEC if cancel_event is not None else None):
+            if cancel_event.is_set():
+                self.ring.set_cancel(worker.slot, job_id)
+
+        return unpack_result(pending["result"], stats)
+
+    def close(self):
+        for worker in self._workers:
+            try:
+                worker.process.stdin.write(json.dumps({"stop": True}) + "\n")
+                worker.process.stdin.close()
+            except OSError:
+                pass
+        for worker in self._workers:
+            try:
+                worker.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+        self.ring.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Benchmark: capture-callback jitter and overflows under decode load
+
+def run_capture_bench(mode, seconds, block_ms=30, utterance_sec=3.0):
+    """Simulate a capture callback every block while utterances are decoded continuously.
+
+    A callback that starts more than one block late is counted as an overflow:
+    PortAudio's input buffer would have wrapped by then.
+    """
+    block = block_ms / 1000
+    pcm = (np.random.default_rng(0).standard_normal(int(16000 * utterance_sec)) * 3000) \
+        .astype(np.int16).tobytes()
+    stop = threading.Event()
+    lateness = []
+    decode_latencies = []
+
+    pool = None
+    if mode == "multiprocess":
+        pool = ProcessDecodePool(workers=1, fake=True)
+        pool.wait_ready(timeout=30)
+    decoder = FakeDecoder()
+
+    def capture():
+        next_tick = time.perf_counter() + block
+        while not stop.is_set():
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.perf_counter()
+            lateness.append(now - next_tick)
+            # Same per-block work as audio_callback
+            (np.zeros(int(16000 * block), dtype=np.float32) * 32767).astype(np.int16).tobytes()
+            next_tick += block
+
+    def decode_load():
+        from decoding_profiles import transcribe_with_profile
+        while not stop.is_set():
+            start = time.perf_counter()
+            if pool:
+                pool.transcribe(pcm, "latency")
+            else:
+                audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+                transcribe_with_profile(decoder, audio, "latency")
+            decode_latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=capture), threading.Thread(target=decode_load)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if pool:
+        pool.close()
+
+    late_ms = np.array(lateness) * 1000
+    return {
+        "mode": mode,
+        "callbacks": len(late_ms),
+        "overflows": int((late_ms > block_ms).sum()),
+        "late_p50_ms": float(np.percentile(late_ms, 50)),
+        "late_p99_ms": float(np.percentile(late_ms, 99)),
+        "late_max_ms": float(late_ms.max()),
+        "decodes": len(decode_latencies),
+        "decode_avg_ms": float(np.mean(decode_latencies) * 1000) if decode_latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory decode workers")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    worker_parser = sub.add_parser("worker", help="Run a decode worker (started by the pool)")
+    worker_parser.add_argument("--ring", required=True)
+    worker_parser.add_argument("--slot", type=int, required=True)
+    worker_parser.add_argument("--model", default="small")
+    worker_parser.add_argument("--device", default="cpu")
+    worker_parser.add_argument("--compute-type", default="int8")
+    worker_parser.add_argument("--cpu-threads", type=int, default=0)
+    worker_parser.add_argument("--store", default=None, help="Model store directory")
+    worker_parser.add_argument("--fake", action="store_true", help="Use the CPU-burning fake decoder")
+
+    bench_parser = sub.add_parser("bench", help="Measure capture jitter/overflows under decode load")
+    bench_parser.add_argument("--mode", choices=["threaded", "multiprocess", "both"], default="both")
+    bench_parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        worker_main(args)
+        return
+
+    modes = ["threaded", "multiprocess"] if args.mode == "both" else [args.mode]
+    print(f"{'Mode':<14} {'Callbacks':>9} {'Overflows':>9} {'p50 late':>9} {'p99 late':>9} "
+          f"{'max late':>9} {'Decodes':>8} {'Decode avg':>11}")
+    for mode in modes:
+        r = run_capture_bench(mode, args.seconds)
+        print(f"{r['mode']:<14} {r['callbacks']:>9} {r['overflows']:>9} {r['late_p50_ms']:>7.2f}ms "
+              f"{r['late_p99_ms']:>7.2f}ms {r['late_max_ms']:>7.2f}ms {r['decodes']:>8} "
+              f"{r['decode_avg_ms']:>9.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
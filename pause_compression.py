@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Silence trimming and pause compression before encoding.
+
+Whisper's cost grows with the audio it is handed, but a hotkey dictation
+carries the silence before and after the speech, and a long-file chunk keeps
+every pause between its speech regions. compress_pauses() trims leading and
+trailing silence down to a small margin and shortens every internal pause
+longer than max_pause_sec, using a vectorized frame-level energy VAD. The
+TimeMap it returns converts timestamps in the compressed audio back to the
+original buffer's time.
+
+A frame is speech when it is margin_db above the buffer's noise floor or
+louder than SPEECH_DB, so a phrase spoken more softly than the rest of the
+buffer is never cut as a pause. Buffers where less than min_removed_sec
+would be cut are returned unchanged. Continuous-mode utterances are already
+cut to speech by the VAD endpointer, so the app does not compress them.
+
+Measure the decode-time saving on a corpus of dictation WAVs:
+    python pause_compression.py corpus/ --model base
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+MARGIN_SEC = 0.2  # Silence kept before/after speech
+MAX_PAUSE_SEC = 0.6  # Internal pauses are shortened to this
+MIN_REMOVED_SEC = 0.3  # Smaller savings leave the buffer untouched
+SPEECH_MARGIN_DB = 12.0  # Frames this far above the noise floor count as speech
+SPEECH_DB = -45.0  # Frames louder than this count as speech, however loud the rest is
+FLOOR_DB = -60.0
+
+
+class TimeMap:
+    """Maps times in compressed audio back to the original audio."""
+
+    def __init__(self, spans, original_samples, sample_rate=SAMPLE_RATE):
+        # spans: [(original start, original end)] in samples, in order
+        self.original_samples = original_samples
+        self.sample_rate = sample_rate
+        self.original_starts = np.array([start for start, _ in spans], dtype=np.int64)
+        lengths = np.array([end - start for start, end in spans], dtype=np.int64)
+        self.compressed_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+        self.lengths = lengths
+
+    @classmethod
+    def identity(cls, samples, sample_rate=SAMPLE_RATE):
+        return cls([(0, samples)], samples, sample_rate)
+
+    @property
+    def kept_samples(self):
+        return int(self.lengths.sum())
+
+    @property
+    def removed_sec(self):
+        return (self.original_samples - self.kept_samples) / self.sample_rate
+
+    def to_original(self, seconds, end=False):
+        """Original time of a compressed-audio timestamp.
+
+        At a cut, a start maps to the beginning of the next kept span and an
+        end (end=True) to the close of the previous one.
+        """
+        position = np.asarray(seconds, dtype=np.float64) * self.sample_rate
+        index = np.searchsorted(self.compressed_starts, position, side="left" if end else "right") - 1
+        index = np.clip(index, 0, len(self.compressed_starts) - 1)
+        original = self.original_starts[index] + (position - self.compressed_starts[index])
+        result = original / self.sample_rate
+        return float(result) if result.ndim == 0 else result
+
+
+def frame_levels(samples, frame_samples):
+    """Per-frame RMS level in dBFS of an int16 or float32 buffer."""
+    count = len(samples) // frame_samples
+    x = np.asarray(samples[:count * frame_samples], dtype=np.float32).reshape(count, frame_samples)
+    if samples.dtype == np.int16:
+        x = x / 32768.0
+    return 10 * np.log10(np.einsum("ij,ij->i", x, x) / frame_samples + 1e-10)
+
+
+def kept_spans(samples, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, margin_sec=MARGIN_SEC,
+               max_pause_sec=MAX_PAUSE_SEC, margin_db=SPEECH_MARGIN_DB):
+    """Sample ranges to keep: speech plus margins, with long pauses shortened."""
+    frame_samples = sample_rate * frame_ms // 1000
+    levels = frame_levels(samples, frame_samples)
+    if not len(levels):
+        return [(0, len(samples))]
+    # The relative threshold alone would cut soft speech in a buffer with no pauses
+    threshold = min(max(np.percentile(levels, 10) + margin_db, FLOOR_DB), SPEECH_DB)
+    speech = levels > threshold
+    if not speech.any() or speech.all():
+        return [(0, len(samples))]
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.view(np.int8), [0]))))
+    starts, ends = edges[0::2] * frame_samples, np.minimum(edges[1::2] * frame_samples, len(samples))
+    margin = int(margin_sec * sample_rate)
+    half_pause = int(max_pause_sec * sample_rate) // 2
+
+    spans = [[max(0, int(starts[0]) - margin), None]]
+    for end, next_start in zip(ends[:-1], starts[1:]):
+        if next_start - end > 2 * half_pause:
+            spans[-1][1] = int(end) + half_pause
+            spans.append([int(next_start) - half_pause, None])
+    spans[-1][1] = min(len(samples), int(ends[-1]) + margin)
+    return [tuple(span) for span in spans]
+
+
+def compress_pauses(samples, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, margin_sec=MARGIN_SEC,
+                    max_pause_sec=MAX_PAUSE_SEC, min_removed_sec=MIN_REMOVED_SEC):
+    """Return (audio, TimeMap): trimmed and pause-compressed, or the input if little would go."""
+    spans = kept_spans(samples, sample_rate, frame_ms, margin_sec, max_pause_sec)
+    time_map = TimeMap(spans, len(samples), sample_rate)
+    if time_map.removed_sec < min_removed_sec:
+        return samples, TimeMap.identity(len(samples), sample_rate)
+    if len(spans) == 1:
+        start, end = spans[0]
+        return samples[start:end], time_map  # A view; no copy for a plain trim
+    return np.concatenate([samples[start:end] for start, end in spans]), time_map
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Decode-time measurement
+
+def measure(model, paths, profile="latency", repeats=2):
+    """Decode each WAV as-is and compressed; return per-file timings and texts."""
+    from decoding_profiles import transcribe_with_profile
+    from transcribe_file import map_wav
+
+    def decode(audio):
+        best, text = None, ""
+        for _ in range(repeats):
+            start = time.perf_counter()
+            segments, _, _ = transcribe_with_profile(model, audio, profile)
+            text = " ".join(segment.text for segment in segments).strip()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, text
+
+    rows = []
+    for path in paths:
+        audio = np.asarray(map_wav(path), dtype=np.float32) / 32768.0
+        compressed, time_map = compress_pauses(audio)
+        original_time, original_text = decode(audio)
+        compressed_time, compressed_text = decode(compressed)
+        rows.append({
+            "name": os.path.basename(path),
+            "audio_sec": len(audio) / SAMPLE_RATE,
+            "removed_sec": time_map.removed_sec,
+            "original_time": original_time,
+            "compressed_time": compressed_time,
+            "original_text": original_text,
+            "compressed_text": compressed_text,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure decode time saved by pause compression")
+    parser.add_argument("corpus", help="Directory of 16 kHz mono dictation WAV files")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--profile", default="latency")
+    args = parser.parse_args()
+
+    from model_store import load_model
+    from evaluate import wer
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "*.wav")))
+    if not paths:
+        parser.error(f"no WAV files in {args.corpus}")
+    model = load_model(args.model, device=args.device, compute_type=args.compute_type)
+    rows = measure(model, paths, args.profile)
+
+    for row in rows:
+        print(f"  {row['name']:24s} {row['audio_sec']:5.1f}s audio, -{row['removed_sec']:4.1f}s | "
+              f"{row['original_time'] * 1000:6.0f}ms -> {row['compressed_time'] * 1000:6.0f}ms")
+    audio = sum(row["audio_sec"] for row in rows)
+    removed = sum(row["removed_sec"] for row in rows)
+    before = sum(row["original_time"] for row in rows)
+    after = sum(row["compressed_time"] for row in rows)
+    changed = sum(wer(row["original_text"], row["compressed_text"]) for row in rows) / len(rows)
+    print(f"\n✂️  Removed {removed:.1f}s of {audio:.1f}s ({removed / audio:.0%})")
+    print(f"⚡ Decode time {before:.2f}s -> {after:.2f}s ({(before - after) / before:.0%} saved)")
+    print(f"📝 Word difference between original and compressed transcripts: {changed:.1%}")
+
+
+if __name__ == "__main__":
+    main()
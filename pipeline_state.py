@@ -0,0 +1,132 @@
+"""
+Event-driven state machine for the voice pipeline.
+
+Continuous mode moves between three states:
+
+    IDLE --wake--> LISTENING --begin_decode--> TRANSCRIBING --end_decode--> LISTENING
+      ^                |                            |
+      +-----sleep------+------------sleep-----------+
+
+One-time (hotkey) dictation runs alongside continuous mode, so it is tracked
+separately; `state` reports ONE_TIME while it is active. All transitions happen
+under one condition variable, and waiters block on it instead of polling.
+"""
+
+import enum
+import threading
+
+
+class State(enum.Enum):
+    IDLE = "idle"
+    LISTENING = "listening"
+    TRANSCRIBING = "transcribing"
+    ONE_TIME = "one-time"
+
+
+TRANSITIONS = {
+    "wake": {State.IDLE: State.LISTENING},
+    "sleep": {State.LISTENING: State.IDLE, State.TRANSCRIBING: State.IDLE},
+    "begin_decode": {State.LISTENING: State.TRANSCRIBING},
+    "end_decode": {State.TRANSCRIBING: State.LISTENING},
+}
+
+
+class PipelineStateMachine:
+    """Race-free owner of the pipeline mode, with blocking waits and transition listeners."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._continuous = State.IDLE
+        self._one_time = False
+        self._listeners = []
+
+    # ── queries ──────────────────────────────────────────────────────────────
+    @property
+    def state(self):
+        with self._condition:
+            return State.ONE_TIME if self._one_time else self._continuous
+
+    @property
+    def continuous_state(self):
+        with self._condition:
+            return self._continuous
+
+    @property
+    def continuous_active(self):
+        """True while continuous mode is capturing or decoding."""
+        with self._condition:
+            return self._continuous is not State.IDLE
+
+    @property
+    def one_time_active(self):
+        with self._condition:
+            return self._one_time
+
+    # ── listeners ────────────────────────────────────────────────────────────
+    def add_listener(self, callback):
+        """Register callback(event, old_state, new_state), called after each transition."""
+        self._listeners.append(callback)
+
+    def _notify(self, event, old, new):
+        for callback in self._listeners:
+            try:
+                callback(event, old, new)
+            except Exception as e:
+                print(f"⚠️  Warning: state listener failed on '{event}': {e}")
+
+    # ── transitions ──────────────────────────────────────────────────────────
+    def _fire(self, event):
+        with self._condition:
+            old = self._continuous
+            new = TRANSITIONS[event].get(old)
+            if new is None:
+                return False
+            self._continuous = new
+            self._condition.notify_all()
+        self._notify(event, old, new)
+        return True
+
+    def wake(self):
+        return self._fire("wake")
+
+    def sleep(self):
+        return self._fire("sleep")
+
+    def begin_decode(self):
+        return self._fire("begin_decode")
+
+    def end_decode(self):
+        return self._fire("end_decode")
+
+    def begin_one_time(self):
+        """Start one-time dictation. Returns False if one is already running."""
+        with self._condition:
+            if self._one_time:
+                return False
+            self._one_time = True
+            self._condition.notify_all()
+        self._notify("begin_one_time", None, State.ONE_TIME)
+        return True
+
+    def end_one_time(self):
+        with self._condition:
+            if not self._one_time:
+                return False
+            self._one_time = False
+            self._condition.notify_all()
+        self._notify("end_one_time", State.ONE_TIME, None)
+        return True
+
+    # ── waiting ──────────────────────────────────────────────────────────────
+    def wait_for(self, predicate, timeout=None):
+        """Block until predicate(state) holds; returns its final value."""
+        with self._condition:
+            return self._condition.wait_for(lambda: predicate(self._snapshot()), timeout)
+
+    def wait_until_active(self, timeout=None):
+        """Block until continuous mode leaves IDLE."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._continuous is not State.IDLE, timeout)
+
+    def _snapshot(self):
+        return State.ONE_TIME if self._one_time else self._continuous
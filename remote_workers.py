@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Remote transcription workers.
+
+A low-power front-end (wake word, hotkey, VAD) can send utterance PCM to one or
+more worker nodes running this script, and falls back to its local model when
+no worker answers in time.
+
+Protocol (TCP, little-endian). Every message is one frame:
+    magic b"OATW" | type: u8 | payload length: u32 | payload
+    REQUEST  payload: json length: u32 | JSON {profile, options} | int16 PCM (16 kHz mono)
+    RESULT   payload: JSON (segments, language, timings; see decode_to_result)
+    PING     payload: empty
+    PONG     payload: JSON {active, model}
+Connections are kept open and reused for many requests.
+
+Run a worker (requests are not authenticated: it listens on localhost unless
+given --host, and only use a LAN address on a trusted network):
+    python remote_workers.py serve --host 0.0.0.0 --port 8765 --model small
+    python remote_workers.py serve --port 8765 --fake     # stand-in without a model
+Check workers from the front-end machine:
+    python remote_workers.py ping 192.168.1.20:8765 192.168.1.21:8765
+"""
+
+import argparse
+import json
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from decode_scheduler import DecodeCancelled
+from decoding_profiles import DECODING_PROFILES
+from multiprocess_pipeline import FakeDecoder, decode_to_result, unpack_result
+
+MAGIC = b"OATW"
+HEADER = struct.Struct("<4sBI")
+JSON_LENGTH = struct.Struct("<I")
+REQUEST, RESULT, PING, PONG = 1, 2, 3, 4
+MAX_PAYLOAD = 64 * 1024 * 1024
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# The only transcribe() options a request may set; the profile supplies the rest
+REQUEST_OPTIONS = {"language": str, "initial_prompt": str}
+CANCEL_POLL_SEC = 0.1
+FAILURE_BACKOFF_SEC = 10.0  # An unhealthy node is skipped this long before retrying
+
+
+class RemoteDecodeError(Exception):
+    """No worker produced a result (unreachable, timed out or failed)."""
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Framing
+
+def send_frame(sock, kind, payload=b""):
+    sock.sendall(HEADER.pack(MAGIC, kind, len(payload)) + payload)
+
+
+def recv_exact(sock, size):
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunk = sock.recv(min(size - len(chunks), 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.extend(chunk)
+    return bytes(chunks)
+
+
+def recv_frame(sock):
+    magic, kind, length = HEADER.unpack(recv_exact(sock, HEADER.size))
+    if magic != MAGIC or length > MAX_PAYLOAD:
+        raise ConnectionError("bad frame")
+    return kind, recv_exact(sock, length)
+
+
+def encode_request(pcm, profile, options):
+    header = json.dumps({"profile": profile, "options": options}).encode()
+    return JSON_LENGTH.pack(len(header)) + header + bytes(pcm)
+
+
+def decode_request(payload):
+    (length,) = JSON_LENGTH.unpack_from(payload)
+    header = json.loads(payload[JSON_LENGTH.size:JSON_LENGTH.size + length])
+    pcm = np.frombuffer(payload, dtype=np.int16, offset=JSON_LENGTH.size + length)
+    return header, pcm
+
+
+def check_request(header):
+    """Return why a decoded request header is refused, or None if it may be decoded."""
+    if not isinstance(header, dict) or header.get("profile") not in DECODING_PROFILES:
+        return "unknown decoding profile"
+    options = header.get("options")
+    if not isinstance(options, dict):
+        return "options must be an object"
+    for key, value in options.items():
+        if key not in REQUEST_OPTIONS:
+            return f"option {key!r} is not accepted"
+        if not isinstance(value, REQUEST_OPTIONS[key]):
+            return f"option {key!r} must be a {REQUEST_OPTIONS[key].__name__}"
+    return None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Worker server
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    """Serves decode requests with one model; concurrent requests queue on its lock."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, model, model_name):
+        self.model = model
+        self.model_name = model_name
+        self.decode_lock = threading.Lock()
+        self.active = 0  # Requests decoding or waiting for the model
+        self.served = 0
+        self._count_lock = threading.Lock()
+        super().__init__(address, WorkerHandler)
+
+    def decode(self, payload):
+        header, pcm = decode_request(payload)
+        refused = check_request(header)
+        if refused:
+            return {"error": refused, "decode_time": 0.0}
+        audio = pcm.astype(np.float32) / 32768.0
+        with self._count_lock:
+            self.active += 1
+        try:
+            with self.decode_lock:
+                return decode_to_result(self.model, audio, header["profile"], header["options"])
+        finally:
+            with self._count_lock:
+                self.active -= 1
+                self.served += 1
+
+
+class WorkerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                kind, payload = recv_frame(self.request)
+            except (ConnectionError, OSError, struct.error):
+                return
+            if kind == PING:
+                reply = {"active": self.server.active, "model": self.server.model_name}
+                send_frame(self.request, PONG, json.dumps(reply).encode())
+            elif kind == REQUEST:
+                result = self.server.decode(payload)
+                try:
+                    send_frame(self.request, RESULT, json.dumps(result).encode())
+                except OSError:
+                    return  # Client gave up (timeout or cancel)
+            else:
+                return
+
+
+def start_local_worker(model, port=0, model_name="local"):
+    """Run a worker in a background thread (the stand-in for tests). Returns (server, "host:port")."""
+    server = WorkerServer(("127.0.0.1", port), model, model_name)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"127.0.0.1:{server.server_address[1]}"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Client pool
+
+class _Node:
+    def __init__(self, address):
+        host, _, port = address.rpartition(":")
+        self.address = address
+        self.host = host or address
+        self.port = int(port) if host else DEFAULT_PORT
+        self.idle = []  # Pooled connections
+        self.in_flight = 0
+        self.remote_active = 0
+        self.healthy = True
+        self.failed_at = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.total_time = 0.0
+
+    @property
+    def load(self):
+        return self.in_flight + self.remote_active
+
+
+class RemoteDecodePool:
+    """Sends utterances to the least-loaded healthy worker node."""
+
+    def __init__(self, nodes, timeout=5.0, connect_timeout=1.0, health_interval=5.0):
+        if not nodes:
+            raise ValueError("At least one worker node is required")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._nodes = [_Node(address) for address in nodes]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.check_health()
+        if health_interval:
+            threading.Thread(target=self._health_loop, args=(health_interval,), daemon=True).start()
+
+    # ── connections ──────────────────────────────────────────────────────────
+    def _connect(self, node):
+        with self._lock:
+            if node.idle:
+                return node.idle.pop()
+        sock = socket.create_connection((node.host, node.port), timeout=self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _release(self, node, sock):
+        with self._lock:
+            node.idle.append(sock)
+
+    def _mark_failed(self, node):
+        with self._lock:
+            node.healthy = False
+            node.failed_at = time.monotonic()
+            node.failures += 1
+            for sock in node.idle:
+                sock.close()
+            node.idle.clear()
+
+    # ── health ───────────────────────────────────────────────────────────────
+    def ping(self, node):
+        """Round-trip a PING. Returns the worker's reply dict, or None if it is down."""
+        sock = None
+        try:
+            sock = self._connect(node)
+            sock.settimeout(self.connect_timeout)
+            send_frame(sock, PING)
+            kind, payload = recv_frame(sock)
+            if kind != PONG:
+                raise ConnectionError("unexpected reply")
+        except (OSError, ConnectionError, struct.error):
+            if sock is not None:
+                sock.close()
+            self._mark_failed(node)
+            return None
+        self._release(node, sock)
+        reply = json.loads(payload)
+        with self._lock:
+            node.healthy = True
+            node.remote_active = reply.get("active", 0)
+        return reply
+
+    def check_health(self):
+        for node in self._nodes:
+            self.ping(node)
+
+    def _health_loop(self, interval):
+        while not self._stop.wait(interval):
+            self.check_health()
+
+    def _choose(self, exclude=()):
+        with self._lock:
+            now = time.monotonic()
+            candidates = [n for n in self._nodes if n not in exclude and (
+                n.healthy or now - n.failed_at > FAILURE_BACKOFF_SEC)]
+            if not candidates:
+                return None
+            node = min(candidates, key=lambda n: (not n.healthy, n.load))
+            node.in_flight += 1
+            return node
+
+    @property
+    def healthy_nodes(self):
+        with self._lock:
+            return sum(node.healthy for node in self._nodes)
+
+    # ── decoding ─────────────────────────────────────────────────────────────
+    def _request(self, node, payload, cancel_event, deadline):
+        sock = self._connect(node)
+        try:
+            send_frame(sock, REQUEST, payload)
+            # Wait in short slices so a cancel is noticed without waiting for the worker
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout("worker timed out")
+                sock.settimeout(min(remaining, CANCEL_POLL_SEC) if cancel_event else remaining)
+                try:
+                    ready = sock.recv(1, socket.MSG_PEEK)
+                except socket.timeout:
+                    if cancel_event is not None and cancel_event.is_set():
+                        sock.close()  # The reply can't be matched up any more
+                        raise DecodeCancelled()
+                    continue
+                if not ready:
+                    raise ConnectionError("connection closed")
+                break
+            sock.settimeout(max(0.1, deadline - time.monotonic()))
+            kind, reply = recv_frame(sock)
+            if kind != RESULT:
+                raise ConnectionError("unexpected reply")
+        except DecodeCancelled:
+            raise
+        except BaseException:
+            sock.close()
+            raise
+        self._release(node, sock)
+        return json.loads(reply)
+
+    def transcribe(self, pcm, profile, options=None, stats=None, cancel_event=None):
+        """Decode int16 PCM on a worker. Returns (segments, info, used_fallback, decode_time).
+
+        Tries each healthy worker at most once, least loaded first, all within
+        one `timeout`. Raises RemoteDecodeError if none answers in time, so the
+        caller can fall back to a local model.
+        """
+        payload = encode_request(pcm, profile, options or {})
+        deadline = time.monotonic() + self.timeout
+        tried = []
+        while True:
+            node = self._choose(exclude=tried) if time.monotonic() < deadline else None
+            if node is None:
+                raise RemoteDecodeError(f"no worker answered (tried {len(tried)})")
+            tried.append(node)
+            start = time.perf_counter()
+            try:
+                result = self._request(node, payload, cancel_event, deadline)
+            except DecodeCancelled:
+                raise
+            except (OSError, ConnectionError, struct.error, ValueError) as e:
+                print(f"⚠️  Worker {node.address} failed: {e}")
+                self._mark_failed(node)
+                continue
+            finally:
+                with self._lock:
+                    node.in_flight -= 1
+            with self._lock:
+                node.requests += 1
+                node.total_time += time.perf_counter() - start
+            if "error" in result:
+                raise RemoteDecodeError(f"{node.address}: {result['error']}")
+            return unpack_result(result, stats)
+
+    def summary(self):
+        with self._lock:
+            parts = []
+            for node in self._nodes:
+                average = node.total_time / node.requests * 1000 if node.requests else 0.0
+                state = "up" if node.healthy else "down"
+                parts.append(f"{node.address} {state}: {node.requests} requests, "
+                             f"{node.failures} failures, avg {average:.0f}ms")
+            return " | ".join(parts)
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            for node in self._nodes:
+                for sock in node.idle:
+                    sock.close()
+                node.idle.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remote transcription worker")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Run a worker node")
+    serve.add_argument("--host", default=DEFAULT_HOST,
+                       help="Address to listen on; 0.0.0.0 exposes the unauthenticated worker to the network")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--model", default="small")
+    serve.add_argument("--device", default="auto")
+    serve.add_argument("--compute-type", default="default")
+    serve.add_argument("--fake", action="store_true", help="Stand-in decoder, no model download")
+
+    ping = sub.add_parser("ping", help="Health-check worker nodes")
+    ping.add_argument("nodes", nargs="+", help="host:port")
+    args = parser.parse_args()
+
+    if args.command == "ping":
+        pool = RemoteDecodePool(args.nodes, health_interval=0)
+        for node in pool._nodes:
+            start = time.perf_counter()
+            reply = pool.ping(node)
+            if reply is None:
+                print(f"❌ {node.address}: unreachable")
+            else:
+                print(f"✅ {node.address}: model {reply['model']}, {reply['active']} active, "
+                      f"{(time.perf_counter() - start) * 1000:.1f}ms")
+        pool.close()
+        return
+
+    if args.fake:
+        model, name = FakeDecoder(), "fake"
+    else:
+        from model_store import load_model
+        print(f"🔧 Loading Whisper model '{args.model}' ({args.device})...", file=sys.stderr)
+        model = load_model(args.model, device=args.device, compute_type=args.compute_type)
+        name = args.model
+    server = WorkerServer((args.host, args.port), model, name)
+    print(f"🛰️  Worker listening on {args.host}:{args.port} (model {name})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+On-demand sampling profiler with per-stage attribution.
+
+While a profiling window is open, a background thread samples the stack of
+every Python thread (capture callback, record loop, hotkey threads, decode
+worker) every few milliseconds. Code marks pipeline stages with
+`profiler.stage("vad")`; each sample is filed under the stages its thread
+was in, and every stage becomes a span on a timeline. Two files are written
+when the window closes:
+  - <name>.folded      collapsed stacks ("thread;[stage];func;func count"),
+                       for flamegraph.pl, speedscope or inferno
+  - <name>.trace.json  Chrome trace events: stage spans per thread plus a
+                       "sampler lateness" counter. The sampler is just
+                       another Python thread, so when it wakes late another
+                       thread was holding the GIL.
+Open the trace in chrome://tracing or https://ui.perfetto.dev.
+
+When no window is open there is no sampler thread, and stage() returns a
+shared no-op context manager after one attribute check.
+"""
+
+import collections
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from evaluate import percentile
+
+_NOOP = nullcontext()
+
+
+class SamplingProfiler:
+    """Samples all threads for a fixed window and records pipeline stage spans."""
+
+    def __init__(self, interval=0.005, output_dir="profiles", max_depth=64, on_done=None,
+                 clock=time.perf_counter):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.max_depth = max_depth
+        self.on_done = on_done  # Called with (folded path, trace path) when a window closes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.recording = False
+        self.last_outputs = None
+        self._reset()
+
+    def _reset(self):
+        self._start = self._clock()
+        self._stages = {}  # thread id -> stack of stage names
+        self._spans = []  # (name, thread id, start, end)
+        self._folded = collections.Counter()
+        self._lateness = []  # (time, seconds late)
+        self._thread_names = {}
+        self.samples = 0
+
+    # ── control ──────────────────────────────────────────────────────────────
+    def start(self, duration=15.0):
+        """Open a profiling window. Returns False if one is already open."""
+        with self._lock:
+            if self.recording:
+                return False
+            self._reset()
+            self._stop.clear()
+            self.recording = True
+            self._thread = threading.Thread(target=self._sample_loop, args=(duration,),
+                                            name="profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, wait=True):
+        """Close the window early. With `wait`, returns the written (folded, trace) paths."""
+        self._stop.set()
+        thread = self._thread
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+            return self.last_outputs
+        return None
+
+    def toggle(self, duration=15.0):
+        """Start a window, or end the one in progress. Returns True if a window started."""
+        if self.recording:
+            self.stop(wait=False)
+            return False
+        return self.start(duration)
+
+    # ── instrumentation ──────────────────────────────────────────────────────
+    def stage(self, name):
+        """Context manager marking a pipeline stage on the current thread."""
+        if not self.recording:
+            return _NOOP
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name):
+        ident = threading.get_ident()
+        stack = self._stages.setdefault(ident, [])
+        stack.append(name)
+        start = self._clock()
+        try:
+            yield
+        finally:
+            stack.pop()
+            self._spans.append((name, ident, start, self._clock()))
+
+    def span(self, name, start, end, ident=None):
+        """Record a stage measured elsewhere (e.g. a job's queue wait) on perf_counter times."""
+        if self.recording and start is not None and end is not None:
+            self._spans.append((name, ident or threading.get_ident(), start, end))
+
+    # ── sampling ─────────────────────────────────────────────────────────────
+    def _sample_loop(self, duration):
+        me = threading.get_ident()
+        deadline = self._start + duration
+        due = self._clock()
+        try:
+            while not self._stop.is_set() and self._clock() < deadline:
+                due += self.interval
+                delay = due - self._clock()
+                if delay > 0:
+                    self._stop.wait(delay)
+                now = self._clock()
+                self._lateness.append((now, max(0.0, now - due)))
+                if now - due > self.interval:
+                    due = now  # Don't try to catch up after a long stall
+                self._sample(me)
+        finally:
+            self.recording = False
+            self.last_outputs = self._write()
+            if self.on_done is not None:
+                self.on_done(*self.last_outputs)
+
+    def _sample(self, me):
+        for thread in threading.enumerate():
+            self._thread_names[thread.ident] = thread.name
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            calls = []
+            while frame is not None and len(calls) < self.max_depth:
+                code = frame.f_code
+                calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stages = [f"[{stage}]" for stage in list(self._stages.get(ident, ()))]
+            name = self._thread_names.get(ident, f"thread-{ident}")
+            self._folded[";".join([name] + stages + calls[::-1])] += 1
+        self.samples += 1
+
+    # ── output ───────────────────────────────────────────────────────────────
+    def stage_totals(self):
+        """Seconds spent per stage (all threads), from the recorded spans."""
+        totals = collections.Counter()
+        for name, _, start, end in self._spans:
+            totals[name] += end - start
+        return totals
+
+    def trace_events(self):
+        pid = os.getpid()
+        to_us = lambda t: round((t - self._start) * 1e6, 1)
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": ident, "args": {"name": name}}
+                  for ident, name in self._thread_names.items()]
+        events += [{"name": name, "cat": "stage", "ph": "X", "pid": pid, "tid": ident,
+                    "ts": to_us(start), "dur": round((end - start) * 1e6, 1)}
+                   for name, ident, start, end in self._spans]
+        events += [{"name": "sampler lateness", "ph": "C", "pid": pid, "ts": to_us(now),
+                    "args": {"ms": round(late * 1000, 3)}}
+                   for now, late in self._lateness]
+        return events
+
+    def _write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile-{datetime.now():%Y%m%d-%H%M%S}")
+        folded_path, trace_path = base + ".folded", base + ".trace.json"
+        with open(folded_path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._folded.items()):
+                f.write(f"{stack} {count}\n")
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
+        return folded_path, trace_path
+
+    def summary(self):
+        """One line: samples, busiest stages and sampler lateness (GIL pressure)."""
+        totals = self.stage_totals()
+        stages = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in totals.most_common(5))
+        late = [seconds for _, seconds in self._lateness]
+        text = f"{self.samples} samples"
+        if stages:
+            text += f" | stages: {stages}"
+        if late:
+            text += (f" | sampler late p50 {percentile(late, 50) * 1000:.1f}ms, "
+                     f"p95 {percentile(late, 95) * 1000:.1f}ms")
+        return text
+
+
+def install_signal_toggle(profiler, duration=15.0):
+    """Toggle profiling with SIGUSR1 (POSIX) or Ctrl+Break (Windows). Main thread only."""
+    signum = getattr(signal, "SIGUSR1", None) or getattr(signal, "SIGBREAK", None)
+    if signum is None:
+        return None
+    signal.signal(signum, lambda *_: profiler.toggle(duration))
+    return signal.Signals(signum).name
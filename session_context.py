@@ -0,0 +1,85 @@
+"""
+Session-level language lock and prompt carry-over.
+
+A dictation session almost always stays in one language, so the language is
+detected once (or taken from config) and passed to every later decode, which
+lets faster-whisper skip its language-detection pass. Optionally the tail of
+the previous utterances is carried forward as `initial_prompt`, giving the
+decoder context for names and vocabulary across utterances.
+"""
+
+import threading
+
+LANGUAGE_LOCK_THRESHOLD = 0.8  # Minimum detection probability before pinning
+PROMPT_MAX_CHARS = 200
+
+
+class SessionContext:
+    """Per-session decode options: pinned language, carried prompt and timing stats."""
+
+    def __init__(self, language=None, carry_prompt=True,
+                 lock_threshold=LANGUAGE_LOCK_THRESHOLD, prompt_max_chars=PROMPT_MAX_CHARS):
+        self._lock = threading.Lock()
+        self.configured_language = language
+        self.language = language
+        self.carry_prompt = carry_prompt
+        self.lock_threshold = lock_threshold
+        self.prompt_max_chars = prompt_max_chars
+        self._prompt = ""
+        # [decodes, decode seconds, audio seconds] with and without a pinned language
+        self._timing = {"detect": [0, 0.0, 0.0], "locked": [0, 0.0, 0.0]}
+
+    def transcribe_options(self):
+        """Extra model.transcribe() options for the next utterance."""
+        with self._lock:
+            options = {}
+            if self.language:
+                options["language"] = self.language
+            if self.carry_prompt and self._prompt:
+                options["initial_prompt"] = self._prompt
+            return options
+
+    def update(self, info, text, decode_time=None, audio_seconds=None):
+        """Record a finished utterance; pins the language once detection is confident."""
+        with self._lock:
+            mode = "locked" if self.language else "detect"
+            if decode_time is not None and audio_seconds:
+                timing = self._timing[mode]
+                timing[0] += 1
+                timing[1] += decode_time
+                timing[2] += audio_seconds
+
+            if not self.language and info is not None:
+                probability = getattr(info, "language_probability", 0.0) or 0.0
+                if probability >= self.lock_threshold:
+                    self.language = info.language
+                    print(f"🌐 Language locked to '{self.language}' ({probability:.0%} confidence)")
+
+            if self.carry_prompt and text:
+                prompt = (self._prompt + " " + text).strip()
+                if len(prompt) > self.prompt_max_chars:
+                    # Keep whole words only
+                    prompt = prompt[-self.prompt_max_chars:].split(" ", 1)[-1]
+                self._prompt = prompt
+
+    def reset_prompt(self):
+        """Forget carried text (e.g. when continuous mode stops); the language stays pinned."""
+        with self._lock:
+            self._prompt = ""
+
+    def reset(self):
+        with self._lock:
+            self._prompt = ""
+            self.language = self.configured_language
+
+    def summary(self):
+        with self._lock:
+            parts = [f"language {self.language or 'unlocked'}"]
+            cost = {}
+            for mode, (count, decode, audio) in self._timing.items():
+                if count and audio:
+                    cost[mode] = decode / audio
+                    parts.append(f"{mode}: {count} decodes, {cost[mode] * 1000:.0f}ms per audio second")
+            if len(cost) == 2 and cost["detect"]:
+                parts.append(f"lock saves {(1 - cost['locked'] / cost['detect']):.0%}")
+            return " | ".join(parts)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Shadow decoding: compare a candidate configuration against live traffic.
+
+Every utterance the primary model transcribes is queued again for a second
+model/profile at the lowest scheduler priority, with the same audio the primary
+decoded (after pause compression) and the same options (language, prompt), so
+only the configuration differs. The shadow result is never
+pasted; both texts and latencies are appended to a JSONL log for offline
+comparison. Shadow work is capped three ways:
+  - a duty-cycle budget (at most max_share of wall time spent decoding),
+  - a small backlog (extra utterances are dropped, not queued up),
+  - preemption (a hotkey or continuous job cancels a running shadow decode
+    between segments).
+The shadow model is only used once it has finished loading in the
+background, so it never blocks the decode worker. Primary results served from
+the result cache are compared on text only; their latency is not a decode.
+
+Summarize a log:
+    python shadow_decoding.py shadow_log.jsonl
+"""
+
+import argparse
+import collections
+import json
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from decode_scheduler import SHADOW_PRIORITY, DecodeCancelled
+from decoding_profiles import transcribe_with_profile
+from evaluate import normalize_text, percentile, wer
+
+SHADOW_KIND = "shadow"
+DEFAULT_SHADOW_LOG = "shadow_log.jsonl"
+
+
+class DutyCycleBudget:
+    """Allows work while its share of the last `window_sec` of wall time stays under max_share."""
+
+    def __init__(self, max_share=0.25, window_sec=60.0, clock=time.monotonic):
+        self.max_share = max_share
+        self.window_sec = window_sec
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._busy = collections.deque()  # (end time, seconds busy)
+
+    def used(self):
+        """Fraction of the current window spent busy."""
+        with self._lock:
+            cutoff = self._clock() - self.window_sec
+            while self._busy and self._busy[0][0] < cutoff:
+                self._busy.popleft()
+            return sum(seconds for _, seconds in self._busy) / self.window_sec
+
+    def allow(self):
+        return self.used() < self.max_share
+
+    def record(self, seconds):
+        with self._lock:
+            self._busy.append((self._clock(), seconds))
+
+
+class ShadowDecoder:
+    """Queues low-priority shadow decodes and logs them next to the primary result."""
+
+    def __init__(self, scheduler, model_manager, profile, primary_label, shadow_label,
+                 log_path=DEFAULT_SHADOW_LOG, max_share=0.25, max_backlog=2, sample_rate=16000):
+        self.scheduler = scheduler
+        self.model_manager = model_manager
+        self.profile = profile
+        self.primary_label = primary_label
+        self.shadow_label = shadow_label
+        self.max_backlog = max_backlog
+        self.sample_rate = sample_rate
+        self.budget = DutyCycleBudget(max_share)
+        self._lock = threading.Lock()
+        self._log = open(log_path, "a", encoding="utf-8")
+        self.compared = 0
+        self.agreed = 0
+        self.skipped = collections.Counter()  # reason -> count
+        self.preempted = 0
+        self.timed = 0  # Comparisons whose primary was a real decode (not a cache hit)
+        self.latency_delta = 0.0
+        model_manager.preload()
+
+    def submit(self, buffer, text, decode_time, language=None, options=None, cached=False):
+        """Queue a shadow decode of `buffer` for comparison with the primary result.
+
+        `buffer` and `options` are the PCM and decode options the primary used;
+        `cached` marks a primary result served from the result cache.
+        """
+        if self.scheduler.pending(SHADOW_KIND) >= self.max_backlog:
+            self._skip("backlog")
+            return None
+        primary = {"text": text, "decode_time": decode_time, "language": language,
+                   "options": dict(options or {}), "cached": cached}
+        return self.scheduler.submit(SHADOW_KIND, SHADOW_PRIORITY, self._decode_job, buffer, primary)
+
+    def _skip(self, reason):
+        with self._lock:
+            self.skipped[reason] += 1
+
+    def _decode_job(self, job, buffer, primary):
+        if not self.model_manager.loaded:
+            self.model_manager.preload()  # Evicted while idle; never load on the decode worker
+            self._skip("loading")
+            return None
+        if not self.budget.allow():
+            self._skip("budget")
+            return None
+
+        audio = np.frombuffer(buffer, dtype=np.int16).astype(np.float32) / 32768.0
+        # Same language and prompt as the primary so only the configuration differs
+        options = dict(primary["options"])
+        if primary["language"]:
+            options["language"] = primary["language"]
+        start = time.perf_counter()
+        try:
+            with self.model_manager.use() as model:
+                segments, info, used_fallback = transcribe_with_profile(
+                    model, audio, self.profile, cancel_event=job.cancel_event, **options
+                )
+        except DecodeCancelled:
+            if job.preempted:
+                with self._lock:
+                    self.preempted += 1
+            raise
+        finally:
+            self.budget.record(time.perf_counter() - start)
+        decode_time = time.perf_counter() - start
+
+        text = " ".join(segment.text for segment in segments).strip()
+        self._write(buffer, primary, text, decode_time, used_fallback)
+        return text
+
+    def _write(self, buffer, primary, text, decode_time, used_fallback):
+        agree = normalize_text(primary["text"]) == normalize_text(text)
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "audio_sec": round(len(buffer) / (2 * self.sample_rate), 3),
+            "primary": {"config": self.primary_label, "text": primary["text"],
+                        "decode_time": round(primary["decode_time"], 4),
+                        "cached": primary["cached"]},
+            "shadow": {"config": self.shadow_label, "text": text,
+                       "decode_time": round(decode_time, 4), "fallback": used_fallback},
+            "agree": agree,
+            "word_diff": round(wer(primary["text"], text), 4),
+        }
+        with self._lock:
+            self.compared += 1
+            self.agreed += agree
+            if not primary["cached"]:
+                self.timed += 1
+                self.latency_delta += decode_time - primary["decode_time"]
+            self._log.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._log.flush()
+
+    def summary(self):
+        with self._lock:
+            skipped = ", ".join(f"{count} {reason}" for reason, count in self.skipped.items())
+            text = f"{self.compared} compared"
+            if self.compared:
+                text += f", {self.agreed / self.compared:.1%} agreement"
+            if self.timed:
+                text += f", latency delta avg {self.latency_delta / self.timed * 1000:+.0f}ms"
+            text += f" | skipped: {skipped or 'none'} | {self.preempted} preempted"
+            return text
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Offline report
+
+def summarize_log(path):
+    """Aggregate a shadow log per (primary, shadow) configuration pair."""
+    pairs = collections.defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                pairs[(record["primary"]["config"], record["shadow"]["config"])].append(record)
+
+    summaries = []
+    for (primary, shadow), records in pairs.items():
+        # Cache hits on the primary side were not decodes; keep them out of the timings
+        timed = [r for r in records if not r["primary"].get("cached")]
+        primary_times = [r["primary"]["decode_time"] for r in timed]
+        shadow_times = [r["shadow"]["decode_time"] for r in timed]
+        audio = sum(r["audio_sec"] for r in timed)
+        summaries.append({
+            "primary": primary,
+            "shadow": shadow,
+            "utterances": len(records),
+            "timed": len(timed),
+            "agreement": sum(r["agree"] for r in records) / len(records),
+            "word_diff": sum(r["word_diff"] for r in records) / len(records),
+            "primary_p50": percentile(primary_times, 50),
+            "shadow_p50": percentile(shadow_times, 50),
+            "primary_p95": percentile(primary_times, 95),
+            "shadow_p95": percentile(shadow_times, 95),
+            # Audio seconds per decode second, as in evaluate.py and benchmark_gpu.py
+            "primary_rtf": audio / sum(primary_times) if sum(primary_times) else 0.0,
+            "shadow_rtf": audio / sum(shadow_times) if sum(shadow_times) else 0.0,
+        })
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a shadow decoding log")
+    parser.add_argument("log", nargs="?", default=DEFAULT_SHADOW_LOG)
+    parser.add_argument("--disagreements", type=int, default=0,
+                        help="Also print this many utterances where the texts differ")
+    args = parser.parse_args()
+
+    for s in summarize_log(args.log):
+        print(f"📊 {s['primary']}  vs  {s['shadow']}  ({s['utterances']} utterances)")
+        print(f"   Agreement: {s['agreement']:.1%} | word difference: {s['word_diff']:.1%}")
+        print(f"   Latency ({s['timed']} decoded, cache hits excluded) p50: "
+              f"{s['primary_p50'] * 1000:.0f}ms -> {s['shadow_p50'] * 1000:.0f}ms "
+              f"({(s['shadow_p50'] - s['primary_p50']) * 1000:+.0f}ms) | "
+              f"p95: {s['primary_p95'] * 1000:.0f}ms -> {s['shadow_p95'] * 1000:.0f}ms")
+        print(f"   RTF: {s['primary_rtf']:.1f}x -> {s['shadow_rtf']:.1f}x")
+
+    if args.disagreements:
+        shown = 0
+        with open(args.log, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["agree"]:
+                    continue
+                print(f"\n[{record['timestamp']}]")
+                print(f"   primary: {record['primary']['text']}")
+                print(f"   shadow:  {record['shadow']['text']}")
+                shown += 1
+                if shown >= args.disagreements:
+                    break
+
+
+if __name__ == "__main__":
+    main()
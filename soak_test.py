@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Long-session soak test: memory, thread and latency drift over simulated hours.
+
+Runs the live app (voice_to_text_vr_gpu) itself, with the microphone, clipboard
+and keyboard replaced and, unless --model is given, a fake decoder as the model.
+Synthetic or fixture audio goes through audio_callback into
+record_and_transcribe at many times real time; hotkey dictations go through
+on_hotkey_pressed (each on its own short-lived thread, stopped by a second
+press); continuous mode is put to sleep and woken again every simulated hour,
+and a profiling window is opened now and then. So everything the app keeps
+between utterances is soaked: batched results, stream health, profiler spans,
+the session prompt, the journal and the audio archive.
+
+Every `--sample-min` simulated minutes it records RSS, tracemalloc's traced
+memory, the thread count, queue depths and decode latency percentiles. At the
+end it fits a linear trend to each series (after a warm-up) and fails when
+growth is beyond a threshold, printing the allocators that grew most.
+
+Usage:
+    python soak_test.py --hours 24
+    python soak_test.py --hours 24 --speed 100      # fixed pace: queue growth is a failure
+    python soak_test.py --hours 8 --fixtures corpus/ --model tiny --report soak.jsonl
+"""
+
+import argparse
+import collections
+import functools
+import glob
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+from decode_scheduler import DecodeCancelled
+from evaluate import percentile
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+
+Sample = collections.namedtuple("Sample", [
+    "sim_hours", "wall_sec", "rss_mb", "traced_mb", "threads", "audio_queue",
+    "pending_jobs", "decodes", "latency_p50", "latency_p95",
+])
+
+
+def rss_mb():
+    """Current resident set size in MB (psutil when installed, else /proc)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        import resource  # Peak, not current; still shows unbounded growth
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Audio sources
+
+def synthetic_tape(minutes=2.0, seed=0):
+    """Dictation-like int16 audio: harmonic phrases, pauses, coughs and room noise."""
+    rng = np.random.default_rng(seed)
+    parts, total = [], 0
+    while total < minutes * 60 * SAMPLE_RATE:
+        phrase = int(rng.uniform(1.0, 6.0) * SAMPLE_RATE)
+        t = np.arange(phrase) / SAMPLE_RATE
+        f0 = rng.uniform(110, 220)
+        voice = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 12))
+        voice *= 0.6 + 0.4 * np.sin(2 * np.pi * rng.uniform(3, 6) * t)
+        parts.append(voice / np.abs(voice).max() * 6000)
+        if rng.random() < 0.15:  # Cough or keyboard burst
+            parts.append(rng.normal(0, 4000, int(0.3 * SAMPLE_RATE)))
+        parts.append(np.zeros(int(rng.uniform(1.2, 4.0) * SAMPLE_RATE)))
+        total += sum(len(p) for p in parts[-3:])
+    audio = np.concatenate(parts) + rng.normal(0, 30, sum(len(p) for p in parts))
+    return audio.clip(-32767, 32767).astype(np.int16)
+
+
+def fixture_tape(directory):
+    """All 16 kHz mono WAVs in a directory, back to back with a short gap."""
+    from transcribe_file import map_wav
+
+    parts = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        parts += [np.asarray(map_wav(path)), np.zeros(SAMPLE_RATE, dtype=np.int16)]
+    if not parts:
+        raise ValueError(f"no WAV files in {directory}")
+    return np.concatenate(parts)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# App under test
+
+def fake_model(cost_per_audio_sec=0.002, n_mels=80):
+    """FakeDecoder with the feature hook load_whisper_model installs on a real model."""
+    from faster_whisper.feature_extractor import FeatureExtractor
+    from incremental_features import attach_precomputed_features
+    from multiprocess_pipeline import FakeDecoder
+
+    model = FakeDecoder(cost_per_audio_sec)
+    model.feature_extractor = FeatureExtractor(feature_size=n_mels)
+    attach_precomputed_features(model)
+    return model
+
+
+class AppSoak:
+    """voice_to_text_vr_gpu with its audio devices, clipboard and keyboard replaced.
+
+    `model_loader` loads a fake model in place of load_whisper_model (None loads the
+    configured Whisper model). The app's prints go to /dev/null when `quiet`; write
+    progress to `console`.
+    """
+
+    def __init__(self, workdir, model_loader=None, hotkey_sec=5.0, profile_sec=30.0,
+                 archive_mb=20, batch_size=None, quiet=True):
+        import voice_to_text_vr_gpu as app
+
+        self.app = app
+        app.JOURNAL_DIR = os.path.join(workdir, "journal")
+        app.ARCHIVE_AUDIO = bool(archive_mb)
+        app.ARCHIVE_DIR = os.path.join(workdir, "archive")
+        app.ARCHIVE_MAX_MB = archive_mb
+        app.profiler.output_dir = os.path.join(workdir, "profiles")
+        app.PROFILE_WINDOW_SEC = 24 * 3600  # Closed by feed() after profile_sec of audio
+        app.HOTKEY_DEBOUNCE_SEC = 0.0  # Presses come seconds of audio apart, not of wall time
+        app.PASTE_SETTLE_SEC = 0.0
+        app.pyperclip = SimpleNamespace(copy=lambda text: None)
+        app.pyautogui = SimpleNamespace(hotkey=lambda *keys: None)
+        if batch_size:
+            app.DECODE_BATCH_SIZE = batch_size
+        if model_loader is not None:
+            app.load_whisper_model = model_loader
+            # A fake model decodes the concatenated clips itself
+            from batch_decoder import transcribe_batch
+            app.transcribe_batch = functools.partial(transcribe_batch,
+                                                     pipeline_factory=lambda model: model)
+
+        self.hotkey_frames = int(hotkey_sec * 1000 / FRAME_MS)
+        self.profile_frames = int(profile_sec * 1000 / FRAME_MS)
+        self._hotkey_left = 0
+        self._profile_left = 0
+        self._adc_time = 0.0
+        self._lock = threading.Lock()
+        self._latencies = []
+        self.decodes = 0
+        self.errors = 0
+        self._wrap_app()
+
+        self.console = sys.stdout
+        self._muted = open(os.devnull, "w", encoding="utf-8") if quiet else None
+        if self._muted is not None:
+            sys.stdout = self._muted
+        app.start_pipeline()
+        app.pipeline.add_listener(app.on_pipeline_transition)
+        threading.Thread(target=app.record_and_transcribe, daemon=True).start()
+
+    def _wrap_app(self):
+        """Time the app's decode jobs and count decode errors, through its module globals."""
+        app = self.app
+
+        def timed(job_function):
+            @functools.wraps(job_function)
+            def run(job, *args):
+                try:
+                    return job_function(job, *args)
+                finally:
+                    if not job.cancelled:
+                        with self._lock:
+                            self.decodes += 1
+                            self._latencies.append(time.perf_counter() - job.submitted_at)
+            return run
+
+        def counted(decode):
+            @functools.wraps(decode)
+            def run(*args, **kwargs):
+                try:
+                    return decode(*args, **kwargs)
+                except DecodeCancelled:
+                    raise
+                except Exception:
+                    with self._lock:
+                        self.errors += 1
+                    raise
+            return run
+
+        app.continuous_decode_job = timed(app.continuous_decode_job)
+        app.one_time_decode_job = timed(app.one_time_decode_job)
+        app.decode_buffer = counted(app.decode_buffer)
+        app.decode_buffers = counted(app.decode_buffers)
+
+    @property
+    def pipeline(self):
+        return self.app.pipeline
+
+    @property
+    def audio_queue(self):
+        return self.app.audio_queue
+
+    @property
+    def scheduler(self):
+        return self.app.scheduler
+
+    @property
+    def gate(self):
+        return self.app.speech_gate
+
+    # ── inputs ───────────────────────────────────────────────────────────────
+    def feed(self, frame):
+        """One int16 frame through the mic stream callback, on a gapless simulated clock."""
+        block = np.frombuffer(frame, dtype=np.int16).astype(np.float32)[:, None] / 32767
+        self.app.audio_callback(block, len(block), SimpleNamespace(inputBufferAdcTime=self._adc_time),
+                                None)
+        self._adc_time += len(block) / SAMPLE_RATE
+        if self._hotkey_left:
+            self._hotkey_left -= 1
+            if not self._hotkey_left:
+                self._stop_dictation()
+        if self._profile_left:
+            self._profile_left -= 1
+            if not self._profile_left:
+                self.app.profiler.stop()
+
+    def press_hotkey(self):
+        """Start a dictation; feed() presses again to stop it after hotkey_sec of audio."""
+        if not self.app.pipeline.one_time_active:
+            self.app.on_hotkey_pressed()
+            self._hotkey_left = self.hotkey_frames
+
+    def _stop_dictation(self, timeout=5.0):
+        # At many times real time the frames can all be queued before the recording
+        # thread has started (and cleared the queue); let it catch up first
+        deadline = time.monotonic() + timeout
+        while self.app.one_time_audio_queue.qsize() and time.monotonic() < deadline:
+            time.sleep(0.001)
+        if self.app.pipeline.one_time_active:
+            self.app.on_hotkey_pressed()
+
+    def profile(self):
+        """Open a profiling window; feed() closes it after profile_sec of audio."""
+        if not self.app.profiler.recording:
+            self.app.toggle_profiler()
+            self._profile_left = self.profile_frames
+
+    # ── results ──────────────────────────────────────────────────────────────
+    def take_latencies(self):
+        with self._lock:
+            latencies, self._latencies = self._latencies, []
+            return latencies
+
+    def drain(self, timeout=60.0):
+        """Wait until queued audio, dictations and decodes are done."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if (self.audio_queue.empty() and not self.scheduler.pending()
+                    and not self.pipeline.one_time_active):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def summary(self, hours=None):
+        """The app's own counters, as it prints them at shutdown."""
+        app = self.app
+        lines = [f"Speech gate: {app.speech_gate.summary(hours)}" if app.speech_gate else None,
+                 f"Scheduler: {app.scheduler.summary()}",
+                 f"Stream health: {app.stream_health.summary()}",
+                 f"Session: {app.session.summary()}",
+                 f"Features: {app.feature_stats.summary()}",
+                 f"Batches: {app.decode_batches} ({app.batched_utterances} utterances), "
+                 f"{len(app.batched_results)} results waiting"]
+        return [line for line in lines if line]
+
+    def close(self):
+        app = self.app
+        app.profiler.stop()
+        app.pipeline.sleep()  # record_and_transcribe now waits for a wake that never comes
+        app.scheduler.stop()
+        app.model_manager.close()
+        for store in (app.journal, app.audio_archive):
+            if store is not None:
+                store.close()
+        if self._muted is not None:
+            sys.stdout = self.console
+            self._muted.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Driver and trend check
+
+def run_soak(soak, tape, hours, speed=0.0, sample_min=30.0, hotkey_every_min=5.0,
+             sleep_every_min=60.0, profile_every_min=60.0, progress=None):
+    """Feed `hours` of audio (looping the tape) and return the list of Samples."""
+    frames_per_sample = int(sample_min * 60 * 1000 / FRAME_MS)
+    frames_per_hotkey = int(hotkey_every_min * 60 * 1000 / FRAME_MS) if hotkey_every_min else 0
+    frames_per_sleep = int(sleep_every_min * 60 * 1000 / FRAME_MS) if sleep_every_min else 0
+    frames_per_profile = int(profile_every_min * 60 * 1000 / FRAME_MS) if profile_every_min else 0
+    total_frames = int(hours * 3600 * 1000 / FRAME_MS)
+    tape_frames = len(tape) // FRAME_SAMPLES
+    tape = tape[:tape_frames * FRAME_SAMPLES].tobytes()
+    frame_bytes = FRAME_SAMPLES * 2
+
+    samples = []
+    wall_start = time.perf_counter()
+    soak.pipeline.wake()
+    for index in range(1, total_frames + 1):
+        offset = (index % tape_frames) * frame_bytes
+        soak.feed(tape[offset:offset + frame_bytes])
+
+        if frames_per_hotkey and index % frames_per_hotkey == 0:
+            soak.press_hotkey()
+        if frames_per_sleep and index % frames_per_sleep == 0:
+            soak.pipeline.sleep()
+            soak.pipeline.wake()
+        if index % 100 == 0:
+            if speed:
+                # Pace to `speed` x real time so queue depths mean something
+                ahead = index * FRAME_MS / 1000 / speed - (time.perf_counter() - wall_start)
+                if ahead > 0:
+                    time.sleep(ahead)
+            else:
+                # As fast as the decoder keeps up, without piling up audio
+                while soak.audio_queue.qsize() > 200 or soak.scheduler.pending() > 2:
+                    time.sleep(0.002)
+        if index % frames_per_sample == 0:
+            samples.append(take_sample(soak, index * FRAME_MS / 1000 / 3600, wall_start))
+            if progress:
+                progress(samples[-1])
+        if frames_per_profile and index % frames_per_profile == 0:
+            soak.profile()  # After the sample, so its sampler thread is not counted
+    soak.drain()
+    return samples
+
+
+def take_sample(soak, sim_hours, wall_start):
+    latencies = soak.take_latencies()
+    return Sample(
+        sim_hours=round(sim_hours, 3),
+        wall_sec=round(time.perf_counter() - wall_start, 2),
+        rss_mb=round(rss_mb(), 2),
+        traced_mb=round(tracemalloc.get_traced_memory()[0] / 1e6, 3) if tracemalloc.is_tracing() else 0.0,
+        threads=threading.active_count(),
+        audio_queue=soak.audio_queue.qsize(),
+        pending_jobs=soak.scheduler.pending(),
+        decodes=soak.decodes,
+        latency_p50=round(percentile(latencies, 50), 4) if latencies else 0.0,
+        latency_p95=round(percentile(latencies, 95), 4) if latencies else 0.0,
+    )
+
+
+def check_trends(samples, max_rss_mb_per_hour=2.0, max_traced_mb_per_hour=0.5,
+                 max_thread_growth=2, max_latency_ratio=2.0, warmup=0.1):
+    """Return a list of failure messages (empty when the run is healthy)."""
+    steady = [s for s in samples if s.sim_hours > samples[-1].sim_hours * warmup] if samples else []
+    if len(steady) < 3:
+        return ["too few samples after warm-up for a trend"]
+    hours = np.array([s.sim_hours for s in steady])
+
+    def slope(field):
+        return float(np.polyfit(hours, np.array([getattr(s, field) for s in steady]), 1)[0])
+
+    failures = []
+    rss_slope = slope("rss_mb")
+    if rss_slope > max_rss_mb_per_hour:
+        failures.append(f"RSS grows {rss_slope:.2f} MB/hour (limit {max_rss_mb_per_hour})")
+    traced_slope = slope("traced_mb")
+    if traced_slope > max_traced_mb_per_hour:
+        failures.append(f"Python heap grows {traced_slope:.2f} MB/hour (limit {max_traced_mb_per_hour})")
+    if steady[-1].threads - steady[0].threads > max_thread_growth:
+        failures.append(f"Threads grew {steady[0].threads} -> {steady[-1].threads}")
+    if slope("audio_queue") > 0 and steady[-1].audio_queue > 1000:
+        failures.append(f"audio_queue backlog keeps growing ({steady[-1].audio_queue} frames)")
+
+    quarter = max(1, len(steady) // 4)
+    early = [s.latency_p95 for s in steady[:quarter] if s.latency_p95]
+    late = [s.latency_p95 for s in steady[-quarter:] if s.latency_p95]
+    if early and late and np.median(early) > 0:
+        ratio = float(np.median(late) / np.median(early))
+        if ratio > max_latency_ratio:
+            failures.append(f"Decode latency p95 drifted {ratio:.1f}x (limit {max_latency_ratio}x)")
+    return failures
+
+
+def top_growth(baseline, limit=10):
+    """Largest allocation growth since `baseline`, grouped by source line."""
+    stats = tracemalloc.take_snapshot().compare_to(baseline, "lineno")
+    return [stat for stat in stats if stat.size_diff > 0][:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak-test the pipeline over simulated hours")
+    parser.add_argument("--hours", type=float, default=24.0, help="Simulated audio hours")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Times real time to feed audio (0 = as fast as decoding keeps up)")
+    parser.add_argument("--fixtures", default=None, help="Directory of WAVs to loop instead of synthetic audio")
+    parser.add_argument("--model", default=None, help="Whisper model size (default: fake decoder)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--sample-min", type=float, default=30.0, help="Simulated minutes between samples")
+    parser.add_argument("--hotkey-every-min", type=float, default=5.0)
+    parser.add_argument("--profile-every-min", type=float, default=60.0,
+                        help="Simulated minutes between profiling windows (0 = never)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Override the app's DECODE_BATCH_SIZE")
+    parser.add_argument("--max-rss-growth", type=float, default=2.0, help="MB per simulated hour")
+    parser.add_argument("--max-heap-growth", type=float, default=0.5, help="MB per simulated hour")
+    parser.add_argument("--max-latency-drift", type=float, default=2.0, help="Late/early p95 ratio")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip heap tracing (faster)")
+    parser.add_argument("--report", default=None, help="Write samples as JSONL")
+    args = parser.parse_args()
+
+    if args.model:
+        # The app's own loader, pointed at the requested model
+        import voice_to_text_vr_gpu as app
+        app.WHISPER_MODEL_SIZE, app.DEVICE, app.COMPUTE_TYPE = args.model, args.device, args.compute_type
+        app.FEATURE_MELS = 128 if "large-v3" in args.model or "turbo" in args.model else 80
+        loader = None
+    else:
+        loader = fake_model
+
+    tape = fixture_tape(args.fixtures) if args.fixtures else synthetic_tape()
+    if not args.no_tracemalloc:
+        tracemalloc.start(10)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        soak = AppSoak(workdir, loader, batch_size=args.batch_size)
+        baseline = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        print(f"🧪 Soak: {args.hours:g}h of audio at {args.speed or 'max'}x, "
+              f"model {args.model or 'fake'}, sampling every {args.sample_min:g} min",
+              file=soak.console)
+        samples = run_soak(
+            soak, tape, args.hours, args.speed, args.sample_min, args.hotkey_every_min,
+            profile_every_min=args.profile_every_min,
+            progress=lambda s: print(f"   {s.sim_hours:5.1f}h  RSS {s.rss_mb:7.1f}MB  heap "
+                                     f"{s.traced_mb:6.2f}MB  threads {s.threads:3d}  queue "
+                                     f"{s.audio_queue:5d}  decodes {s.decodes:6d}  p95 "
+                                     f"{s.latency_p95 * 1000:6.0f}ms", file=soak.console),
+        )
+        growth = top_growth(baseline) if baseline is not None else []
+        soak.close()
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            for s in samples:
+                f.write(json.dumps(s._asdict()) + "\n")
+
+    if growth:
+        print("\n📈 Top allocation growth:")
+        for stat in growth:
+            print(f"   {stat.size_diff / 1e3:+9.1f} KB  {stat.count_diff:+7d} blocks  {stat.traceback[0]}")
+    failures = check_trends(samples, args.max_rss_growth, args.max_heap_growth,
+                            max_latency_ratio=args.max_latency_drift)
+    print(f"\n📊 {soak.decodes} decodes, {soak.errors} errors")
+    for line in soak.summary(args.hours):
+        print(f"   {line}")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ No growth trend beyond the thresholds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Pre-decode speech-content gate.
+
+webrtcvad passes anything with enough energy in the speech band, so a cough,
+keyboard clatter or a short noise burst becomes a buffer that costs a full
+Whisper decode and often comes back as hallucinated text. The gate looks at
+the buffer once, vectorized over 30 ms frames, and rejects it before it is
+queued for decoding when:
+  - too short:  less than min_voiced_sec of voiced frames,
+  - noise:      loud frames are there, but spectrally flat (not harmonic),
+  - sparse:     voiced frames are under min_voiced_ratio of the buffer, once
+                leading and trailing silence is trimmed (a short phrase in a
+                fixed-length hotkey recording is not sparse).
+A frame counts as voiced when it is above the level floor and its spectral
+flatness (geometric / arithmetic mean of the 100-4000 Hz power spectrum) is
+under max_flatness. Voiced speech has harmonic peaks (low flatness); noise,
+clicks and breath are close to flat.
+
+Measure what it saves on recordings (each WAV is cut into utterances like the
+live loop) or on the audio archive (every utterance that was decoded):
+    python speech_gate.py session1.wav session2.wav
+    python speech_gate.py --archive audio_archive
+"""
+
+import argparse
+import collections
+import threading
+import time
+
+import numpy as np
+
+GateResult = collections.namedtuple(
+    "GateResult", ["passed", "reason", "voiced_sec", "voiced_ratio", "flatness"]
+)
+
+BAND_HZ = (100.0, 4000.0)
+
+
+def frame_features(samples, sample_rate=16000, frame_ms=30):
+    """Per-frame level (dBFS) and spectral flatness of int16 samples."""
+    frame_samples = int(sample_rate * frame_ms / 1000)
+    count = len(samples) // frame_samples
+    if count == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+    x = samples[:count * frame_samples].reshape(count, frame_samples).astype(np.float32) / 32768.0
+    level_db = 10 * np.log10(np.einsum("ij,ij->i", x, x) / frame_samples + 1e-10)
+
+    power = np.abs(np.fft.rfft(x * np.hanning(frame_samples).astype(np.float32), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(frame_samples, 1.0 / sample_rate)
+    band = power[:, (freqs >= BAND_HZ[0]) & (freqs <= BAND_HZ[1])] + 1e-12
+    flatness = np.exp(np.mean(np.log(band), axis=1)) / np.mean(band, axis=1)
+    return level_db, flatness
+
+
+class SpeechGate:
+    """Decides whether a VAD buffer is worth a Whisper decode, and counts what it rejected."""
+
+    def __init__(self, sample_rate=16000, frame_ms=30, min_voiced_sec=0.25,
+                 min_voiced_ratio=0.2, max_flatness=0.4, floor_db=-55.0, clock=time.monotonic):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.min_voiced_sec = min_voiced_sec
+        self.min_voiced_ratio = min_voiced_ratio
+        self.max_flatness = max_flatness
+        self.floor_db = floor_db
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.rejected = collections.Counter()  # reason -> count
+        self.rejected_sec = 0.0
+
+    def evaluate(self, pcm):
+        """Classify int16 PCM (bytes or array) without touching the counters."""
+        samples = np.frombuffer(pcm, dtype=np.int16) if isinstance(pcm, (bytes, bytearray)) else pcm
+        level_db, flatness = frame_features(samples, self.sample_rate, self.frame_ms)
+        frame_sec = self.frame_ms / 1000
+        loud = level_db > self.floor_db
+        voiced = loud & (flatness < self.max_flatness)
+        voiced_sec = float(voiced.sum()) * frame_sec
+        # Ratio over the span from the first to the last frame above the floor
+        loud_at = np.flatnonzero(loud)
+        span = loud_at[-1] - loud_at[0] + 1 if len(loud_at) else 0
+        voiced_ratio = float(voiced.sum()) / span if span else 0.0
+        median_flatness = float(np.median(flatness[loud])) if loud.any() else 1.0
+
+        if voiced_sec < self.min_voiced_sec:
+            reason = "noise" if loud.sum() * frame_sec >= self.min_voiced_sec else "too short"
+        elif voiced_ratio < self.min_voiced_ratio:
+            reason = "sparse"
+        else:
+            reason = None
+        return GateResult(reason is None, reason, voiced_sec, voiced_ratio, median_flatness)
+
+    def check(self, pcm):
+        """Classify a buffer about to be decoded and count the outcome."""
+        result = self.evaluate(pcm)
+        samples = len(pcm) // 2 if isinstance(pcm, (bytes, bytearray)) else len(pcm)
+        with self._lock:
+            self.checked += 1
+            if not result.passed:
+                self.rejected[result.reason] += 1
+                self.rejected_sec += samples / self.sample_rate
+        return result
+
+    def summary(self, hours=None):
+        """One line of counters; `hours` defaults to the time since the gate was created."""
+        with self._lock:
+            rejected = sum(self.rejected.values())
+            hours = hours if hours is not None else (self._clock() - self._started) / 3600
+            reasons = ", ".join(f"{count} {reason}" for reason, count in self.rejected.most_common())
+            text = f"{rejected}/{self.checked} buffers skipped"
+            if reasons:
+                text += f" ({reasons})"
+            text += f", {self.rejected_sec:.1f}s of audio"
+            if hours > 0:
+                text += f" | {rejected / hours:.0f} decodes saved per hour"
+            return text
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Measuring on recordings
+
+def cut_utterances(samples, sample_rate=16000, frame_ms=30, silence_sec=1.0, is_speech=None):
+    """Split a recording into the buffers the live loop would have decoded."""
+    from endpointer import Endpointer
+
+    if is_speech is None:
+        try:
+            import webrtcvad
+            vad = webrtcvad.Vad(2)
+            is_speech = lambda frame: vad.is_speech(frame, sample_rate)
+        except ImportError:
+            # Level-only stand-in: as permissive as the VAD, which is the point of the gate
+            is_speech = lambda frame: frame_features(
+                np.frombuffer(frame, dtype=np.int16), sample_rate, frame_ms)[0][0] > -45.0
+
+    endpointer = Endpointer(sample_rate=sample_rate, frame_ms=frame_ms, silence_sec=silence_sec)
+    frame_bytes = endpointer.frame_bytes
+    data = np.ascontiguousarray(samples, dtype=np.int16).tobytes()
+    utterances = []
+    for offset in range(0, len(data) - frame_bytes + 1, frame_bytes):
+        frame = data[offset:offset + frame_bytes]
+        utterance = endpointer.push(frame, is_speech(frame))
+        if utterance is not None:
+            utterances.append(utterance.pcm)
+    tail = endpointer.flush()
+    if tail is not None:
+        utterances.append(tail.pcm)
+    return utterances
+
+
+def measure(gate, buffers, hours, verbose=False):
+    """Run buffers through the gate and print what would have been skipped."""
+    for pcm in buffers:
+        result = gate.check(pcm)
+        if verbose and not result.passed:
+            print(f"   skip {len(pcm) / (2 * gate.sample_rate):5.2f}s  {result.reason:9s}  "
+                  f"voiced {result.voiced_sec:.2f}s ({result.voiced_ratio:.0%}), "
+                  f"flatness {result.flatness:.2f}")
+    print(f"🚧 Speech gate: {gate.summary(hours)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure decodes the speech gate would save")
+    parser.add_argument("recordings", nargs="*", help="16 kHz mono 16-bit WAV session recordings")
+    parser.add_argument("--archive", default=None, help="Audio archive directory to scan instead")
+    parser.add_argument("--max-flatness", type=float, default=0.4)
+    parser.add_argument("--min-voiced-sec", type=float, default=0.25)
+    parser.add_argument("--min-voiced-ratio", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true", help="List every skipped buffer")
+    args = parser.parse_args()
+
+    gate = SpeechGate(min_voiced_sec=args.min_voiced_sec, min_voiced_ratio=args.min_voiced_ratio,
+                      max_flatness=args.max_flatness)
+    if args.archive:
+        from audio_archive import AudioArchive
+
+        archive = AudioArchive(args.archive, read_only=True)
+        try:
+            entries = [(entry, np.array(samples)) for entry, samples in archive.iter_utterances()]
+        finally:
+            archive.close()
+        if not entries:
+            parser.error("archive is empty")
+        span = entries[-1][0].timestamp - entries[0][0].timestamp
+        audio = sum(entry.samples / entry.sample_rate for entry, _ in entries)
+        print(f"📂 {len(entries)} archived utterances over {span / 3600:.2f}h")
+        measure(gate, [samples.tobytes() for _, samples in entries], max(span, audio) / 3600, args.verbose)
+        return
+
+    if not args.recordings:
+        parser.error("give WAV recordings or --archive")
+    from transcribe_file import map_wav
+
+    buffers, seconds = [], 0.0
+    for path in args.recordings:
+        samples = map_wav(path)
+        seconds += len(samples) / 16000
+        buffers.extend(cut_utterances(samples))
+    print(f"📂 {len(buffers)} utterances in {seconds / 3600:.2f}h of recordings")
+    measure(gate, buffers, seconds / 3600, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
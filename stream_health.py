@@ -0,0 +1,210 @@
+"""
+Input stream health: overflow accounting and adaptive stream latency.
+
+StreamHealth is fed from the PortAudio callbacks. It counts and timestamps
+overflow/underflow flags and measures audio actually lost, using gaps in the
+ADC timestamps. Each event is tagged with whatever the app was doing at the
+time (decoding, pasting, loading the model, pipeline state), so drops can be
+traced to their cause.
+
+AdaptiveLatency reacts to overflows by stepping up the stream latency and
+block size. After a long stable period it steps back down. The callbacks only
+set a flag; the streams are reopened from the main thread.
+"""
+
+import collections
+import threading
+import time
+from contextlib import contextmanager
+
+STATUS_FLAGS = ("input_overflow", "input_underflow", "output_overflow", "output_underflow")
+
+# (suggested stream latency, capture blocks per callback), lowest first
+LATENCY_LEVELS = (("low", 1), (0.1, 1), (0.2, 2), (0.4, 4))
+
+Event = collections.namedtuple("Event", ["time", "stream", "kind", "activity", "lost_sec"])
+
+
+class AdaptiveLatency:
+    """Picks a latency level: up on overflow (with a cooldown), down after a stable period."""
+
+    def __init__(self, levels=LATENCY_LEVELS, cooldown_sec=2.0, stable_sec=120.0,
+                 enabled=True, clock=time.monotonic):
+        self.levels = levels
+        self.cooldown_sec = cooldown_sec
+        self.stable_sec = stable_sec
+        self.enabled = enabled
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.level = 0
+        self.changes = 0
+        self._last_change = clock()
+        self._last_overflow = None
+        self._changed = False
+
+    @property
+    def latency(self):
+        return self.levels[self.level][0]
+
+    @property
+    def blocks(self):
+        return self.levels[self.level][1]
+
+    def _set(self, level, now):
+        self.level = level
+        self._last_change = now
+        self._changed = True
+        self.changes += 1
+
+    def on_overflow(self):
+        """Called from the audio callback; never blocks for long."""
+        with self._lock:
+            now = self._clock()
+            self._last_overflow = now
+            if (self.enabled and self.level < len(self.levels) - 1
+                    and now - self._last_change >= self.cooldown_sec):
+                self._set(self.level + 1, now)
+
+    def check_stable(self):
+        """Step down one level once nothing has overflowed for stable_sec."""
+        with self._lock:
+            now = self._clock()
+            quiet_since = max(self._last_change, self._last_overflow or self._last_change)
+            if self.enabled and self.level > 0 and now - quiet_since >= self.stable_sec:
+                self._set(self.level - 1, now)
+
+    def take_change(self):
+        """True once after each level change (the caller reopens the streams)."""
+        with self._lock:
+            changed, self._changed = self._changed, False
+            return changed
+
+    def describe(self):
+        latency = self.latency if isinstance(self.latency, str) else f"{self.latency * 1000:.0f}ms"
+        return f"latency {latency}, {self.blocks} block(s) per callback"
+
+
+class StreamHealth:
+    """Counts stream problems and lost audio, tagged with the app's activity at the time."""
+
+    def __init__(self, adaptive=None, state_provider=None, max_events=1000, clock=time.time):
+        self.adaptive = adaptive
+        self.state_provider = state_provider  # e.g. lambda: pipeline.state.value
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._activity_counts = collections.Counter()
+        self._activity = ()  # Immutable snapshot, safe to read from the callback
+        self.events = collections.deque(maxlen=max_events)
+        self.counts = collections.Counter()  # kind -> count
+        self.by_activity = collections.Counter()  # (kind, activity) -> count
+        self.lost_sec = 0.0
+        self.captured = collections.Counter()  # stream -> seconds delivered
+        self._next_adc = {}  # stream -> expected ADC time of the next block
+        self._reported = 0
+
+    # ── activities ───────────────────────────────────────────────────────────
+    @contextmanager
+    def activity(self, name):
+        """Mark `name` as in progress (nesting and concurrent use are fine)."""
+        with self._lock:
+            self._activity_counts[name] += 1
+            self._activity = tuple(sorted(n for n, c in self._activity_counts.items() if c > 0))
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._activity_counts[name] -= 1
+                self._activity = tuple(sorted(n for n, c in self._activity_counts.items() if c > 0))
+
+    def current_activity(self):
+        parts = list(self._activity)
+        if self.state_provider is not None:
+            parts.insert(0, str(self.state_provider()))
+        return "+".join(parts) or "idle"
+
+    # ── callback side ────────────────────────────────────────────────────────
+    def record(self, stream, status, adc_time, frames, sample_rate):
+        """Call at the top of an input callback with its status and time info."""
+        duration = frames / sample_rate
+        lost = 0.0
+        expected = self._next_adc.get(stream)
+        if adc_time:  # Some host APIs always report 0
+            if expected is not None and adc_time - expected > duration / 2:
+                lost = adc_time - expected
+            self._next_adc[stream] = adc_time + duration
+
+        kinds = [flag for flag in STATUS_FLAGS if status and getattr(status, flag, False)]
+        if lost and not kinds:
+            kinds = ["gap"]
+        if not kinds:
+            with self._lock:
+                self.captured[stream] += duration
+            return
+
+        activity = self.current_activity()
+        now = self._clock()
+        with self._lock:
+            self.captured[stream] += duration
+            self.lost_sec += lost
+            for kind in kinds:
+                self.counts[kind] += 1
+                self.by_activity[(kind, activity)] += 1
+                self.events.append(Event(now, stream, kind, activity, lost))
+                lost = 0.0  # Attribute the gap to the first flag only
+        if self.adaptive is not None and ("input_overflow" in kinds or "gap" in kinds):
+            self.adaptive.on_overflow()
+
+    # ── main-thread side ─────────────────────────────────────────────────────
+    def reset_stream(self, stream=None):
+        """Forget the expected ADC time of `stream` (or all streams) after a reopen.
+
+        A reopened stream starts on a new timeline; without this its first block
+        would be counted as a gap and trigger another latency step.
+        """
+        with self._lock:
+            if stream is None:
+                self._next_adc.clear()
+            else:
+                self._next_adc.pop(stream, None)
+
+    def new_events(self):
+        """Events recorded since the last call."""
+        with self._lock:
+            total = self.counts.total()
+            fresh = min(total - self._reported, len(self.events))
+            self._reported = total
+            return list(self.events)[-fresh:] if fresh else []
+
+    def tick(self):
+        """Periodic check from the main thread. Returns a warning line for new events, or None."""
+        if self.adaptive is not None:
+            self.adaptive.check_stable()
+        events = self.new_events()
+        if not events:
+            return None
+        kinds = collections.Counter(event.kind.replace("_", " ") for event in events)
+        activities = collections.Counter(event.activity for event in events)
+        lost_ms = sum(event.lost_sec for event in events) * 1000
+        text = ", ".join(f"{count} {kind}" for kind, count in kinds.items())
+        text += f" during {activities.most_common(1)[0][0]}"
+        if lost_ms:
+            text += f" (~{lost_ms:.0f}ms audio lost)"
+        return text
+
+    def summary(self):
+        with self._lock:
+            if not self.counts:
+                minutes = max(self.captured.values(), default=0.0) / 60
+                text = f"no overflows in {minutes:.1f} min of capture"
+            else:
+                by_kind = ", ".join(f"{count} {kind.replace('_', ' ')}"
+                                    for kind, count in self.counts.items())
+                worst = ", ".join(f"{activity} {count}" for (kind, activity), count
+                                  in self.by_activity.most_common(3))
+                captured = sum(self.captured.values())
+                share = self.lost_sec / captured if captured else 0.0
+                text = (f"{by_kind} | audio lost {self.lost_sec * 1000:.0f}ms ({share:.2%}) | "
+                        f"by activity: {worst}")
+        if self.adaptive is not None:
+            text += f" | {self.adaptive.describe()} after {self.adaptive.changes} changes"
+        return text
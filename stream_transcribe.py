@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Transcribe raw PCM from stdin, writing one JSON line per utterance to stdout.
+
+Input is 16 kHz mono signed 16-bit little-endian PCM, e.g.:
+    ffmpeg -i talk.mp3 -f s16le -ac 1 -ar 16000 - | python stream_transcribe.py
+    arecord -f S16_LE -c 1 -r 16000 -t raw | python stream_transcribe.py --language en
+
+Uses the same WebRTC VAD endpointing as the live app, decodes straight from
+memory (no temp files) and needs no microphone, clipboard or GUI packages.
+Each output line looks like:
+    {"start": 1.23, "end": 3.45, "text": "...", "language": "en", "decode_time": 0.21, "fallback": false}
+Status messages go to stderr so stdout stays machine-readable.
+"""
+
+import argparse
+import json
+import os
+import queue
+import stat
+import sys
+import threading
+import time
+
+import numpy as np
+
+from decoding_profiles import DECODING_PROFILES, FallbackStats, transcribe_with_profile
+from endpointer import Endpointer
+from session_context import SessionContext
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+READ_CHUNK_BYTES = 256 * 1024  # Upper bound per read; only regular files wait to fill it
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def chunk_reader(stream):
+    """Pick the read call for `stream`: read() for files, read1() for live pipes.
+
+    read(n) on a pipe blocks until n bytes arrive, which at 32 KB/s holds live
+    audio back for seconds; read1(n) returns whatever is already buffered.
+    """
+    try:
+        regular = stat.S_ISREG(os.fstat(stream.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        regular = True  # No descriptor: an in-memory buffer, which never blocks
+    if regular or not hasattr(stream, "read1"):
+        return stream.read
+    return stream.read1
+
+
+def iter_frames(stream, frame_bytes, chunk_bytes=READ_CHUNK_BYTES):
+    """Yield fixed-size frames from a binary stream read in chunks of up to chunk_bytes.
+
+    A trailing partial frame is zero-padded so no audio is dropped at EOF.
+    """
+    read = chunk_reader(stream)
+    pending = b""
+    while True:
+        chunk = read(chunk_bytes)
+        if not chunk:
+            break
+        data = pending + chunk if pending else chunk
+        usable = len(data) - len(data) % frame_bytes
+        view = memoryview(data)
+        for offset in range(0, usable, frame_bytes):
+            yield bytes(view[offset:offset + frame_bytes])
+        pending = data[usable:]
+    if pending:
+        yield pending + bytes(frame_bytes - len(pending))
+
+
+def decode_utterance(model, utterance, profile, session, stats=None):
+    """Decode one utterance from memory and return its result record."""
+    audio = np.frombuffer(utterance.pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    start = time.perf_counter()
+    segments, info, used_fallback = transcribe_with_profile(
+        model, audio, profile, stats=stats, **session.transcribe_options()
+    )
+    text = " ".join(segment.text for segment in segments).strip()
+    decode_time = time.perf_counter() - start
+    session.update(info, text, decode_time, utterance.end - utterance.start)
+    return {
+        "start": round(utterance.start, 3),
+        "end": round(utterance.end, 3),
+        "text": text,
+        "language": getattr(info, "language", None),
+        "decode_time": round(decode_time, 4),
+        "fallback": used_fallback,
+    }
+
+
+def transcribe_stream(stream, out, model, is_speech, profile="latency", session=None,
+                      silence_sec=1.0, emit_empty=False, stats=None):
+    """Endpoint PCM from `stream` and write NDJSON results to `out`.
+
+    Reading and decoding run on separate threads, so a live producer keeps
+    being drained while an utterance decodes. Returns the number of utterances.
+    """
+    session = session or SessionContext()
+    endpointer = Endpointer(sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, silence_sec=silence_sec)
+    utterances = queue.Queue()
+    written = [0]
+
+    def decode_loop():
+        while True:
+            utterance = utterances.get()
+            if utterance is None:
+                return
+            try:
+                record = decode_utterance(model, utterance, profile, session, stats)
+            except Exception as e:
+                log(f"❌ Error during transcription: {e}")
+                continue
+            if record["text"] or emit_empty:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                written[0] += 1
+
+    decoder = threading.Thread(target=decode_loop, daemon=True)
+    decoder.start()
+    try:
+        for frame in iter_frames(stream, endpointer.frame_bytes):
+            utterance = endpointer.push(frame, is_speech(frame))
+            if utterance is not None:
+                utterances.put(utterance)
+        utterance = endpointer.flush()
+        if utterance is not None:
+            utterances.put(utterance)
+    finally:
+        utterances.put(None)
+        decoder.join()
+    return written[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Transcribe 16 kHz mono int16 PCM from stdin to NDJSON on stdout"
+    )
+    parser.add_argument("--model", default="small", help="Whisper model size or path")
+    parser.add_argument("--device", default="auto", help="cuda, cpu or auto")
+    parser.add_argument("--compute-type", default="default")
+    parser.add_argument("--profile", default="latency", choices=list(DECODING_PROFILES))
+    parser.add_argument("--language", default=None, help="Pin the language (skips detection)")
+    parser.add_argument("--no-prompt", action="store_true", help="Don't carry text between utterances")
+    parser.add_argument("--vad", type=int, default=2, choices=range(4), help="VAD aggressiveness")
+    parser.add_argument("--silence", type=float, default=1.0, help="Seconds of silence that end an utterance")
+    parser.add_argument("--emit-empty", action="store_true", help="Also write utterances with no text")
+    args = parser.parse_args()
+
+    # stdout carries only results; shared modules' status prints go to stderr
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    import webrtcvad
+    from model_store import load_model
+
+    vad = webrtcvad.Vad(args.vad)
+    log(f"🔧 Loading Whisper model '{args.model}' ({args.device})...")
+    model = load_model(args.model, device=args.device, compute_type=args.compute_type)
+    log("✅ Model loaded, reading PCM from stdin...")
+
+    stats = FallbackStats()
+    session = SessionContext(language=args.language, carry_prompt=not args.no_prompt)
+    try:
+        count = transcribe_stream(
+            sys.stdin.buffer, out, model,
+            lambda frame: vad.is_speech(frame, SAMPLE_RATE),
+            profile=args.profile, session=session, silence_sec=args.silence,
+            emit_empty=args.emit_empty, stats=stats,
+        )
+    except KeyboardInterrupt:
+        return
+    log(f"📊 {count} utterances | {stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Smoke tests of the GPU app: it imports without side effects, loads its model at
+startup, and batches queued utterances.
+Audio/keyboard libraries and the Whisper model are replaced by stand-ins. The import
+runs in a child process so the stand-in modules do not leak into other tests.
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+STUBS = textwrap.dedent("""
+    import sys
+    from types import ModuleType, SimpleNamespace
+
+    def stub(name, **attrs):
+        module = ModuleType(name)
+        module.__dict__.update(attrs)
+        sys.modules[name] = module
+
+    stub("torch", cuda=SimpleNamespace(is_available=lambda: False))
+    from endpointer import level_vad
+    stub("webrtcvad", Vad=lambda aggressiveness: SimpleNamespace(is_speech=lambda frame, rate: level_vad(frame)))
+    stub("sounddevice")
+    stub("pyperclip")
+    stub("pyautogui")
+    stub("pvporcupine", create=lambda **kwargs: SimpleNamespace(sample_rate=16000,
+                                                               frame_length=512,
+                                                               delete=lambda: None))
+
+    loaded = []
+
+    class FakeWhisperModel:
+        def __init__(self, name, **kwargs):
+            loaded.append(name)
+            self.feature_extractor = SimpleNamespace()
+
+    import faster_whisper
+    faster_whisper.WhisperModel = FakeWhisperModel
+""")
+
+STARTUP_SCRIPT = textwrap.dedent("""
+    import threading
+    threads = threading.active_count()
+    import voice_to_text_vr_gpu as app
+    assert loaded == [] and app.model_manager is None, "Importing loads no model"
+    assert threading.active_count() == threads, "Importing starts no threads"
+
+    app.JOURNAL_ENABLED = False
+    app.start_pipeline()
+    assert loaded == [app.WHISPER_MODEL_SIZE], loaded
+    assert app.model_manager.loaded and app.scheduler is not None
+    app.scheduler.stop()
+    app.model_manager.close()
+    print("STARTED")
+""")
+
+
+BATCH_SCRIPT = textwrap.dedent("""
+    import numpy as np
+    import voice_to_text_vr_gpu as app
+    from decode_scheduler import DecodeJob
+
+    app.JOURNAL_ENABLED = False
+    app.DECODE_BATCH_SIZE = 4
+    app.start_pipeline()
+    app.scheduler.stop()
+
+    t = np.arange(16000) / 16000
+    pcm = (np.sin(2 * np.pi * 200 * t) * 8000).astype(np.int16).tobytes()
+    leader, kept, raced = (DecodeJob("continuous", 1, None, (pcm, None), {}) for _ in range(3))
+    app.scheduler = SimpleNamespace(peek=lambda kind, limit: [kept, raced])
+
+    def fake_batch(model, clips, *args, **kwargs):
+        raced.cancel()  # Sleep word while the batch is decoding
+        return [([SimpleNamespace(text=" hi")], SimpleNamespace(language="en"), False, 0.1)
+                for _ in clips]
+
+    app.transcribe_batch = fake_batch
+    decoded = app.decode_with_queued(leader, pcm)
+    assert decoded.segments[0].text == " hi"
+    assert list(app.batched_results) == [kept], f"{len(app.batched_results)} stored results"
+    print("BATCHED")
+""")
+
+
+def run_app(script, marker):
+    result = subprocess.run([sys.executable, "-c", STUBS + script], cwd=HERE,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0 and marker in result.stdout, result.stdout + result.stderr
+    return result.stdout
+
+
+def test_app_imports_and_loads_model():
+    print("🧪 Testing app import and startup with a stand-in model...")
+    run_app(STARTUP_SCRIPT, "STARTED")
+    print("✅ Import is free of side effects; start_pipeline() loads the model")
+
+
+def test_batch_keeps_no_result_for_cancelled_jobs():
+    print("\n🧪 Testing batched results of cancelled jobs...")
+    run_app(BATCH_SCRIPT, "BATCHED")
+    print("✅ Only uncancelled queued jobs keep their batched result")
+
+
+if __name__ == "__main__":
+    test_app_imports_and_loads_model()
+    test_batch_keeps_no_result_for_cancelled_jobs()
+    print("\n🎉 All app startup tests passed!")
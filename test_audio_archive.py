@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tests for the utterance audio archive: round trips, zero-copy reads, eviction and reopen.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from audio_archive import AudioArchive, compress_pcm, decompress_pcm, export_corpus
+
+
+def make_utterance(seconds, seed):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(16000 * seconds)) * 4000).astype(np.int16)
+
+
+def test_round_trip_is_zero_copy():
+    print("🧪 Testing raw round trip...")
+    with tempfile.TemporaryDirectory() as directory:
+        archive = AudioArchive(directory)
+        first = make_utterance(1.0, 1)
+        second = make_utterance(0.5, 2)
+        archive.append(first.tobytes(), entry_id=7)
+        archive.append(bytearray(second.tobytes()))
+
+        samples = archive.samples(0)
+        assert np.array_equal(samples, first)
+        assert np.array_equal(archive.samples(1), second)
+        assert isinstance(samples.base, np.memmap) or isinstance(samples, np.memmap)
+        assert archive.entry(0).entry_id == 7
+        archive.close()
+    print("✅ Samples come back unchanged as memmap views")
+
+
+def test_compressed_round_trip():
+    print("\n🧪 Testing delta + zlib compression...")
+    samples = np.array([0, 32767, -32768, 5, -5, 100], dtype=np.int16)
+    assert np.array_equal(decompress_pcm(compress_pcm(samples)), samples)
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = AudioArchive(directory, compress=True)
+        tone = (np.sin(np.arange(16000) * 0.05) * 8000).astype(np.int16)
+        archive.append(tone)
+        assert np.array_equal(archive.samples(0), tone)
+        assert archive.entry(0).size < tone.nbytes
+        archive.close()
+    print("✅ Compressed utterances decode exactly")
+
+
+def test_eviction_respects_budget():
+    print("\n🧪 Testing size budget eviction...")
+    with tempfile.TemporaryDirectory() as directory:
+        archive = AudioArchive(directory, max_bytes=100_000)
+        utterances = [make_utterance(0.5, seed) for seed in range(10)]  # 16 KB each
+        for utterance in utterances:
+            archive.append(utterance)
+
+        assert archive.total_bytes() <= 100_000
+        assert len(archive) < 10
+        assert np.array_equal(archive.samples(len(archive) - 1), utterances[-1])
+        archive.close()
+
+        reopened = AudioArchive(directory, max_bytes=100_000)
+        kept = len(reopened)
+        for offset in range(kept):
+            assert np.array_equal(reopened.samples(offset), utterances[10 - kept + offset])
+        pcm_files = [name for name in os.listdir(directory) if name.endswith(".pcm")]
+        assert len(pcm_files) == 1
+        reopened.close()
+    print(f"✅ Kept the newest {kept} utterances within budget")
+
+
+def test_torn_index_record_is_ignored():
+    print("\n🧪 Testing torn index record...")
+    with tempfile.TemporaryDirectory() as directory:
+        archive = AudioArchive(directory)
+        archive.append(make_utterance(0.2, 3))
+        archive.close()
+        with open(os.path.join(directory, "index.bin"), "ab") as f:
+            f.write(b"\x01\x02\x03")
+
+        reopened = AudioArchive(directory)
+        assert len(reopened) == 1
+        reopened.close()
+    print("✅ Partial trailing record dropped")
+
+
+def test_records_after_damage_survive_reopen():
+    print("\n🧪 Testing appends after a stale or torn index record...")
+    from audio_archive import RECORD
+    with tempfile.TemporaryDirectory() as directory:
+        utterances = [make_utterance(0.2, seed) for seed in range(4)]
+        archive = AudioArchive(directory)
+        archive.append(utterances[0])
+        end = archive.total_bytes()
+        archive.close()
+        # Crash after the index write but before the data reached the disk
+        with open(os.path.join(directory, "index.bin"), "ab") as f:
+            f.write(RECORD.pack(end, 64000, 32000, -1, 16000, 0.0, 0))
+
+        archive = AudioArchive(directory)
+        assert len(archive) == 1
+        archive.append(utterances[1])
+        archive.close()
+        with open(os.path.join(directory, "index.bin"), "ab") as f:
+            f.write(b"\x01\x02\x03")
+
+        archive = AudioArchive(directory)
+        archive.append(utterances[2])
+        archive.append(utterances[3])
+        archive.close()
+
+        reopened = AudioArchive(directory)
+        assert len(reopened) == 4
+        for index, utterance in enumerate(utterances):
+            assert np.array_equal(reopened.samples(index), utterance)
+        reopened.close()
+    print("✅ Damaged records are skipped; later utterances stay indexed")
+
+
+def test_read_only_open_changes_nothing():
+    print("\n🧪 Testing a read-only reader next to the writing app...")
+    with tempfile.TemporaryDirectory() as directory:
+        utterances = [make_utterance(0.5, seed) for seed in range(10)]  # 16 KB each
+        writer = AudioArchive(directory, max_bytes=100_000)
+        for utterance in utterances[:4]:
+            writer.append(utterance)
+        # A leftover generation and a torn record: only the writer may clean these up
+        open(os.path.join(directory, "audio-000099.pcm"), "wb").close()
+        with open(os.path.join(directory, "index.bin"), "ab") as f:
+            f.write(b"\x01\x02\x03")
+        before = {name: os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)}
+
+        reader = AudioArchive(directory, read_only=True)
+        assert len(reader) == 4
+        assert before == {name: os.path.getsize(os.path.join(directory, name))
+                          for name in os.listdir(directory)}, "Reader deleted or rewrote files"
+        try:
+            reader.append(utterances[0])
+            raise AssertionError("append() on a read-only archive must raise")
+        except ValueError:
+            pass
+
+        with open(os.path.join(directory, "index.bin"), "rb+") as f:
+            f.truncate(os.path.getsize(os.path.join(directory, "index.bin")) - 3)
+        for utterance in utterances[4:]:
+            writer.append(utterance)  # Evicts into a new generation and unlinks the old one
+        assert not os.path.exists(os.path.join(directory, "audio-000000.pcm"))
+        for index in range(4):
+            assert np.array_equal(reader.samples(index), utterances[index]), "Snapshot stays readable"
+        reader.close()
+        writer.close()
+
+        missing = os.path.join(directory, "missing")
+        empty = AudioArchive(missing, read_only=True)
+        assert len(empty) == 0 and not os.path.exists(missing)
+        empty.close()
+    print("✅ Read-only opens delete, rewrite and create nothing")
+
+
+def test_export_corpus():
+    print("\n🧪 Testing corpus export...")
+    with tempfile.TemporaryDirectory() as directory:
+        archive = AudioArchive(os.path.join(directory, "archive"))
+        archive.append(make_utterance(0.3, 4))
+        output_dir = os.path.join(directory, "corpus")
+        assert export_corpus(archive, output_dir) == 1
+        assert os.path.exists(os.path.join(output_dir, "utt_000000.wav"))
+        archive.close()
+    print("✅ Archived audio exported as WAV")
+
+
+if __name__ == "__main__":
+    test_round_trip_is_zero_copy()
+    test_compressed_round_trip()
+    test_eviction_respects_budget()
+    test_torn_index_record_is_ignored()
+    test_records_after_damage_survive_reopen()
+    test_read_only_open_changes_nothing()
+    test_export_corpus()
+    print("\n🎉 All audio archive tests passed!")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for batched multi-utterance decoding.
+A stand-in for faster-whisper's BatchedInferencePipeline records the clips it is given;
+real throughput needs model weights (python batch_decoder.py --model ...).
+"""
+
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from decode_scheduler import DecodeCancelled
+from decoding_profiles import FallbackStats
+from multiprocess_pipeline import FakeDecoder
+from batch_decoder import split_segments, transcribe_batch
+
+RATE = 16000
+
+
+class FakeBatchedPipeline:
+    """Yields one segment per clip, in concatenated-audio time, like the real pipeline."""
+
+    def __init__(self, model, low_confidence=()):
+        self.model = model
+        self.low_confidence = low_confidence
+        self.calls = []
+
+    def transcribe(self, audio, clip_timestamps, batch_size, **options):
+        self.calls.append((len(audio), clip_timestamps, batch_size, options))
+        info = SimpleNamespace(language="en", language_probability=0.97)
+        return self._segments(clip_timestamps), info
+
+    def _segments(self, clips):
+        for k, clip in enumerate(clips):
+            yield SimpleNamespace(text=f" clip {k}", start=clip["start"], end=clip["end"],
+                                  avg_logprob=-2.0 if k in self.low_confidence else -0.2,
+                                  compression_ratio=1.2)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype=np.float32)
+
+
+def test_results_split_back_per_utterance():
+    print("🧪 Testing one batched call split back per utterance...")
+    pipeline = FakeBatchedPipeline(None)
+    audios = [silence(2.0), silence(3.5), silence(1.0)]
+    stats = FallbackStats()
+    results = transcribe_batch(FakeDecoder(0.0), audios, "latency", stats=stats, batch_size=8,
+                               pipeline_factory=lambda model: pipeline, language="en")
+
+    assert len(pipeline.calls) == 1
+    samples, clips, batch_size, options = pipeline.calls[0]
+    assert samples == 6.5 * RATE and batch_size == 8
+    assert [(int(c["start"] * RATE), int(c["end"] * RATE)) for c in clips] == \
+        [(0, 32000), (32000, 88000), (88000, 104000)]
+    assert options["language"] == "en" and options["beam_size"] == 1
+
+    for k, (segments, info, used_fallback, decode_time) in enumerate(results):
+        assert [s.text for s in segments] == [f" clip {k}"]
+        assert segments[0].start == 0.0 and segments[0].end == len(audios[k]) / RATE
+        assert info.language == "en" and info.duration == len(audios[k]) / RATE
+        assert not used_fallback and decode_time >= 0
+    assert stats.decodes == 3
+    print("✅ Clips, options and per-utterance times are right")
+
+
+def test_long_and_unreliable_utterances_decode_alone():
+    print("\n🧪 Testing long utterances and the fallback...")
+    pipeline = FakeBatchedPipeline(None, low_confidence={1})
+    audios = [silence(1.0), silence(2.0), silence(31.0), silence(1.5)]
+    results = transcribe_batch(FakeDecoder(0.0), audios, "latency",
+                               pipeline_factory=lambda model: pipeline)
+
+    _, clips, _, _ = pipeline.calls[0]
+    assert len(clips) == 3, "The 31 s utterance does not fit one window"
+    assert [s.text for s in results[0][0]] == [" clip 0"]
+    assert results[1][2], "Low-confidence clip is re-decoded with beam search"
+    assert results[1][0][0].text == " fake transcription"
+    assert len(results[2][0]) == 31 and not results[2][2]
+    assert [s.text for s in results[3][0]] == [" clip 2"]
+    print("✅ Only short, reliable clips keep their batched result")
+
+
+def test_single_utterance_skips_the_pipeline():
+    print("\n🧪 Testing that one utterance is decoded normally...")
+    def no_pipeline(model):
+        raise AssertionError("A batch of one must not use the batched pipeline")
+    results = transcribe_batch(FakeDecoder(0.0), [silence(2.0)], pipeline_factory=no_pipeline)
+    assert len(results) == 1 and len(results[0][0]) == 2
+    print("✅ Batch of one falls back to a plain decode")
+
+
+def test_cancel_and_split_edges():
+    print("\n🧪 Testing cancellation and segment assignment...")
+    cancel = threading.Event()
+    cancel.set()
+    try:
+        transcribe_batch(FakeDecoder(0.0), [silence(1.0), silence(1.0)], cancel_event=cancel,
+                         pipeline_factory=FakeBatchedPipeline)
+        raise AssertionError("A cancelled batch must raise")
+    except DecodeCancelled:
+        pass
+
+    # Segments straddling a boundary go to the clip holding most of them
+    segments = [SimpleNamespace(start=0.5, end=2.4), SimpleNamespace(start=1.8, end=3.0),
+                SimpleNamespace(start=3.2, end=3.9)]
+    per_clip = split_segments(segments, [0.0, 2.0, 3.1])
+    assert [[(s.start, s.end) for s in clip] for clip in per_clip] == \
+        [[(0.5, 2.4)], [(0.0, 1.0)], [(0.1, 0.8)]]
+    print("✅ Cancelled batches stop; boundary segments land in one clip")
+
+
+if __name__ == "__main__":
+    test_results_split_back_per_utterance()
+    test_long_and_unreliable_utterances_decode_alone()
+    test_single_utterance_skips_the_pipeline()
+    test_cancel_and_split_edges()
+    print("\n🎉 All batch decoder tests passed!")
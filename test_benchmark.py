@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark matrix bookkeeping (baseline comparison, audio loading).
+Model runs themselves need faster-whisper and are not exercised here.
+"""
+
+import os
+
+from benchmark_gpu import compare_to_baseline, config_key, generate_test_audio, load_wav
+
+
+def make_result(avg_time, load_time=1.0, cold_time=0.5):
+    return {
+        "model": "base",
+        "device": "cpu",
+        "compute_type": "int8",
+        "beam_size": 5,
+        "load_time": load_time,
+        "cold_time": cold_time,
+        "avg_time": avg_time,
+    }
+
+
+def test_config_key():
+    print("🧪 Testing config keys...")
+    assert config_key(make_result(1.0)) == "base/cpu/int8/beam5"
+    print("✅ Config key covers every matrix dimension")
+
+
+def test_regression_detected_beyond_threshold():
+    print("\n🧪 Testing regression detection...")
+    baseline = {"base/cpu/int8/beam5": make_result(1.0)}
+
+    lines, regressions, unchecked = compare_to_baseline([make_result(1.10)], baseline, threshold=0.15)
+    assert regressions == 0 and unchecked == []
+
+    lines, regressions, unchecked = compare_to_baseline([make_result(1.30)], baseline, threshold=0.15)
+    assert regressions == 1
+    assert any("REGRESSION" in line and "avg_time" in line for line in lines)
+    print("✅ Only slowdowns above the threshold are flagged")
+
+
+def test_missing_baseline_entry_is_reported():
+    print("\n🧪 Testing configs without a baseline...")
+    lines, regressions, unchecked = compare_to_baseline([make_result(5.0)], {}, threshold=0.15)
+    assert regressions == 0
+    assert "NO BASELINE" in lines[-1] and unchecked == ["base/cpu/int8/beam5"]
+    print("✅ New configurations are marked as unchecked, not as regressions")
+
+
+def test_failed_configuration_is_marked():
+    print("\n🧪 Testing configs that produced no result...")
+    baseline = {"base/cpu/int8/beam5": make_result(1.0), "small/cpu/int8/beam5": make_result(2.0)}
+    lines, regressions, unchecked = compare_to_baseline(
+        [make_result(1.0)], baseline, threshold=0.15, failed=["small/cpu/int8/beam5"])
+    assert regressions == 0
+    assert unchecked == ["small/cpu/int8/beam5"]
+    assert any("small/cpu/int8/beam5" in line and "FAILED" in line for line in lines)
+    print("✅ A failed configuration is reported, not skipped")
+
+
+def test_generated_audio_round_trip():
+    print("\n🧪 Testing test-audio generation...")
+    path = generate_test_audio(1)
+    try:
+        audio = load_wav(path)
+    finally:
+        os.unlink(path)
+    assert len(audio) == 16000
+    assert abs(audio).max() <= 1.0
+    print("✅ Generated WAV loads as float32")
+
+
+if __name__ == "__main__":
+    test_config_key()
+    test_regression_detected_beyond_threshold()
+    test_missing_baseline_entry_is_reported()
+    test_failed_configuration_is_marked()
+    test_generated_audio_round_trip()
+    print("\n🎉 All benchmark tests passed!")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the decode scheduler: priority ordering, cancellation and mid-decode stops.
+"""
+
+import threading
+import time
+
+from decode_scheduler import CONTINUOUS_PRIORITY, HOTKEY_PRIORITY, DecodeScheduler
+from decoding_profiles import transcribe_with_profile
+
+
+def test_hotkey_jobs_run_ahead_of_queued_continuous_jobs():
+    print("🧪 Testing priority ordering...")
+    scheduler = DecodeScheduler()
+    order = []
+    gate = threading.Event()
+
+    def blocking_job(job):
+        gate.wait()
+        order.append("first")
+
+    def record(job, name):
+        order.append(name)
+
+    scheduler.submit("continuous", CONTINUOUS_PRIORITY, blocking_job)
+    time.sleep(0.05)  # Let the worker pick up the blocking job
+    scheduler.submit("continuous", CONTINUOUS_PRIORITY, record, "c1")
+    scheduler.submit("continuous", CONTINUOUS_PRIORITY, record, "c2")
+    last = scheduler.submit("hotkey", HOTKEY_PRIORITY, record, "hotkey")
+    gate.set()
+
+    scheduler.submit("continuous", CONTINUOUS_PRIORITY, record, "c3").wait(timeout=2)
+    assert last.done
+    assert order == ["first", "hotkey", "c1", "c2", "c3"], order
+    scheduler.stop()
+    print("✅ Hotkey job jumped the continuous queue, FIFO otherwise")
+
+
+def test_cancel_by_kind_skips_queued_jobs():
+    print("\n🧪 Testing cancellation of queued jobs...")
+    scheduler = DecodeScheduler()
+    gate = threading.Event()
+    ran = []
+
+    scheduler.submit("hotkey", HOTKEY_PRIORITY, lambda job: gate.wait())
+    time.sleep(0.05)
+    queued = [scheduler.submit("continuous", CONTINUOUS_PRIORITY, lambda job, i=i: ran.append(i))
+              for i in range(3)]
+    assert scheduler.pending("continuous") == 3
+    assert scheduler.cancel("continuous") == 3
+    gate.set()
+
+    for job in queued:
+        job.wait(timeout=2)
+    assert ran == []
+    assert scheduler.cancelled == 3
+    scheduler.stop()
+    print("✅ Cancelled jobs never reach the model")
+
+
+def test_running_decode_stops_between_segments():
+    print("\n🧪 Testing mid-decode cancellation...")
+
+    class Segment:
+        text = " word"
+        avg_logprob = -0.1
+        compression_ratio = 1.0
+
+    produced = []
+
+    class SlowModel:
+        def transcribe(self, audio, **options):
+            def segments():
+                for i in range(50):
+                    time.sleep(0.02)  # Each segment costs decoder time
+                    produced.append(i)
+                    yield Segment()
+            return segments(), None
+
+    scheduler = DecodeScheduler()
+    job = scheduler.submit(
+        "continuous", CONTINUOUS_PRIORITY,
+        lambda job: transcribe_with_profile(SlowModel(), "a.wav", "accuracy",
+                                            cancel_event=job.cancel_event),
+    )
+    time.sleep(0.1)
+    job.cancel()
+    job.wait(timeout=2)
+
+    assert job.result is None
+    assert scheduler.cancelled == 1
+    assert len(produced) < 20, f"Decoder kept running for {len(produced)} segments"
+    scheduler.stop()
+    print(f"✅ Decode stopped after {len(produced)} of 50 segments")
+
+
+def test_failed_job_does_not_stop_worker():
+    print("\n🧪 Testing job failure isolation...")
+    scheduler = DecodeScheduler()
+    failing = scheduler.submit("hotkey", HOTKEY_PRIORITY, lambda job: 1 / 0)
+    ok = scheduler.submit("hotkey", HOTKEY_PRIORITY, lambda job: "done")
+    assert ok.wait(timeout=2) == "done"
+    assert isinstance(failing.error, ZeroDivisionError)
+    scheduler.stop()
+    print(f"✅ {scheduler.summary()}")
+
+
+def test_job_returning_after_cancel_counts_as_cancelled():
+    print("\n🧪 Testing jobs that handle their own cancellation...")
+    scheduler = DecodeScheduler()
+    started = threading.Event()
+
+    def decode(job):
+        started.set()
+        job.cancel_event.wait(timeout=2)
+        return False  # Like transcribe_audio_buffer: catches DecodeCancelled and returns
+
+    job = scheduler.submit("continuous", CONTINUOUS_PRIORITY, decode)
+    started.wait(timeout=2)
+    scheduler.cancel("continuous")
+    job.wait(timeout=2)
+    scheduler.submit("hotkey", HOTKEY_PRIORITY, lambda job: None).wait(timeout=2)
+    assert (scheduler.completed, scheduler.cancelled) == (1, 1), scheduler.summary()
+    scheduler.stop()
+    print(f"✅ {scheduler.summary()}")
+
+
+def test_peek_lists_queued_jobs_of_a_kind():
+    print("\n🧪 Testing peek at queued jobs...")
+    scheduler = DecodeScheduler()
+    gate = threading.Event()
+    scheduler.submit("continuous", CONTINUOUS_PRIORITY, lambda job: gate.wait())
+    time.sleep(0.05)
+    queued = [scheduler.submit("continuous", CONTINUOUS_PRIORITY, lambda job: None, i)
+              for i in range(4)]
+    scheduler.submit("hotkey", HOTKEY_PRIORITY, lambda job: None)
+    queued[1].cancel()
+    assert scheduler.peek("continuous", 2) == [queued[0], queued[2]]
+    assert [job.args[0] for job in scheduler.peek("continuous", 10)] == [0, 2, 3]
+    gate.set()
+    queued[-1].wait(timeout=2)
+    assert scheduler.peek("continuous", 10) == []
+    scheduler.stop()
+    print("✅ Peek returns uncancelled jobs in submission order")
+
+
+if __name__ == "__main__":
+    test_hotkey_jobs_run_ahead_of_queued_continuous_jobs()
+    test_cancel_by_kind_skips_queued_jobs()
+    test_running_decode_stops_between_segments()
+    test_failed_job_does_not_stop_worker()
+    test_job_returning_after_cancel_counts_as_cancelled()
+    test_peek_lists_queued_jobs_of_a_kind()
+    print("\n🎉 All decode scheduler tests passed!")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the named decoding profiles and the confidence-triggered beam fallback.
+Uses a fake model so no Whisper weights are required.
+"""
+
+from collections import namedtuple
+
+from decoding_profiles import (
+    DECODING_PROFILES,
+    FallbackStats,
+    get_profile,
+    needs_fallback,
+    transcribe_with_profile,
+)
+
+Segment = namedtuple("Segment", ["text", "avg_logprob", "compression_ratio"])
+
+
+class FakeModel:
+    """Returns a poor greedy result and a good beam result."""
+
+    def __init__(self, greedy_logprob=-0.3):
+        self.greedy_logprob = greedy_logprob
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(options)
+        if options["beam_size"] == 1:
+            segments = [Segment(" hello", self.greedy_logprob, 1.2)]
+        else:
+            segments = [Segment(" hello there", -0.2, 1.2)]
+        return iter(segments), {"language": "en"}
+
+
+def test_profiles_are_complete():
+    """Every profile resolves to transcribe() options without the fallback flag."""
+    print("🧪 Testing decoding profile definitions...")
+    for name in DECODING_PROFILES:
+        options = get_profile(name)
+        assert "fallback" not in options
+        assert "beam_size" in options
+    assert get_profile("latency")["beam_size"] == 1
+    assert get_profile("latency")["without_timestamps"] is True
+
+    try:
+        get_profile("nonexistent")
+        assert False, "Unknown profile should raise"
+    except ValueError:
+        pass
+    print("✅ Profiles resolve correctly")
+
+
+def test_needs_fallback_thresholds():
+    """Low log-probability or high compression ratio triggers the fallback."""
+    print("\n🧪 Testing fallback thresholds...")
+    assert not needs_fallback([Segment("ok", -0.5, 1.5)])
+    assert needs_fallback([Segment("mumble", -1.5, 1.5)])
+    assert needs_fallback([Segment("la la la la", -0.2, 3.0)])
+    assert not needs_fallback([])
+    print("✅ Thresholds behave as expected")
+
+
+def test_confident_greedy_result_skips_fallback():
+    print("\n🧪 Testing confident greedy decode...")
+    model = FakeModel(greedy_logprob=-0.3)
+    stats = FallbackStats()
+    segments, info, used_fallback = transcribe_with_profile(model, "a.wav", "latency", stats=stats)
+
+    assert not used_fallback
+    assert len(model.calls) == 1
+    assert segments[0].text == " hello"
+    assert stats.decodes == 1 and stats.fallbacks == 0
+    print("✅ Single greedy pass used")
+
+
+def test_poor_greedy_result_falls_back_to_beam():
+    print("\n🧪 Testing beam fallback...")
+    model = FakeModel(greedy_logprob=-2.0)
+    stats = FallbackStats()
+    segments, info, used_fallback = transcribe_with_profile(
+        model, "a.wav", "latency", stats=stats, language="en"
+    )
+
+    assert used_fallback
+    assert [call["beam_size"] for call in model.calls] == [1, 5]
+    assert all(call["language"] == "en" for call in model.calls)
+    assert segments[0].text == " hello there"
+    assert stats.fallbacks == 1
+    assert stats.fallback_rate == 1.0
+    print(f"✅ Fallback fired: {stats.summary()}")
+
+
+def test_accuracy_profile_never_falls_back():
+    print("\n🧪 Testing accuracy profile...")
+    model = FakeModel()
+    model.transcribe = lambda audio, **options: (iter([Segment("x", -3.0, 1.0)]), None)
+    segments, info, used_fallback = transcribe_with_profile(model, "a.wav", "accuracy")
+    assert not used_fallback
+    print("✅ Accuracy profile decodes once")
+
+
+if __name__ == "__main__":
+    test_profiles_are_complete()
+    test_needs_fallback_thresholds()
+    test_confident_greedy_result_skips_fallback()
+    test_poor_greedy_result_falls_back_to_beam()
+    test_accuracy_profile_never_falls_back()
+    print("\n🎉 All decoding profile tests passed!")
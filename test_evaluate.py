@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the evaluation harness: edit distance, WER/CER, corpus loading and the Pareto frontier.
+"""
+
+import os
+import random
+import tempfile
+import time
+import wave
+from collections import namedtuple
+
+import numpy as np
+
+from evaluate import (
+    cer,
+    edit_distance,
+    evaluate_config,
+    load_corpus,
+    normalize_text,
+    pareto_frontier,
+    wer,
+    write_report,
+)
+
+Segment = namedtuple("Segment", ["text", "avg_logprob", "compression_ratio"])
+
+
+def reference_distance(a, b):
+    """Plain dynamic-programming Levenshtein distance for cross-checking."""
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+def test_edit_distance_matches_dynamic_programming():
+    print("🧪 Testing bit-parallel edit distance...")
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("", "abc") == 3
+    assert edit_distance(["a", "b"], []) == 2
+
+    rng = random.Random(42)
+    for _ in range(300):
+        a = [rng.choice("abcd") for _ in range(rng.randint(0, 90))]
+        b = [rng.choice("abcd") for _ in range(rng.randint(0, 90))]
+        assert edit_distance(a, b) == reference_distance(a, b), (a, b)
+    print("✅ Matches the DP reference on 300 random pairs")
+
+
+def test_edit_distance_is_fast_on_long_inputs():
+    print("\n🧪 Testing edit distance speed...")
+    rng = random.Random(1)
+    a = "".join(rng.choice("abcdefgh ") for _ in range(5000))
+    b = "".join(rng.choice("abcdefgh ") for _ in range(5000))
+    start = time.perf_counter()
+    edit_distance(a, b)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.0
+    print(f"✅ 5000 x 5000 characters in {elapsed * 1000:.1f}ms")
+
+
+def test_wer_and_cer():
+    print("\n🧪 Testing WER/CER...")
+    assert normalize_text("Hello, World!  It's me.") == "hello world it's me"
+    assert wer("the cat sat", "the cat sat") == 0.0
+    assert wer("the cat sat", "the bat sat down") == 2 / 3
+    assert cer("abc", "abd") == 1 / 3
+    assert wer("", "") == 0.0
+    print("✅ Error rates computed on normalized text")
+
+
+def test_pareto_frontier():
+    print("\n🧪 Testing Pareto frontier...")
+    results = [
+        {"name": "tiny", "wer": 0.20, "latency_p50": 0.1},
+        {"name": "base", "wer": 0.12, "latency_p50": 0.2},
+        {"name": "slow-bad", "wer": 0.15, "latency_p50": 0.5},
+        {"name": "small", "wer": 0.08, "latency_p50": 0.4},
+    ]
+    assert [r["name"] for r in pareto_frontier(results)] == ["tiny", "base", "small"]
+    print("✅ Dominated configurations are excluded")
+
+
+def test_corpus_and_config_evaluation():
+    print("\n🧪 Testing corpus loading and evaluation with a fake model...")
+
+    class FakeModel:
+        def transcribe(self, audio, **options):
+            return iter([Segment(" hello world", -0.2, 1.0)]), None
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, text in [("a", "Hello world."), ("b", "Goodbye world")]:
+            with wave.open(os.path.join(directory, name + ".wav"), "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(16000)
+                wf.writeframes(np.zeros(8000, dtype=np.int16).tobytes())
+            with open(os.path.join(directory, name + ".txt"), "w") as f:
+                f.write(text)
+        corpus = load_corpus(directory)
+
+    assert len(corpus) == 2
+    result = evaluate_config(FakeModel(), {"name": "fake", "model": "x", "profile": "latency"}, corpus)
+    assert result["wer"] == 0.25  # one substitution in four reference words
+    assert result["utterances"][0]["wer"] == 0.0
+    print(f"✅ Corpus WER {result['wer']:.0%}")
+
+
+def test_failed_configuration_in_report():
+    print("\n🧪 Testing that failed configurations are marked in the report...")
+    results = [{"name": "base-latency", "wer": 0.1, "cer": 0.05, "rtf": 8.0,
+                "latency_p50": 0.2, "latency_p95": 0.3}]
+    failed = [{"name": "large-latency", "config": {}, "error": "out of memory"}]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "report.md")
+        json_path = write_report(results, pareto_frontier(results), path, 2, failed)
+        with open(path, encoding="utf-8") as f:
+            report = f.read()
+        with open(json_path, encoding="utf-8") as f:
+            details = f.read()
+    assert "| large-latency | ❌ FAILED: out of memory |" in report
+    assert "large-latency" not in report.split("## Pareto frontier")[1]
+    assert '"failed"' in details
+    print("✅ Failures are listed as such, outside the frontier")
+
+
+if __name__ == "__main__":
+    test_edit_distance_matches_dynamic_programming()
+    test_edit_distance_is_fast_on_long_inputs()
+    test_wer_and_cer()
+    test_pareto_frontier()
+    test_corpus_and_config_evaluation()
+    test_failed_configuration_in_report()
+    print("\n🎉 All evaluation tests passed!")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental log-mel features and their hand-off to the model.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+from faster_whisper.feature_extractor import FeatureExtractor
+
+from endpointer import Endpointer
+from incremental_features import (
+    FeatureStats,
+    IncrementalLogMel,
+    attach_precomputed_features,
+)
+
+FRAME = 480  # 30 ms at 16 kHz
+
+
+def stream(pcm, n_mels=80, frame=FRAME, stats=None):
+    mel = IncrementalLogMel(n_mels, stats=stats)
+    for offset in range(0, len(pcm), frame):
+        mel.push(pcm[offset:offset + frame].tobytes())
+    return mel
+
+
+def test_matches_full_feature_extraction():
+    print("🧪 Testing incremental features against FeatureExtractor...")
+    rng = np.random.default_rng(0)
+    for samples in (150, 400, 1440, 16000 * 3 + 7, 16000 * 12):
+        for n_mels in (80, 128):
+            pcm = (rng.standard_normal(samples) * 3000).astype(np.int16)
+            audio, features = stream(pcm, n_mels).finalize()
+            reference = FeatureExtractor(feature_size=n_mels)(pcm.astype(np.float32) / 32768.0)
+            assert features.shape == reference.shape, (samples, n_mels)
+            assert np.allclose(features, reference, atol=1e-5), (samples, n_mels)
+            assert np.array_equal(audio, pcm.astype(np.float32) / 32768.0)
+    print("✅ Features identical for short, long and odd-length utterances")
+
+
+def test_endpoint_work_is_small():
+    print("\n🧪 Testing endpoint cost...")
+    stats = FeatureStats()
+    pcm = (np.random.default_rng(1).standard_normal(16000 * 10) * 3000).astype(np.int16)
+    mel = stream(pcm, stats=stats)
+    assert mel._frames >= 998, "All but the padded tail frames are done during capture"
+    mel.finalize()
+    assert stats.utterances == 1 and stats.finalize_time < stats.push_time
+    print(f"✅ {stats.summary()}")
+
+
+def test_model_receives_precomputed_features():
+    print("\n🧪 Testing hand-off through model.feature_extractor...")
+    extractor = FeatureExtractor()
+    seen = []
+
+    class FakeModel:
+        feature_extractor = extractor
+
+        def transcribe(self, audio, **options):
+            seen.append(self.feature_extractor(audio))
+            return iter([]), SimpleNamespace(language="en")
+
+    model = FakeModel()
+    hook = attach_precomputed_features(model)
+    assert attach_precomputed_features(model) is hook, "Attaching twice keeps one wrapper"
+    assert hook.n_samples == extractor.n_samples, "Attributes pass through"
+
+    pcm = (np.random.default_rng(2).standard_normal(16000) * 3000).astype(np.int16)
+    audio, features = stream(pcm).finalize()
+    with hook.provide(audio, features):
+        model.transcribe(audio)
+        model.transcribe(audio.copy())  # Different array: computed normally
+    model.transcribe(audio)  # Outside provide(): computed normally
+
+    assert seen[0] is features
+    assert seen[1] is not features and np.allclose(seen[1], features, atol=1e-5)
+    assert seen[2] is not features
+    assert (hook.hits, hook.misses) == (1, 1)
+    print("✅ Precomputed features used only for their own audio")
+
+
+def test_batched_clips_receive_precomputed_features():
+    print("\n🧪 Testing hand-off to the clips of a batched decode...")
+    from batch_decoder import sample_time
+
+    hook = attach_precomputed_features(SimpleNamespace(feature_extractor=FeatureExtractor()))
+    rng = np.random.default_rng(3)
+    pairs = [stream((rng.standard_normal(n) * 3000).astype(np.int16)).finalize()
+             for n in (16000 + 1001, 24000, 8000 + 3)]
+    concatenated = np.concatenate([audio for audio, _ in pairs])
+    offsets = np.concatenate(([0], np.cumsum([len(audio) for audio, _ in pairs])))
+
+    seen = []
+    with hook.provide_many(pairs):
+        # What BatchedInferencePipeline does with clip_timestamps given in seconds
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            chunk = concatenated[int(sample_time(start) * 16000):int(sample_time(end) * 16000)]
+            seen.append(hook(chunk))
+        hook(concatenated[:8000])  # Not one of the clips
+    assert all(features is pair[1] for features, pair in zip(seen, pairs))
+    assert (hook.hits, hook.misses) == (3, 1)
+    print("✅ Each clip sliced from the batch gets its own precomputed features")
+
+
+def test_endpointer_attaches_features():
+    print("\n🧪 Testing features on endpointed utterances...")
+    endpointer = Endpointer(silence_sec=0.09, features=IncrementalLogMel)
+    loud = (np.random.default_rng(3).standard_normal(FRAME) * 3000).astype(np.int16).tobytes()
+    quiet = bytes(FRAME * 2)
+    utterance = None
+    for frame, speech in [(loud, True)] * 20 + [(quiet, False)] * 3:
+        utterance = endpointer.push(frame, speech) or utterance
+    audio, features = utterance.features
+    assert len(audio) == 20 * FRAME
+    assert features.shape == (80, 20 * FRAME // 160 + 1)
+    print("✅ Utterance carries its audio and log-mel features")
+
+
+if __name__ == "__main__":
+    test_matches_full_feature_extraction()
+    test_endpoint_work_is_small()
+    test_model_receives_precomputed_features()
+    test_batched_clips_receive_precomputed_features()
+    test_endpointer_attaches_features()
+    print("\n🎉 All incremental feature tests passed!")
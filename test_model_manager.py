@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for idle model eviction and background preload, using a fake model.
+"""
+
+import threading
+import time
+
+from model_manager import ModelManager
+
+
+class FakeModel:
+    def __init__(self):
+        self.transcribe_calls = 0
+
+    def transcribe(self, audio, **options):
+        self.transcribe_calls += 1
+        return iter([]), None
+
+
+def make_loader(delay=0.0):
+    loaded = []
+
+    def loader():
+        time.sleep(delay)
+        model = FakeModel()
+        loaded.append(model)
+        return model
+
+    return loader, loaded
+
+
+def test_load_includes_warmup():
+    print("🧪 Testing startup load with warm-up...")
+    loader, loaded = make_loader()
+    manager = ModelManager(loader, idle_unload_sec=0)
+    model = manager.load()
+    assert model.transcribe_calls == 1, "Warm-up decode should run once"
+    assert manager.load() is model
+    assert len(loaded) == 1
+    print("✅ Model loaded once and warmed up")
+
+
+def test_idle_unload_and_reload_on_use():
+    print("\n🧪 Testing idle eviction...")
+    loader, loaded = make_loader()
+    manager = ModelManager(loader, idle_unload_sec=0.1, warmup=False)
+    manager.load()
+
+    deadline = time.monotonic() + 2.0
+    while manager.loaded and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert not manager.loaded, "Model should unload after the idle period"
+    assert manager.unloads == 1
+
+    with manager.use() as model:
+        assert model is loaded[-1]
+    assert len(loaded) == 2
+    manager.close()
+    print(f"✅ {manager.summary()}")
+
+
+def test_model_not_evicted_while_in_use():
+    print("\n🧪 Testing eviction during a decode...")
+    loader, _ = make_loader()
+    manager = ModelManager(loader, idle_unload_sec=0.05, warmup=False)
+    manager.load()
+    with manager.use():
+        time.sleep(0.2)
+        assert manager.loaded, "A running decode must keep the model resident"
+    manager.close()
+    print("✅ In-use model is never unloaded")
+
+
+def test_preload_runs_in_background():
+    print("\n🧪 Testing background preload...")
+    loader, loaded = make_loader(delay=0.2)
+    manager = ModelManager(loader, idle_unload_sec=0, warmup=False)
+
+    start = time.perf_counter()
+    assert manager.preload()
+    assert time.perf_counter() - start < 0.1, "preload() must not block"
+    assert not manager.preload(), "Second preload while loading is a no-op"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.load())) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loaded) == 1 and all(model is loaded[0] for model in results)
+    print("✅ Concurrent callers share a single background load")
+
+
+def test_load_failure_is_reported():
+    print("\n🧪 Testing load failure...")
+
+    def broken_loader():
+        raise OSError("no weights")
+
+    manager = ModelManager(broken_loader, idle_unload_sec=0)
+    try:
+        with manager.use():
+            assert False, "use() should raise"
+    except RuntimeError as e:
+        assert "no weights" in str(e)
+    print("✅ Load errors surface to the caller")
+
+
+if __name__ == "__main__":
+    test_load_includes_warmup()
+    test_idle_unload_and_reload_on_use()
+    test_model_not_evicted_while_in_use()
+    test_preload_runs_in_background()
+    test_load_failure_is_reported()
+    print("\n🎉 All model manager tests passed!")
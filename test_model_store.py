@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for the versioned local model store and its loader.
+Real conversions need transformers and model downloads and are not exercised here;
+a stand-in model class records how load_model() calls it.
+"""
+
+import contextlib
+import io
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from model_store import CT2_DTYPES, ModelStore, load_model, page_in, stored_quantization
+
+
+def ct2_model_bin(path, weight="int8", other="float32", size=3 * 1024 * 1024, seed=0):
+    """A model.bin in CTranslate2's format: one quantized matrix, its scale and a bias."""
+    def string(text):
+        data = text.encode("utf-8") + b"\0"
+        return struct.pack("<H", len(data)) + data
+
+    def variable(name, shape, dtype, payload):
+        return (string(name) + struct.pack("<B", len(shape)) + struct.pack(f"<{len(shape)}I", *shape)
+                + struct.pack("<BI", CT2_DTYPES.index(dtype), len(payload)) + payload)
+
+    rng = np.random.default_rng(seed)
+    rows = size // 1024
+    with open(path, "wb") as f:
+        f.write(struct.pack("<I", 6) + string("WhisperSpec") + struct.pack("<II", 3, 3))
+        f.write(variable("decoder/layer_0/ffn/linear_0/weight", (rows, 1024), weight,
+                         rng.integers(0, 255, rows * 1024, dtype=np.uint8).tobytes()))
+        f.write(variable("decoder/layer_0/ffn/linear_0/weight_scale", (rows,), "float32",
+                         bytes(4 * rows)))
+        f.write(variable("decoder/layer_0/ffn/linear_0/bias", (rows,), other,
+                         bytes(2 * rows if other != "float32" else 4 * rows)))
+        f.write(struct.pack("<I", 0))  # Aliases
+
+
+def converted_model(directory, size=3 * 1024 * 1024, seed=0, weight="int8", other="float32"):
+    """Directory laid out like a CTranslate2 Whisper conversion."""
+    os.makedirs(directory, exist_ok=True)
+    ct2_model_bin(os.path.join(directory, "model.bin"), weight, other, size, seed)
+    for name, content in (("config.json", {"suppress_ids": []}), ("tokenizer.json", {"model": {}}),
+                          ("preprocessor_config.json", {"feature_size": 80})):
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            json.dump(content, f)
+    return directory
+
+
+class RecordingModel:
+    def __init__(self, path, **kwargs):
+        self.path = path
+        self.kwargs = kwargs
+
+
+def test_import_versions_and_verify():
+    print("🧪 Testing imports, versions and checksums...")
+    with tempfile.TemporaryDirectory() as root:
+        store = ModelStore(os.path.join(root, "models"))
+        source = converted_model(os.path.join(root, "ct2"))
+        assert store.import_ct2("small", source) == "v1"
+        assert store.current("small") == "v1" and store.names() == ["small"]
+        manifest = store.manifest("small")
+        assert set(manifest["files"]) == {"model.bin", "config.json", "tokenizer.json",
+                                          "preprocessor_config.json"}
+        assert manifest["quantization"] == "int8" and store.verify("small") == []
+
+        converted_model(source, seed=1)
+        assert store.import_ct2("small", source) == "v2"
+        assert store.current("small") == "v2" and store.versions("small") == ["v1", "v2"]
+        assert store.model_id("small") == "small@v2:int8" and store.model_id("tiny") == "tiny"
+
+        weights = os.path.join(store.path("small"), "model.bin")
+        with open(weights, "r+b") as f:
+            f.seek(1000)
+            f.write(b"\x00\x01\x02")
+        assert store.verify("small") == ["model.bin: checksum mismatch"]
+        assert store.verify("small", full=False) == [], "Quick check only compares sizes"
+        with open(weights, "ab") as f:
+            f.write(b"x")
+        assert "size" in store.verify("small", full=False)[0]
+        assert store.verify("small", "v1") == []
+
+        store.set_current("small", "v1")
+        assert store.prune("small", keep=0) == ["v2"], "CURRENT is never pruned"
+        assert store.versions("small") == ["v1"]
+    print("✅ Versions are published with checksums; corruption is reported")
+
+
+def test_failed_import_keeps_current():
+    print("\n🧪 Testing that a failed import changes nothing...")
+    with tempfile.TemporaryDirectory() as root:
+        store = ModelStore(os.path.join(root, "models"))
+        store.import_ct2("base", converted_model(os.path.join(root, "good")))
+        broken = os.path.join(root, "broken")
+        os.makedirs(broken)
+        with open(os.path.join(broken, "config.json"), "w") as f:
+            f.write("{}")
+        try:
+            store.import_ct2("base", broken)
+            raise AssertionError("An import without model.bin must fail")
+        except ValueError:
+            pass
+        assert store.versions("base") == ["v1"] and store.current("base") == "v1"
+        assert sorted(os.listdir(os.path.join(root, "models", "base"))) == ["CURRENT", "v1"]
+    print("✅ No staging leftovers, previous version still current")
+
+
+def test_load_model_prefers_store():
+    print("\n🧪 Testing load_model resolution and load report...")
+    with tempfile.TemporaryDirectory() as root:
+        store = ModelStore(os.path.join(root, "models"))
+        store.import_ct2("small", converted_model(os.path.join(root, "ct2")))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            model = load_model("small", "cpu", "int8", store, factory=RecordingModel, cpu_threads=2)
+            fallback = load_model("tiny", "cpu", "int8", store, factory=RecordingModel)
+            load_model("small", "cuda", "float16", store, factory=RecordingModel)
+        log = output.getvalue()
+
+        assert model.path == store.path("small")
+        assert model.kwargs == {"device": "cpu", "compute_type": "int8", "local_files_only": True,
+                                "cpu_threads": 2}
+        report = model.load_report
+        assert report.version == "v1" and report.quantization == "int8"
+        assert report.page_in_time > 0 and report.load_time >= 0
+        assert fallback.path == "tiny" and "local_files_only" not in fallback.kwargs
+        assert fallback.load_report.version is None
+        assert "loaded from the model store" in log and "download cache" in log
+        assert "stored as int8; it is converted to float16" in log
+        weights = os.path.join(store.path("small"), "model.bin")
+        assert page_in([weights]) == os.path.getsize(weights)
+    print("✅ Stored models load locally with page-in and load times reported")
+
+
+def test_import_records_stored_quantization():
+    print("\n🧪 Testing that an import records the weight type actually stored...")
+    with tempfile.TemporaryDirectory() as root:
+        store = ModelStore(os.path.join(root, "models"))
+        store.import_ct2("small", converted_model(os.path.join(root, "f16"), weight="float16",
+                                                  other="float16"))
+        assert store.model_id("small") == "small@v1:float16", store.model_id("small")
+        store.import_ct2("small", converted_model(os.path.join(root, "i8f16"), other="float16"))
+        assert store.model_id("small") == "small@v2:int8_float16"
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            store.set_current("small", "v1")
+            load_model("small", "cpu", "int8", store, factory=RecordingModel)
+        assert "stored as float16; it is converted to int8" in output.getvalue()
+
+        unknown = os.path.join(root, "unknown.bin")
+        with open(unknown, "wb") as f:
+            f.write(os.urandom(4096))
+        assert stored_quantization(unknown) is None
+        assert stored_quantization(os.path.join(root, "missing.bin")) is None
+    print("✅ Manifest, model id and conversion warning follow model.bin")
+
+
+if __name__ == "__main__":
+    test_import_versions_and_verify()
+    test_failed_import_keeps_current()
+    test_load_model_prefers_store()
+    test_import_records_stored_quantization()
+    print("\n🎉 All model store tests passed!")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared-memory ring and the process decode pool (fake decoder workers).
+"""
+
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from decode_scheduler import DecodeCancelled
+from decoding_profiles import FallbackStats
+from multiprocess_pipeline import HEADER_BYTES, ProcessDecodePool, SharedPcmRing, _Worker
+
+
+def test_ring_allocates_releases_and_wraps():
+    print("🧪 Testing shared ring allocation...")
+    ring = SharedPcmRing(1000)
+    try:
+        a = ring.write(b"a" * 400)
+        b = ring.write(b"b" * 400)
+        assert (a, b) == (0, 400)
+        assert ring.write(b"c" * 400, timeout=0) is None, "Ring should be full"
+
+        ring.release(a)
+        c = ring.write(b"c" * 300, timeout=0)
+        assert c == 0, "Allocation should wrap to the freed start"
+        start = HEADER_BYTES + c
+        assert bytes(ring.shm.buf[start:start + 300]) == b"c" * 300
+        assert bytes(ring.shm.buf[HEADER_BYTES + b:HEADER_BYTES + b + 400]) == b"b" * 400
+    finally:
+        ring.close()
+    print("✅ Allocations wrap and never overwrite live data")
+
+
+def test_ring_releases_out_of_order():
+    print("\n🧪 Testing out-of-order release...")
+    ring = SharedPcmRing(900)
+    try:
+        offsets = [ring.write(bytes(300)) for _ in range(3)]
+        ring.release(offsets[1])
+        assert ring.write(bytes(300), timeout=0) is None, "Middle slot is not reusable yet"
+        ring.release(offsets[0])
+        assert ring.write(bytes(600), timeout=0) == 0
+
+        # A blocked writer wakes once space is released
+        result = []
+        writer = threading.Thread(target=lambda: result.append(ring.write(bytes(300), timeout=2)))
+        writer.start()
+        time.sleep(0.05)
+        ring.release(offsets[2])
+        writer.join()
+        assert result == [600]
+    finally:
+        ring.close()
+    print("✅ Space is reclaimed in order and waiting writers resume")
+
+
+def test_pool_round_trip_and_cancel():
+    print("\n🧪 Testing worker process round trip...")
+    pool = ProcessDecodePool(workers=2, ring_mb=1, fake=True)
+    try:
+        assert pool.wait_ready(timeout=30), "Workers did not start"
+        pcm = (np.ones(16000, dtype=np.int16) * 1000).tobytes()
+        stats = FallbackStats()
+
+        segments, info, used_fallback, decode_time = pool.transcribe(pcm, "latency", stats=stats)
+        assert segments[0].text == " fake transcription"
+        assert info.language == "en"
+        assert not used_fallback and decode_time > 0
+        assert stats.decodes == 1
+
+        # 30 s of audio costs the fake decoder ~4.5 s; cancel after a moment
+        long_pcm = bytes(16000 * 2 * 30)
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        start = time.perf_counter()
+        try:
+            pool.transcribe(long_pcm, "latency", cancel_event=cancel)
+            assert False, "Cancelled decode should raise"
+        except DecodeCancelled:
+            pass
+        assert time.perf_counter() - start < 2, "Worker should stop between segments"
+    finally:
+        pool.close()
+    print("✅ Decodes run in worker processes and stop on cancel")
+
+
+def test_pool_skips_dead_workers_and_frees_failed_jobs():
+    print("\n🧪 Testing dead workers and failed sends...")
+    pool = ProcessDecodePool(workers=2, ring_mb=1, fake=True)
+    try:
+        assert pool.wait_ready(timeout=30), "Workers did not start"
+        pcm = (np.ones(1600, dtype=np.int16) * 1000).tobytes()
+        pool._workers[0].process.kill()
+        pool._workers[0].process.wait()
+        for _ in range(3):
+            segments, _, _, _ = pool.transcribe(pcm, "latency")
+            assert segments[0].text == " fake transcription"
+
+        class BrokenPipe:
+            def write(self, data):
+                raise BrokenPipeError("worker gone")
+
+        live = pool._workers[1]
+        stdin, live.process.stdin = live.process.stdin, BrokenPipe()
+        try:
+            pool.transcribe(pcm, "latency")
+            assert False, "A failed send should raise"
+        except RuntimeError:
+            pass
+        live.process.stdin = stdin
+        assert pool._pending == {} and live.outstanding == 0
+        assert not pool.ring._live, "Ring space of the unsent job was not released"
+
+        live.process.kill()
+        live.process.wait()
+        try:
+            pool.transcribe(pcm, "latency")
+            assert False, "No running worker should raise"
+        except RuntimeError as e:
+            assert "No decode worker" in str(e)
+        assert not pool.ring._live
+    finally:
+        pool.close()
+    print("✅ Jobs go to running workers only; failures leak no ring space")
+
+
+def test_invalid_worker_output_fails_its_jobs():
+    print("\n🧪 Testing a worker that writes a non-JSON line...")
+    pool = ProcessDecodePool(workers=1, ring_mb=1, fake=True)
+    try:
+        assert pool.wait_ready(timeout=30), "Workers did not start"
+        garbled = subprocess.Popen([sys.executable, "-c", "import time; print('not json', flush=True); "
+                                    "time.sleep(60)"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   text=True, bufsize=1)
+        worker = _Worker(5, garbled)
+        worker.ready.set()
+        running, pool._workers = pool._workers, [worker]
+        pcm = (np.ones(1600, dtype=np.int16) * 1000).tobytes()
+        threading.Thread(target=pool._read_results, args=(worker,), daemon=True).start()
+        start = time.perf_counter()
+        try:
+            pool.transcribe(pcm, "latency")
+            assert False, "A job on a garbled worker should fail"
+        except RuntimeError as e:
+            assert "exited" in str(e), e
+        assert time.perf_counter() - start < 10, "transcribe() waited for a result that never comes"
+        assert garbled.poll() is not None, "The garbled worker was not stopped"
+        assert pool._pending == {} and not pool.ring._live
+        pool._workers = running + pool._workers
+    finally:
+        pool.close()
+    print("✅ The reader survives bad output, fails the worker's jobs and stops it")
+
+
+if __name__ == "__main__":
+    test_ring_allocates_releases_and_wraps()
+    test_ring_releases_out_of_order()
+    test_pool_round_trip_and_cancel()
+    test_pool_skips_dead_workers_and_frees_failed_jobs()
+    test_invalid_worker_output_fails_its_jobs()
+    print("\n🎉 All multiprocess pipeline tests passed!")
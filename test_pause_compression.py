@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for silence trimming, pause compression and the timestamp map.
+"""
+
+import numpy as np
+
+from pause_compression import TimeMap, compress_pauses
+
+SAMPLE_RATE = 16000
+
+
+def make_dictation(pattern, amplitude=4000):
+    """Build int16 audio from (seconds, speech) pairs; speech is a noisy tone over room noise.
+
+    `speech` may also be a level relative to `amplitude`, e.g. 0.25 for a softer phrase.
+    """
+    rng = np.random.default_rng(0)
+    parts = []
+    for seconds, speech in pattern:
+        n = int(seconds * SAMPLE_RATE)
+        audio = rng.normal(0, 20, n)
+        if speech:
+            t = np.arange(n) / SAMPLE_RATE
+            audio += amplitude * float(speech) * np.sin(2 * np.pi * 220 * t)
+        parts.append(audio)
+    return np.concatenate(parts).astype(np.int16)
+
+
+def test_trim_and_compress_hotkey_dictation():
+    print("🧪 Testing trim and pause compression on a hotkey dictation...")
+    # Pressed the hotkey, paused, spoke, thought for a while, spoke, waited for the timeout
+    samples = make_dictation([(1.2, False), (2.0, True), (2.5, False), (1.5, True), (2.8, False)])
+    compressed, time_map = compress_pauses(samples)
+
+    # 0.2s margins either side and a 0.6s pause remain around 3.5s of speech
+    expected = 0.2 + 2.0 + 0.6 + 1.5 + 0.2
+    assert abs(len(compressed) / SAMPLE_RATE - expected) < 0.07, len(compressed) / SAMPLE_RATE
+    assert abs(time_map.removed_sec - (10.0 - expected)) < 0.07
+    share = time_map.removed_sec / 10.0
+    print(f"✅ {time_map.removed_sec:.1f}s of 10.0s removed ({share:.0%} less audio to encode)")
+
+
+def test_time_map_round_trip():
+    print("\n🧪 Testing timestamp mapping back to original time...")
+    samples = make_dictation([(1.2, False), (2.0, True), (2.5, False), (1.5, True), (2.8, False)])
+    compressed, time_map = compress_pauses(samples)
+
+    # Speech onsets in the compressed audio map back to where they were spoken
+    second_onset = 0.2 + 2.0 + 0.6  # margin + first phrase + the kept pause
+    assert abs(time_map.to_original(0.2) - 1.2) < 0.04
+    assert abs(time_map.to_original(second_onset) - 5.7) < 0.04
+
+    # Every kept sample maps to an identical original sample
+    positions = np.arange(0, len(compressed), 997)
+    originals = np.round(time_map.to_original(positions / SAMPLE_RATE) * SAMPLE_RATE).astype(int)
+    assert np.array_equal(compressed[positions], samples[originals])
+
+    # At a cut, an end stays in the earlier span and a start moves to the later one
+    cut = time_map.compressed_starts[1] / SAMPLE_RATE
+    assert time_map.to_original(cut, end=True) < time_map.to_original(cut)
+    print("✅ Compressed timestamps convert back to the original buffer")
+
+
+def test_speech_only_buffer_is_untouched():
+    print("\n🧪 Testing small savings leave the buffer alone...")
+    samples = make_dictation([(0.1, False), (3.0, True), (0.1, False)])
+    compressed, time_map = compress_pauses(samples)
+    assert compressed is samples and time_map.removed_sec == 0
+    assert time_map.to_original(1.5) == 1.5
+    silent = make_dictation([(2.0, False)])
+    assert compress_pauses(silent)[0] is silent, "No speech found: nothing to trim against"
+    assert TimeMap.identity(100).kept_samples == 100
+    print("✅ Buffers with little to cut are returned as they are")
+
+
+def test_soft_speech_is_not_cut():
+    print("\n🧪 Testing a softer phrase is kept...")
+    # Loud phrase, then one 12-20 dB quieter, with no pause: nothing here is silence
+    for level in (0.25, 0.15, 0.1):
+        samples = make_dictation([(2.0, True), (2.0, level)])
+        compressed, time_map = compress_pauses(samples)
+        assert compressed is samples, f"{level}: {len(compressed) / SAMPLE_RATE:.2f}s kept of 4.0s"
+
+    # With pauses around it, the soft phrase is still kept whole
+    samples = make_dictation([(1.2, False), (2.0, True), (0.3, False), (2.0, 0.15), (2.5, False)])
+    compressed, time_map = compress_pauses(samples)
+    expected = 0.2 + 2.0 + 0.3 + 2.0 + 0.2
+    assert abs(len(compressed) / SAMPLE_RATE - expected) < 0.07, len(compressed) / SAMPLE_RATE
+    print("✅ Speech 20 dB below the loudest phrase is not trimmed as a pause")
+
+
+if __name__ == "__main__":
+    test_trim_and_compress_hotkey_dictation()
+    test_time_map_round_trip()
+    test_speech_only_buffer_is_untouched()
+    test_soft_speech_is_not_cut()
+    print("\n🎉 All pause compression tests passed!")
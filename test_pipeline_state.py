@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the event-driven pipeline state machine.
+"""
+
+import threading
+import time
+
+from pipeline_state import PipelineStateMachine, State
+
+
+def test_continuous_transitions():
+    print("🧪 Testing continuous-mode transitions...")
+    machine = PipelineStateMachine()
+    assert machine.state is State.IDLE
+
+    assert not machine.begin_decode(), "Cannot decode while idle"
+    assert machine.wake()
+    assert not machine.wake(), "Second wake is ignored"
+    assert machine.begin_decode()
+    assert machine.state is State.TRANSCRIBING
+    assert machine.sleep()
+    assert machine.state is State.IDLE
+    assert not machine.end_decode(), "Decode finishing after sleep stays idle"
+    print("✅ Only valid transitions are applied")
+
+
+def test_one_time_runs_alongside_continuous():
+    print("\n🧪 Testing one-time dictation state...")
+    machine = PipelineStateMachine()
+    machine.wake()
+    assert machine.begin_one_time()
+    assert not machine.begin_one_time(), "Only one one-time dictation at a time"
+    assert machine.state is State.ONE_TIME
+    assert machine.continuous_state is State.LISTENING
+    assert machine.end_one_time()
+    assert machine.state is State.LISTENING
+    print("✅ One-time mode is tracked independently")
+
+
+def test_waiters_wake_without_polling():
+    print("\n🧪 Testing blocking waits...")
+    machine = PipelineStateMachine()
+    woke_at = []
+
+    def waiter():
+        machine.wait_until_active()
+        woke_at.append(time.perf_counter())
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    assert not woke_at
+
+    fired_at = time.perf_counter()
+    machine.wake()
+    thread.join(timeout=1.0)
+
+    assert woke_at, "Waiter did not wake"
+    latency_ms = (woke_at[0] - fired_at) * 1000
+    assert latency_ms < 50
+    print(f"✅ Waiter woke {latency_ms:.2f}ms after the event")
+
+
+def test_listeners_see_every_transition():
+    print("\n🧪 Testing transition listeners...")
+    machine = PipelineStateMachine()
+    events = []
+    machine.add_listener(lambda event, old, new: events.append((event, old, new)))
+    machine.add_listener(lambda event, old, new: 1 / 0)  # Failing listener must not break others
+
+    machine.wake()
+    machine.sleep()
+    machine.sleep()  # Invalid, not reported
+
+    assert events == [
+        ("wake", State.IDLE, State.LISTENING),
+        ("sleep", State.LISTENING, State.IDLE),
+    ]
+    print("✅ Listeners receive valid transitions only")
+
+
+def test_concurrent_events_are_race_free():
+    print("\n🧪 Testing concurrent wake/sleep storms...")
+    machine = PipelineStateMachine()
+    transitions = []
+    lock = threading.Lock()
+
+    def record(event, old, new):
+        with lock:
+            transitions.append(event)
+
+    machine.add_listener(record)
+
+    def hammer(action):
+        for _ in range(2000):
+            action()
+
+    threads = [threading.Thread(target=hammer, args=(action,))
+               for action in (machine.wake, machine.sleep, machine.wake, machine.sleep)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wakes = transitions.count("wake")
+    sleeps = transitions.count("sleep")
+    expected_sleeps = wakes - (1 if machine.state is State.LISTENING else 0)
+    assert sleeps == expected_sleeps
+    print(f"✅ {wakes} wakes / {sleeps} sleeps stayed consistent")
+
+
+if __name__ == "__main__":
+    test_continuous_transitions()
+    test_one_time_runs_alongside_continuous()
+    test_waiters_wake_without_polling()
+    test_listeners_see_every_transition()
+    test_concurrent_events_are_race_free()
+    print("\n🎉 All pipeline state tests passed!")
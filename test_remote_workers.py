@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for remote workers using local stand-in worker servers.
+"""
+
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from decode_scheduler import DecodeCancelled
+from decoding_profiles import FallbackStats
+from multiprocess_pipeline import FakeDecoder
+from remote_workers import (
+    RemoteDecodeError,
+    RemoteDecodePool,
+    decode_request,
+    encode_request,
+    start_local_worker,
+)
+
+PCM = (np.ones(16000, dtype=np.int16) * 1000).tobytes()
+
+
+class NamedModel:
+    """Returns the worker's name as the text, after an optional delay."""
+
+    def __init__(self, name, delay=0.0):
+        self.name = name
+        self.delay = delay
+
+    def transcribe(self, audio, **options):
+        time.sleep(self.delay)
+        segment = SimpleNamespace(text=" " + self.name, start=0.0, end=len(audio) / 16000,
+                                  avg_logprob=-0.1, compression_ratio=1.0)
+        return iter([segment]), SimpleNamespace(language=options.get("language", "en"),
+                                                language_probability=1.0)
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_request_encoding_round_trip():
+    print("🧪 Testing binary request framing...")
+    header, pcm = decode_request(encode_request(PCM, "latency", {"language": "de"}))
+    assert header == {"profile": "latency", "options": {"language": "de"}}
+    assert pcm.tobytes() == PCM
+    print("✅ PCM travels as raw int16 after a small JSON header")
+
+
+def test_decode_and_connection_reuse():
+    print("\n🧪 Testing remote decode on a stand-in worker...")
+    server, address = start_local_worker(FakeDecoder(0.01))
+    pool = RemoteDecodePool([address], health_interval=0)
+    stats = FallbackStats()
+    for _ in range(3):
+        segments, info, used_fallback, decode_time = pool.transcribe(PCM, "latency", stats=stats)
+    assert segments[0].text == " fake transcription" and info.language == "en"
+    assert stats.decodes == 3
+    assert len(pool._nodes[0].idle) == 1, "One pooled connection serves every request"
+    pool.close()
+    server.shutdown()
+    print(f"✅ {pool.summary()}")
+
+
+def test_least_loaded_worker_is_chosen():
+    print("\n🧪 Testing least-loaded selection...")
+    busy_server, busy = start_local_worker(NamedModel("busy", delay=0.3))
+    idle_server, idle = start_local_worker(NamedModel("idle"))
+    pool = RemoteDecodePool([busy, idle], health_interval=0)
+
+    # Two requests at once: the second must go to the other node
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.transcribe(PCM, "latency")[0][0].text))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [" busy", " idle"], results
+    pool.close()
+    busy_server.shutdown()
+    idle_server.shutdown()
+    print("✅ Concurrent utterances spread across workers")
+
+
+def test_dead_and_slow_workers_raise_for_fallback():
+    print("\n🧪 Testing failover and timeout...")
+    dead = f"127.0.0.1:{unused_port()}"
+    server, alive = start_local_worker(NamedModel("alive"))
+    pool = RemoteDecodePool([dead, alive], health_interval=0)
+    assert pool.healthy_nodes == 1
+    assert pool.transcribe(PCM, "latency")[0][0].text == " alive"
+    pool.close()
+    server.shutdown()
+
+    slow_server, slow = start_local_worker(NamedModel("slow", delay=1.0))
+    pool = RemoteDecodePool([slow], timeout=0.2, health_interval=0)
+    start = time.perf_counter()
+    try:
+        pool.transcribe(PCM, "latency")
+        assert False, "Slow worker should time out"
+    except RemoteDecodeError:
+        pass
+    assert time.perf_counter() - start < 0.5
+    assert pool.healthy_nodes == 0
+    pool.close()
+    slow_server.shutdown()
+    print("✅ Unreachable and slow workers surface RemoteDecodeError quickly")
+
+
+def test_cancel_while_waiting():
+    print("\n🧪 Testing cancellation of a remote decode...")
+    server, address = start_local_worker(NamedModel("slow", delay=1.0))
+    pool = RemoteDecodePool([address], timeout=5, health_interval=0)
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+    start = time.perf_counter()
+    try:
+        pool.transcribe(PCM, "latency", cancel_event=cancel)
+        assert False, "Cancelled decode should raise"
+    except DecodeCancelled:
+        pass
+    assert time.perf_counter() - start < 0.5
+    pool.close()
+    server.shutdown()
+    print("✅ Cancel returns without waiting for the worker")
+
+
+def test_worker_accepts_only_whitelisted_options():
+    print("\n🧪 Testing which decode options a worker accepts...")
+    model = NamedModel("strict")
+    calls = []
+    transcribe = model.transcribe
+    model.transcribe = lambda audio, **options: calls.append(options) or transcribe(audio, **options)
+    server, address = start_local_worker(model)
+    pool = RemoteDecodePool([address], health_interval=0)
+    try:
+        _, info, _, _ = pool.transcribe(PCM, "latency", {"language": "de", "initial_prompt": "Hallo."})
+        assert info.language == "de" and calls[-1]["initial_prompt"] == "Hallo."
+        refused = [("latency", {"beam_size": 500}), ("latency", {"language": ["de"]}),
+                   ("latency", {"vad_parameters": {"threshold": 0}}), ("huge", {})]
+        for profile, options in refused:
+            try:
+                pool.transcribe(PCM, profile, options)
+                assert False, f"{profile} {options} should be refused"
+            except RemoteDecodeError as e:
+                assert "accepted" in str(e) or "must be" in str(e) or "profile" in str(e), e
+        assert len(calls) == 1, "A refused request reached the model"
+    finally:
+        pool.close()
+        server.shutdown()
+    print("✅ Only the profile name, language and prompt are taken from the network")
+
+
+if __name__ == "__main__":
+    test_request_encoding_round_trip()
+    test_decode_and_connection_reuse()
+    test_least_loaded_worker_is_chosen()
+    test_dead_and_slow_workers_raise_for_fallback()
+    test_cancel_while_waiting()
+    test_worker_accepts_only_whitelisted_options()
+    print("\n🎉 All remote worker tests passed!")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming polyphase resampler and frame chunker.
+"""
+
+import numpy as np
+
+from resampler import FrameChunker, PolyphaseResampler, benchmark, design_filter, to_int16
+
+
+def sine(rate, freq, seconds=1.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return np.sin(2 * np.pi * freq * t).astype(np.float32)
+
+
+def test_blockwise_matches_one_shot():
+    print("🧪 Testing block-wise resampling is seamless...")
+    for rate in (44100, 48000):
+        audio = np.random.default_rng(0).standard_normal(rate).astype(np.float32)
+        one_shot = PolyphaseResampler(rate).process(audio)
+        streamed = PolyphaseResampler(rate)
+        block = rate * 30 // 1000
+        pieces = [streamed.process(audio[i:i + block]) for i in range(0, len(audio), block)]
+        assert {len(p) for p in pieces[:-1]} <= {479, 480, 481}, "Full blocks give ~30ms out"
+        joined = np.concatenate(pieces)
+        assert len(joined) == len(one_shot) == 16000
+        assert np.array_equal(joined, one_shot)
+
+        # Same result as zero-stuffing, filtering and decimating directly
+        resampler = PolyphaseResampler(rate)
+        head = audio[:rate // 10]
+        upsampled = np.zeros(len(head) * resampler.up)
+        upsampled[::resampler.up] = head
+        reference = np.convolve(upsampled, design_filter(resampler.up, resampler.down))[::resampler.down]
+        assert np.abs(joined[:1600] - reference[:1600]).max() < 1e-5
+    print("✅ 44.1/48 kHz streamed in 30ms blocks equals the one-shot result")
+
+
+def test_passband_and_aliasing():
+    print("\n🧪 Testing frequency response...")
+    rate = 48000
+    resampler = PolyphaseResampler(rate)
+    tone = resampler.process(sine(rate, 1000))[1000:-1000]
+    assert abs(np.sqrt(2) * tone.std() - 1.0) < 0.01, "1 kHz passes at unity gain"
+
+    # 11 kHz would alias to 5 kHz without the low-pass
+    alias = PolyphaseResampler(rate).process(sine(rate, 11000))[1000:-1000]
+    assert alias.std() < 0.001
+    print("✅ Speech band kept, content above 8 kHz rejected")
+
+
+def test_frame_chunker_and_int16():
+    print("\n🧪 Testing fixed-size frames from variable blocks...")
+    chunker = FrameChunker(512)
+    frames = []
+    for size in (479, 480, 481, 480, 300, 1000):
+        frames += chunker.push(np.arange(size, dtype=np.int16))
+    assert [len(f) for f in frames] == [512] * 6
+    assert len(chunker._pending) == 3220 - 6 * 512
+    assert to_int16(np.array([1.2, -1.2, 0.5])).tolist() == [32767, -32768, 16383]
+    print("✅ Porcupine and VAD get exact frame sizes")
+
+
+def test_benchmark_reports_cost():
+    print("\n🧪 Testing the CPU benchmark...")
+    results = benchmark(rates=(48000,), seconds=2.0)
+    assert results[48000]["produced"] == 66 * 480, "Every full 30ms block yields 480 samples"
+    assert results[48000]["cpu_per_sec"] < 0.1, "Resampling must be a small share of one core"
+    print(f"✅ {results[48000]['cpu_per_sec'] * 1000:.1f}ms CPU per second of 48 kHz audio")
+
+
+if __name__ == "__main__":
+    test_blockwise_matches_one_shot()
+    test_passband_and_aliasing()
+    test_frame_chunker_and_int16()
+    test_benchmark_reports_cost()
+    print("\n🎉 All resampler tests passed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-demand sampling profiler.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from sampling_profiler import SamplingProfiler
+
+
+def busy_decode(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def test_stage_is_noop_when_off():
+    print("🧪 Testing overhead while idle...")
+    profiler = SamplingProfiler()
+    assert profiler.stage("vad") is profiler.stage("decode"), "One shared no-op object"
+    start = time.perf_counter()
+    for _ in range(100_000):
+        with profiler.stage("vad"):
+            pass
+    per_call = (time.perf_counter() - start) / 100_000
+    assert per_call < 5e-6, per_call
+    assert not any(t.name == "profiler" for t in threading.enumerate()), "No sampler thread while off"
+    print(f"✅ {per_call * 1e9:.0f}ns per stage() with profiling off")
+
+
+def test_window_writes_folded_stacks_and_trace():
+    print("\n🧪 Testing a profiling window across threads...")
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = SamplingProfiler(interval=0.002, output_dir=tmp)
+        assert profiler.start(duration=5.0)
+        assert not profiler.start(), "Only one window at a time"
+
+        def decode_worker():
+            with profiler.stage("decode"):
+                busy_decode(0.3)
+
+        worker = threading.Thread(target=decode_worker, name="decode-worker")
+        worker.start()
+        with profiler.stage("vad"):
+            time.sleep(0.1)
+        submitted = time.perf_counter()
+        profiler.span("queue wait", submitted, submitted + 0.05)
+        worker.join()
+        folded, trace = profiler.stop()
+
+        with open(folded, encoding="utf-8") as f:
+            stacks = dict(line.rsplit(" ", 1) for line in f.read().splitlines())
+        decode = [s for s in stacks if s.startswith("decode-worker;[decode];")]
+        assert decode and any("busy_decode" in s for s in decode), list(stacks)[:5]
+        assert sum(int(stacks[s]) for s in decode) > 20
+
+        with open(trace, encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+        spans = {e["name"]: e for e in events if e["ph"] == "X"}
+        assert set(spans) == {"decode", "vad", "queue wait"}
+        assert 250_000 < spans["decode"]["dur"] < 1_000_000
+        assert any(e["ph"] == "M" and e["args"]["name"] == "decode-worker" for e in events)
+        assert any(e["ph"] == "C" for e in events), "Sampler lateness counter"
+        assert not profiler.recording and os.path.dirname(folded) == tmp
+    print(f"✅ {profiler.summary()}")
+
+
+def test_window_closes_on_its_own():
+    print("\n🧪 Testing the window duration...")
+    with tempfile.TemporaryDirectory() as tmp:
+        done = threading.Event()
+        profiler = SamplingProfiler(output_dir=tmp, on_done=lambda *paths: done.set())
+        assert profiler.toggle(duration=0.1)
+        assert done.wait(timeout=2)
+        assert not profiler.recording and all(os.path.exists(p) for p in profiler.last_outputs)
+    print("✅ Files are written when the window ends")
+
+
+if __name__ == "__main__":
+    test_stage_is_noop_when_off()
+    test_window_writes_folded_stacks_and_trace()
+    test_window_closes_on_its_own()
+    print("\n🎉 All profiler tests passed!")
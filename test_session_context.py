@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the session language lock and prompt carry-over.
+"""
+
+from collections import namedtuple
+
+from session_context import SessionContext
+
+Info = namedtuple("Info", ["language", "language_probability"])
+
+
+def test_language_pins_after_confident_detection():
+    print("🧪 Testing language lock...")
+    session = SessionContext()
+    assert "language" not in session.transcribe_options()
+
+    session.update(Info("de", 0.4), "hallo")
+    assert "language" not in session.transcribe_options(), "Low confidence must not pin"
+
+    session.update(Info("en", 0.97), "hello there")
+    assert session.transcribe_options()["language"] == "en"
+
+    session.update(Info("fr", 0.99), "bonjour")
+    assert session.transcribe_options()["language"] == "en", "Pinned language is kept"
+    print("✅ Language pinned on first confident detection")
+
+
+def test_configured_language_skips_detection():
+    print("\n🧪 Testing configured language...")
+    session = SessionContext(language="es", carry_prompt=False)
+    assert session.transcribe_options() == {"language": "es"}
+    session.reset()
+    assert session.language == "es"
+    print("✅ Configured language always used")
+
+
+def test_prompt_is_carried_and_bounded():
+    print("\n🧪 Testing prompt carry-over...")
+    session = SessionContext(prompt_max_chars=30)
+    session.update(None, "Deploy the Kubernetes cluster")
+    assert session.transcribe_options()["initial_prompt"] == "Deploy the Kubernetes cluster"
+
+    session.update(None, "then restart nginx")
+    prompt = session.transcribe_options()["initial_prompt"]
+    assert len(prompt) <= 30
+    assert prompt.endswith("restart nginx")
+    assert not prompt.startswith("ubernetes"), "Prompt keeps whole words"
+
+    session.reset_prompt()
+    assert "initial_prompt" not in session.transcribe_options()
+    print("✅ Prompt carries the recent tail only")
+
+
+def test_summary_reports_latency_gain():
+    print("\n🧪 Testing timing summary...")
+    session = SessionContext(carry_prompt=False)
+    session.update(Info("en", 0.95), "first", decode_time=0.5, audio_seconds=2.0)
+    session.update(None, "second", decode_time=0.3, audio_seconds=2.0)
+    summary = session.summary()
+    assert "detect: 1 decodes, 250ms" in summary
+    assert "locked: 1 decodes, 150ms" in summary
+    assert "lock saves 40%" in summary
+    print(f"✅ {summary}")
+
+
+if __name__ == "__main__":
+    test_language_pins_after_confident_detection()
+    test_configured_language_skips_detection()
+    test_prompt_is_carried_and_bounded()
+    test_summary_reports_latency_gain()
+    print("\n🎉 All session context tests passed!")
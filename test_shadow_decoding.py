@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests for shadow decoding: logging, budget, backlog and preemption.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from decode_scheduler import HOTKEY_PRIORITY, DecodeScheduler
+from model_manager import ModelManager
+from shadow_decoding import SHADOW_KIND, DutyCycleBudget, ShadowDecoder, summarize_log
+
+PCM = (np.ones(16000, dtype=np.int16) * 1000).tobytes()
+
+
+class FakeModel:
+    def __init__(self, text, segments=1, delay=0.0):
+        self.text = text
+        self.segments = segments
+        self.delay = delay
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append((len(audio), options))
+        def generate():
+            for _ in range(self.segments):
+                time.sleep(self.delay)
+                yield SimpleNamespace(text=" " + self.text, avg_logprob=-0.1, compression_ratio=1.0)
+        return generate(), SimpleNamespace(language="en")
+
+
+def make_shadow(tmp, model, **kwargs):
+    scheduler = DecodeScheduler(preemptible_kinds=(SHADOW_KIND,))
+    manager = ModelManager(lambda: model, idle_unload_sec=0, warmup=False)
+    manager.load()
+    shadow = ShadowDecoder(scheduler, manager, "latency", "small/int8/latency",
+                           "medium/int8/latency", log_path=os.path.join(tmp, "shadow.jsonl"),
+                           **kwargs)
+    return scheduler, shadow
+
+
+def test_duty_cycle_budget():
+    print("🧪 Testing duty-cycle budget...")
+    now = [0.0]
+    budget = DutyCycleBudget(max_share=0.25, window_sec=10, clock=lambda: now[0])
+    assert budget.allow()
+    budget.record(3.0)
+    assert not budget.allow(), "30% of the window is over the 25% cap"
+    now[0] = 11.0
+    assert budget.allow(), "Old work leaves the window"
+    print("✅ Shadow work is capped to a share of wall time")
+
+
+def test_shadow_results_are_logged():
+    print("\n🧪 Testing shadow comparison log...")
+    with tempfile.TemporaryDirectory() as tmp:
+        scheduler, shadow = make_shadow(tmp, FakeModel("Hello world."))
+        shadow.submit(PCM, "hello world", 0.2, "en").wait(timeout=2)
+        shadow.submit(PCM, "hello word", 0.2, "en").wait(timeout=2)
+        scheduler.stop()
+        shadow.close()
+
+        with open(os.path.join(tmp, "shadow.jsonl")) as f:
+            records = [json.loads(line) for line in f]
+        assert [r["agree"] for r in records] == [True, False]
+        assert records[1]["word_diff"] == 0.5
+        assert records[0]["shadow"]["config"] == "medium/int8/latency"
+
+        summary, = summarize_log(os.path.join(tmp, "shadow.jsonl"))
+        assert summary["utterances"] == 2 and summary["agreement"] == 0.5
+    print(f"✅ {shadow.summary()}")
+
+
+def test_shadow_decodes_what_the_primary_decoded():
+    print("\n🧪 Testing that the shadow gets the primary's audio and options...")
+    with tempfile.TemporaryDirectory() as tmp:
+        model = FakeModel("hello")
+        scheduler, shadow = make_shadow(tmp, model)
+        compressed = PCM[:16000]  # What pause compression left of the utterance
+        shadow.submit(compressed, "hello", 0.3, "en",
+                      options={"initial_prompt": "Earlier text."}).wait(timeout=2)
+        shadow.submit(compressed, "hello", 0.001, "en", cached=True).wait(timeout=2)
+        scheduler.stop()
+        shadow.close()
+
+        assert model.calls[0][0] == 8000
+        assert model.calls[0][1]["initial_prompt"] == "Earlier text."
+        assert model.calls[0][1]["language"] == "en"
+        assert shadow.compared == 2 and shadow.timed == 1, "Cache hits are not timed"
+        summary, = summarize_log(os.path.join(tmp, "shadow.jsonl"))
+        assert summary["utterances"] == 2 and summary["timed"] == 1
+        assert summary["primary_p50"] == 0.3
+        assert summary["primary_rtf"] == 0.5 / 0.3, "Audio seconds per decode second"
+    print(f"✅ {shadow.summary()}")
+
+
+def test_backlog_and_budget_skip_work():
+    print("\n🧪 Testing backlog and budget limits...")
+    with tempfile.TemporaryDirectory() as tmp:
+        scheduler, shadow = make_shadow(tmp, FakeModel("x", delay=0.05), max_backlog=1)
+        gate = threading.Event()
+        scheduler.submit("hotkey", HOTKEY_PRIORITY, lambda job: gate.wait())
+        time.sleep(0.05)
+        jobs = [shadow.submit(PCM, "x", 0.1) for _ in range(3)]
+        assert jobs[1] is None and jobs[2] is None
+        assert shadow.skipped["backlog"] == 2
+
+        shadow.budget.record(1000.0)  # Exhaust the budget
+        gate.set()
+        jobs[0].wait(timeout=2)
+        assert shadow.skipped["budget"] == 1 and shadow.compared == 0
+        scheduler.stop()
+        shadow.close()
+    print("✅ Extra shadow work is dropped, not queued")
+
+
+def test_primary_job_preempts_shadow():
+    print("\n🧪 Testing preemption by a hotkey job...")
+    with tempfile.TemporaryDirectory() as tmp:
+        model = FakeModel("slow", segments=50, delay=0.02)
+        scheduler, shadow = make_shadow(tmp, model)
+        shadow_job = shadow.submit(PCM, "slow", 0.1)
+        time.sleep(0.1)
+        started = time.perf_counter()
+        hotkey = scheduler.submit("hotkey", HOTKEY_PRIORITY, lambda job: time.perf_counter())
+        ran_at = hotkey.wait(timeout=2)
+        assert shadow_job.done and shadow_job.preempted
+        assert ran_at - started < 0.2, "Hotkey job should wait at most about one segment"
+        assert shadow.preempted == 1 and scheduler.preempted == 1
+        scheduler.stop()
+        shadow.close()
+    print(f"✅ Hotkey job started {(ran_at - started) * 1000:.0f}ms after submission")
+
+
+if __name__ == "__main__":
+    test_duty_cycle_budget()
+    test_shadow_results_are_logged()
+    test_shadow_decodes_what_the_primary_decoded()
+    test_backlog_and_budget_skip_work()
+    test_primary_job_preempts_shadow()
+    print("\n🎉 All shadow decoding tests passed!")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the soak-test driver and its growth-trend checks.
+"""
+
+import json
+import textwrap
+
+from soak_test import Sample, check_trends
+from test_app_startup import run_app
+
+
+def series(hours, rss=lambda h: 80.0, traced=lambda h: 5.0, threads=lambda h: 4,
+           p95=lambda h: 0.5):
+    return [Sample(h, h * 60, rss(h), traced(h), threads(h), 0, 0, int(h * 500), 0.3, p95(h))
+            for h in hours]
+
+
+def test_trend_checks():
+    print("🧪 Testing growth-trend detection...")
+    hours = [i * 0.5 for i in range(1, 49)]
+    assert check_trends(series(hours)) == []
+    # Noise without a trend passes
+    assert check_trends(series(hours, rss=lambda h: 80 + (h * 7 % 3))) == []
+
+    leak = check_trends(series(hours, rss=lambda h: 80 + 5 * h, traced=lambda h: 5 + h))
+    assert any("RSS grows 5.00 MB/hour" in f for f in leak), leak
+    assert any("Python heap" in f for f in leak), leak
+    threads = check_trends(series(hours, threads=lambda h: 4 + int(h)))
+    assert any("Threads grew" in f for f in threads), threads
+    drift = check_trends(series(hours, p95=lambda h: 0.5 + 0.1 * h))
+    assert any("latency p95 drifted" in f for f in drift), drift
+    assert check_trends(series(hours[:2])) == ["too few samples after warm-up for a trend"]
+    print("✅ Memory, thread and latency growth are reported")
+
+
+# Runs in a child process with the app's audio and keyboard libraries stubbed
+SOAK_SCRIPT = textwrap.dedent("""
+    import json
+    import tempfile
+    import threading
+    import tracemalloc
+    from functools import partial
+    from soak_test import AppSoak, check_trends, fake_model, run_soak, synthetic_tape
+
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory() as workdir:
+        soak = AppSoak(workdir, partial(fake_model, 0.1), hotkey_sec=2.0, profile_sec=20.0,
+                       archive_mb=1, batch_size=4)
+        app = soak.app
+        before = threading.active_count()
+        samples = run_soak(soak, synthetic_tape(minutes=0.5), hours=0.1, sample_min=1.0,
+                           hotkey_every_min=0.5, sleep_every_min=2.0, profile_every_min=2.0)
+        journaled = app.journal.stats()["entries"]
+        soak.close()
+
+    report = {
+        "samples": len(samples), "decodes": soak.decodes, "errors": soak.errors,
+        "threads": samples[-1].threads, "before": before, "traced_mb": samples[-1].traced_mb,
+        "journaled": journaled, "profiles": app.profiler.last_outputs is not None,
+        "hotkey_decodes": app.scheduler.queue_wait["hotkey"][0], "batches": app.decode_batches,
+        "captured_min": max(app.stream_health.captured.values()) / 60,
+        "gaps": sum(app.stream_health.counts.values()),
+        # A 6-minute run is too short for memory slopes, and with a near-free decoder the
+        # latencies are scheduling noise, so only thread growth is judged here
+        "failures": check_trends(samples, max_rss_mb_per_hour=1000, max_traced_mb_per_hour=1000,
+                                 max_latency_ratio=1000),
+        "wall_sec": samples[-1].wall_sec,
+    }
+    print("SOAK " + json.dumps(report))
+""")
+
+
+def test_short_soak_is_healthy():
+    print("\n🧪 Testing a short soak run of the app...")
+    output = run_app(SOAK_SCRIPT, "SOAK ")
+    report = json.loads(output.split("SOAK ", 1)[1])
+
+    assert report["samples"] == 6
+    assert report["decodes"] > 20 and report["errors"] == 0, report
+    assert report["hotkey_decodes"] > 0, "Hotkey dictations go through on_hotkey_pressed"
+    assert report["batches"] > 0, "Queued utterances are batched through batched_results"
+    assert report["journaled"] > 0 and report["profiles"], report
+    assert abs(report["captured_min"] - 6.0) < 0.1 and report["gaps"] == 0, report
+    assert report["threads"] <= report["before"] + 1, "Hotkey threads must not accumulate"
+    assert report["traced_mb"] > 0
+    assert report["failures"] == [], report["failures"]
+    print(f"✅ {report['decodes']} decodes over 0.1h simulated in {report['wall_sec']:.1f}s")
+
+
+if __name__ == "__main__":
+    test_trend_checks()
+    test_short_soak_is_healthy()
+    print("\n🎉 All soak test checks passed!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-decode speech gate on synthetic fixtures.
+"""
+
+import numpy as np
+
+from speech_gate import SpeechGate, cut_utterances
+
+SAMPLE_RATE = 16000
+rng = np.random.default_rng(0)
+
+
+def vowel(sec, f0=140):
+    """Harmonic, amplitude-modulated tone: a stand-in for voiced speech."""
+    t = np.arange(int(SAMPLE_RATE * sec)) / SAMPLE_RATE
+    x = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 20))
+    x *= 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (x / np.abs(x).max() * 8000).astype(np.int16)
+
+
+def noise(sec, amp=6000):
+    """Broadband burst, like a cough or a breath into the mic."""
+    return (rng.standard_normal(int(SAMPLE_RATE * sec)) * amp).clip(-32767, 32767).astype(np.int16)
+
+
+def keyboard(sec):
+    """Decaying clicks every 150ms."""
+    x = np.zeros(int(SAMPLE_RATE * sec))
+    for start in range(0, len(x) - 80, int(0.15 * SAMPLE_RATE)):
+        x[start:start + 80] = rng.standard_normal(80) * np.exp(-np.arange(80) / 15) * 20000
+    return x.astype(np.int16)
+
+
+def silence(sec):
+    return np.zeros(int(SAMPLE_RATE * sec), dtype=np.int16)
+
+
+def test_speech_passes():
+    print("🧪 Testing voiced audio passes...")
+    gate = SpeechGate()
+    assert gate.check(vowel(1.0).tobytes()).passed
+    noisy_room = vowel(1.0) + noise(1.0, amp=800)
+    assert gate.check(noisy_room.tobytes()).passed, "Speech over background noise still decodes"
+    assert gate.checked == 2 and not gate.rejected
+    print("✅ Harmonic audio is decoded")
+
+
+def test_non_speech_is_rejected():
+    print("\n🧪 Testing non-speech buffers are skipped...")
+    gate = SpeechGate()
+    assert gate.check(noise(0.5).tobytes()).reason == "noise"
+    assert gate.check(keyboard(1.0).tobytes()).reason == "too short"
+    assert gate.check(vowel(0.15).tobytes()).reason == "too short"
+    assert gate.check(np.concatenate([vowel(0.3), noise(3.0)]).tobytes()).reason == "sparse"
+    assert sum(gate.rejected.values()) == 4
+    print(f"✅ {gate.summary(hours=1.0)}")
+
+
+def test_short_phrase_in_a_long_recording():
+    print("\n🧪 Testing a short phrase in a fixed-length recording...")
+    gate = SpeechGate()
+    hotkey_buffer = np.concatenate([silence(2.0), vowel(1.5), silence(6.5)])  # 10 s recording
+    result = gate.check(hotkey_buffer.tobytes())
+    assert result.passed, result
+    assert result.voiced_ratio > 0.9, "Leading and trailing silence are not counted"
+    print(f"✅ 1.5s of speech in 10s passes (voiced ratio {result.voiced_ratio:.0%})")
+
+
+def test_saved_decodes_on_a_session_recording():
+    print("\n🧪 Testing saved decodes on a session recording...")
+    parts = []
+    for _ in range(3):
+        parts += [vowel(1.5), silence(1.2), noise(0.4), silence(1.2), keyboard(0.6), silence(1.2)]
+    recording = np.concatenate(parts)
+    buffers = cut_utterances(recording, is_speech=lambda frame: np.abs(
+        np.frombuffer(frame, dtype=np.int16)).max() > 500)
+    assert len(buffers) == 9, len(buffers)
+
+    gate = SpeechGate()
+    passed = [gate.check(pcm).passed for pcm in buffers]
+    assert passed == [True, False, False] * 3
+    hours = len(recording) / SAMPLE_RATE / 3600
+    print(f"✅ {gate.summary(hours)}")
+
+
+if __name__ == "__main__":
+    test_speech_passes()
+    test_non_speech_is_rejected()
+    test_short_phrase_in_a_long_recording()
+    test_saved_decodes_on_a_session_recording()
+    print("\n🎉 All speech gate tests passed!")
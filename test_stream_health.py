@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for input stream health accounting and adaptive latency.
+"""
+
+from types import SimpleNamespace
+
+from stream_health import AdaptiveLatency, StreamHealth
+
+OK = SimpleNamespace(input_overflow=False)
+OVERFLOW = SimpleNamespace(input_overflow=True)
+BLOCK = 480  # 30ms at 16kHz
+
+
+def make_health(now, **kwargs):
+    adaptive = AdaptiveLatency(clock=lambda: now[0], **kwargs)
+    return adaptive, StreamHealth(adaptive, state_provider=lambda: "listening",
+                                  clock=lambda: now[0])
+
+
+def test_overflow_counted_and_tagged():
+    print("🧪 Testing overflow accounting...")
+    now = [0.0]
+    adaptive, health = make_health(now, enabled=False)
+    health.record("mic", OK, 1.00, BLOCK, 16000)
+    with health.activity("decoding"):
+        health.record("mic", OVERFLOW, 1.03, BLOCK, 16000)
+    health.record("mic", OK, 1.06, BLOCK, 16000)
+
+    assert health.counts["input_overflow"] == 1
+    assert health.by_activity[("input_overflow", "listening+decoding")] == 1
+    warning = health.tick()
+    assert "1 input overflow during listening+decoding" in warning, warning
+    assert health.tick() is None, "Events are reported once"
+    assert adaptive.level == 0, "Disabled adaptation never changes level"
+    print(f"✅ {health.summary()}")
+
+
+def test_adc_gap_measures_lost_audio():
+    print("\n🧪 Testing lost audio from ADC timestamps...")
+    now = [0.0]
+    _, health = make_health(now, enabled=False)
+    health.record("mic", OK, 1.00, BLOCK, 16000)
+    health.record("mic", OK, 1.15, BLOCK, 16000)  # Expected 1.03: 120ms missing
+    health.record("wakeword", OK, 0.0, 512, 16000)  # Host API without timestamps
+
+    assert health.counts["gap"] == 1
+    assert abs(health.lost_sec - 0.12) < 1e-9
+    assert "~120ms audio lost" in health.tick()
+    print("✅ Gaps between callbacks are counted as lost audio")
+
+
+def test_reopened_stream_is_not_a_gap():
+    print("\n🧪 Testing a stream reopen...")
+    now = [10.0]
+    adaptive, health = make_health(now, cooldown_sec=0.0)
+    health.record("mic", OK, 1.00, BLOCK, 16000)
+    health.reset_stream()  # Streams closed and reopened at a new latency level
+    health.record("mic", OK, 2.50, BLOCK, 16000)
+    health.record("mic", OK, 2.53, BLOCK, 16000)
+
+    assert health.counts["gap"] == 0 and health.lost_sec == 0.0
+    assert adaptive.level == 0, "A reopen must not step the latency up again"
+    print("✅ The first block after a reopen starts a new timeline")
+
+
+def test_adaptive_latency_steps_up_and_down():
+    print("\n🧪 Testing adaptive latency...")
+    now = [10.0]
+    adaptive, health = make_health(now, cooldown_sec=2.0, stable_sec=60.0)
+    health.record("mic", OVERFLOW, 0.0, BLOCK, 16000)
+    assert adaptive.level == 0, "Overflows while the streams start up are ignored"
+    now[0] += 3
+    health.record("mic", OVERFLOW, 0.0, BLOCK, 16000)
+    assert adaptive.level == 1 and adaptive.take_change()
+    assert not adaptive.take_change(), "A change is reported once"
+
+    health.record("mic", OVERFLOW, 0.0, BLOCK, 16000)
+    assert adaptive.level == 1, "Cooldown ignores the burst while the streams reopen"
+    now[0] += 3
+    health.record("mic", OVERFLOW, 0.0, BLOCK, 16000)
+    assert adaptive.level == 2 and adaptive.blocks == 2
+
+    now[0] += 30
+    health.tick()
+    assert adaptive.level == 2, "Not stable long enough yet"
+    now[0] += 31
+    health.tick()
+    assert adaptive.level == 1 and adaptive.take_change()
+    print(f"✅ {adaptive.describe()} after {adaptive.changes} changes")
+
+
+if __name__ == "__main__":
+    test_overflow_counted_and_tagged()
+    test_adc_gap_measures_lost_audio()
+    test_reopened_stream_is_not_a_gap()
+    test_adaptive_latency_steps_up_and_down()
+    print("\n🎉 All stream health tests passed!")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for VAD endpointing and the stdin PCM -> NDJSON stream mode.
+"""
+
+import io
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from endpointer import Endpointer
+from session_context import SessionContext
+from stream_transcribe import iter_frames, transcribe_stream
+
+FRAME_BYTES = 480 * 2  # 30 ms at 16 kHz
+
+
+def energy_is_speech(frame):
+    """Stand-in for webrtcvad: loud frames are speech."""
+    return np.abs(np.frombuffer(frame, dtype=np.int16)).mean() > 500
+
+
+def make_pcm(pattern):
+    """Build PCM from (seconds, loud) pairs."""
+    parts = [np.full(int(16000 * seconds), 3000 if loud else 0, dtype=np.int16)
+             for seconds, loud in pattern]
+    return np.concatenate(parts).tobytes()
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append((len(audio), options))
+        segment = SimpleNamespace(text=f" utterance {len(self.calls)}",
+                                  avg_logprob=-0.1, compression_ratio=1.0)
+        info = SimpleNamespace(language="en", language_probability=0.99)
+        return iter([segment]), info
+
+
+def test_endpointer_splits_on_silence():
+    print("🧪 Testing endpointing...")
+    endpointer = Endpointer(silence_sec=0.3)
+    pcm = make_pcm([(0.3, False), (0.6, True), (0.5, False), (0.9, True), (0.1, False)])
+    utterances = []
+    for offset in range(0, len(pcm), FRAME_BYTES):
+        frame = pcm[offset:offset + FRAME_BYTES]
+        utterance = endpointer.push(frame, energy_is_speech(frame))
+        if utterance:
+            utterances.append(utterance)
+    tail = endpointer.flush()
+    assert tail is not None, "Speech at end of stream must be flushed"
+    utterances.append(tail)
+
+    assert len(utterances) == 2
+    first, second = utterances
+    assert abs(first.start - 0.3) < 0.031 and abs(first.end - 0.9) < 0.031
+    assert abs(second.start - 1.4) < 0.031
+    assert len(first.pcm) == 20 * FRAME_BYTES, "Only speech frames are buffered"
+    print("✅ Utterances split on silence with stream timestamps")
+
+
+def test_endpointer_forces_long_utterances():
+    print("\n🧪 Testing buffer limit...")
+    endpointer = Endpointer(max_buffer_bytes=10 * FRAME_BYTES, check_interval=5)
+    frame = make_pcm([(0.03, True)])
+    emitted = [endpointer.push(frame, True) for _ in range(15)]
+    assert sum(u is not None for u in emitted) == 1
+    assert endpointer.forced == 1
+    print("✅ Oversized utterances are cut")
+
+
+def test_iter_frames_handles_odd_chunks():
+    print("\n🧪 Testing chunked frame reader...")
+    data = bytes(range(256)) * 20  # 5120 bytes: 5 frames + 320 bytes
+    frames = list(iter_frames(io.BytesIO(data), FRAME_BYTES, chunk_bytes=777))
+    assert len(frames) == 6
+    assert b"".join(frames)[:len(data)] == data
+    assert all(len(f) == FRAME_BYTES for f in frames)
+    print("✅ Frames reassembled across chunk boundaries, tail zero-padded")
+
+
+def test_iter_frames_does_not_wait_on_live_pipe():
+    print("\n🧪 Testing frames from a pipe that stays open...")
+    read_fd, write_fd = os.pipe()
+    frames = []
+    with os.fdopen(read_fd, "rb") as stream:
+        reader = threading.Thread(target=lambda: frames.extend(iter_frames(stream, FRAME_BYTES)),
+                                  daemon=True)
+        reader.start()
+        os.write(write_fd, bytes(FRAME_BYTES * 3))  # 90 ms of audio, far below one chunk
+        for _ in range(200):
+            if len(frames) == 3:
+                break
+            threading.Event().wait(0.01)
+        arrived = len(frames)
+        os.close(write_fd)
+        reader.join(timeout=5)
+    assert arrived == 3, f"Only {arrived} of 3 frames arrived while the pipe was open"
+    assert not reader.is_alive() and len(frames) == 3
+    print("✅ Frames are yielded as soon as they arrive, not when a chunk fills")
+
+
+def test_stream_writes_ndjson():
+    print("\n🧪 Testing stdin -> NDJSON transcription...")
+    pcm = make_pcm([(0.5, True), (1.2, False), (0.8, True)])
+    out = io.StringIO()
+    model = FakeModel()
+    session = SessionContext()
+    count = transcribe_stream(io.BytesIO(pcm), out, model, energy_is_speech, session=session)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert count == 2 and len(records) == 2
+    assert records[0]["text"] == "utterance 1" and records[0]["start"] == 0.0
+    assert records[1]["start"] > records[0]["end"]
+    assert records[0]["language"] == "en"
+    # The second decode gets the pinned language and the carried prompt
+    assert model.calls[1][1]["language"] == "en"
+    assert model.calls[1][1]["initial_prompt"] == "utterance 1"
+    print(f"✅ {count} JSON lines written")
+
+
+if __name__ == "__main__":
+    test_endpointer_splits_on_silence()
+    test_endpointer_forces_long_utterances()
+    test_iter_frames_handles_odd_chunks()
+    test_iter_frames_does_not_wait_on_live_pipe()
+    test_stream_writes_ndjson()
+    print("\n🎉 All stream transcription tests passed!")
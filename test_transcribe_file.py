@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for long-file VAD chunking and parallel transcription (fake decoder workers).
+"""
+
+import os
+import tempfile
+from functools import partial
+
+import numpy as np
+
+from audio_archive import write_wav
+from multiprocess_pipeline import FakeDecoder
+from transcribe_file import (
+    SAMPLE_RATE,
+    format_timestamp,
+    map_wav,
+    plan_chunks,
+    speech_regions,
+    transcribe_file,
+)
+
+
+def make_recording(pattern):
+    """Build int16 audio from (seconds, speech) pairs; speech is a noisy tone."""
+    rng = np.random.default_rng(0)
+    parts = []
+    for seconds, speech in pattern:
+        n = int(seconds * SAMPLE_RATE)
+        noise = rng.normal(0, 20, n)
+        if speech:
+            t = np.arange(n) / SAMPLE_RATE
+            noise += 4000 * np.sin(2 * np.pi * 220 * t)
+        parts.append(noise)
+    return np.concatenate(parts).astype(np.int16)
+
+
+def test_map_wav_is_zero_copy():
+    print("🧪 Testing memory-mapped WAV input...")
+    samples = make_recording([(1.0, True)])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "a.wav")
+        write_wav(path, samples, SAMPLE_RATE)
+        mapped = map_wav(path)
+        assert isinstance(mapped, np.memmap)
+        assert np.array_equal(mapped, samples)
+        del mapped
+
+        write_wav(path, samples, 8000)
+        try:
+            map_wav(path)
+            assert False, "8 kHz input should be rejected"
+        except ValueError as e:
+            assert "ffmpeg" in str(e)
+    print("✅ Sample data mapped straight from the file")
+
+
+def test_vad_regions_and_chunk_plan():
+    print("\n🧪 Testing VAD split and chunk planning...")
+    samples = make_recording([(2, False), (3, True), (0.2, False), (2, True),
+                              (4, False), (5, True), (3, False)])
+    regions = speech_regions(samples)
+    # The 0.2 s pause is bridged; the 4 s silence splits
+    assert len(regions) == 2, regions
+    first_start, first_end = (r / SAMPLE_RATE for r in regions[0])
+    assert abs(first_start - 2.0) < 0.05 and abs(first_end - 7.2) < 0.05
+
+    chunks = plan_chunks(regions, len(samples), max_chunk_sec=60)
+    assert len(chunks) == 1, "Both regions fit in one chunk"
+    chunks = plan_chunks(regions, len(samples), max_chunk_sec=8)
+    assert len(chunks) == 2
+    assert chunks[0][1] < chunks[1][0], "Chunks are cut inside the silence"
+    long_chunks = plan_chunks([(0, 25 * SAMPLE_RATE)], 25 * SAMPLE_RATE, max_chunk_sec=10, pad_sec=0)
+    assert [end - start for start, end in long_chunks] == [10 * SAMPLE_RATE] * 2 + [5 * SAMPLE_RATE]
+    padded = plan_chunks([(SAMPLE_RATE, 26 * SAMPLE_RATE)], 30 * SAMPLE_RATE, max_chunk_sec=10)
+    pad = int(0.2 * SAMPLE_RATE)
+    assert padded == [(SAMPLE_RATE - pad, 11 * SAMPLE_RATE), (11 * SAMPLE_RATE, 21 * SAMPLE_RATE),
+                      (21 * SAMPLE_RATE, 26 * SAMPLE_RATE + pad)], "No overlap at fixed-interval cuts"
+    print(f"✅ {len(regions)} speech regions, silence never decoded")
+
+
+def test_parallel_transcription_merges_timestamps():
+    print("\n🧪 Testing parallel decode with global timestamps...")
+    pattern = []
+    for _ in range(6):
+        pattern += [(1.5, False), (3.0, True)]
+    samples = make_recording(pattern + [(1.0, False)])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "long.wav")
+        write_wav(path, samples, SAMPLE_RATE)
+        segments, stats = transcribe_file(path, partial(FakeDecoder, 0.05), workers=2,
+                                          max_chunk_sec=5)
+
+    assert stats["chunks"] == 6
+    starts = [segment["start"] for segment in segments]
+    assert starts == sorted(starts), "Segments must be in file order"
+    # Each chunk's first segment lands where its (padded) speech starts in the file
+    expected = [1.5 - 0.2 + 4.5 * k for k in range(6)]
+    assert all(any(abs(s - e) < 0.05 for s in starts) for e in expected), starts
+    assert segments[-1]["end"] <= len(samples) / SAMPLE_RATE
+    assert stats["speech_sec"] < stats["audio_sec"]
+    assert stats["rtf"] == stats["audio_sec"] / stats["wall_time"], "Audio seconds per second, like evaluate.py"
+    print(f"✅ {len(segments)} segments, speedup {stats['speedup']:.1f}x with 2 workers")
+
+
+def test_format_timestamp():
+    assert format_timestamp(3723.456) == "01:02:03,456"
+    assert format_timestamp(0.5, ".") == "00:00:00.500"
+
+
+if __name__ == "__main__":
+    test_map_wav_is_zero_copy()
+    test_vad_regions_and_chunk_plan()
+    test_parallel_transcription_merges_timestamps()
+    test_format_timestamp()
+    print("\n🎉 All long-file transcription tests passed!")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for the embeddable asyncio Transcriber API.
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from multiprocess_pipeline import FakeDecoder
+from transcriber import Transcriber, TranscriptionResult
+
+RATE = 16000
+
+
+def phrase(seconds, f0=150.0):
+    t = np.arange(int(seconds * RATE)) / RATE
+    voice = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 12))
+    voice *= 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (voice / np.abs(voice).max() * 6000).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype=np.int16)
+
+
+def fake_transcriber(cost=0.0, **kwargs):
+    return Transcriber(loader=lambda: FakeDecoder(cost), warmup=False, **kwargs)
+
+
+def test_import_has_no_side_effects():
+    print("🧪 Testing that importing transcriber loads nothing heavy...")
+    code = ("import sys, transcriber; "
+            "heavy = [m for m in ('faster_whisper', 'ctranslate2', 'sounddevice', 'webrtcvad', "
+            "'pyautogui', 'keyboard', 'voice_to_text_vr_gpu') if m in sys.modules]; "
+            "print(','.join(heavy))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    assert out.stdout.strip() == "", out.stdout
+    assert out.stderr.strip() == "", out.stderr
+    print("✅ No model, audio or app modules imported")
+
+
+def test_lifecycle():
+    print("\n🧪 Testing start/close and use before start...")
+
+    async def run():
+        transcriber = fake_transcriber()
+        try:
+            await transcriber.transcribe(phrase(1.0))
+            raise AssertionError("transcribe() before start() must raise")
+        except RuntimeError:
+            pass
+        async with transcriber:
+            assert transcriber.started
+            result = await transcriber.transcribe(phrase(2.0).tobytes(), offset=5.0)
+        assert not transcriber.started
+        return result
+
+    result = asyncio.run(run())
+    assert isinstance(result, TranscriptionResult)
+    assert result.text.split() == ["fake", "transcription"] * 2
+    assert result.language == "en" and result.skipped is None
+    assert result.start == 5.0 and result.end == 7.0
+    assert result.segments[0][0] >= 5.0 and result.segments[-1][1] <= 7.0
+    print("✅ Model loads in start(), releases in close()")
+
+
+def test_speech_gate_skips_noise():
+    print("\n🧪 Testing that noise is skipped without a decode...")
+
+    async def run():
+        async with fake_transcriber() as transcriber:
+            noise = np.random.default_rng(0).normal(0, 3000, 2 * RATE).astype(np.int16)
+            return await transcriber.transcribe(noise), transcriber.decodes
+
+    result, decodes = asyncio.run(run())
+    assert result.skipped == "noise" and result.text == "" and decodes == 0
+    print("✅ Gate rejects noise before it reaches the model")
+
+
+def test_concurrent_sessions_keep_loop_responsive():
+    print("\n🧪 Testing concurrent sessions on one event loop...")
+    stream = np.concatenate([silence(0.5), phrase(1.5), silence(1.5), phrase(2.0), silence(1.5)])
+    chunks = [stream[i:i + 1600].tobytes() for i in range(0, len(stream), 1600)]
+
+    async def run():
+        gaps = []
+
+        async def ticker(stop):
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        async def consume(session):
+            return [result async for result in session.stream(chunks)]
+
+        async with fake_transcriber(cost=0.1, max_concurrency=2) as transcriber:
+            stop = asyncio.Event()
+            tick = asyncio.ensure_future(ticker(stop))
+            sessions = [transcriber.session(language="en") for _ in range(3)]
+            results = await asyncio.gather(*(consume(s) for s in sessions))
+            stop.set()
+            await tick
+        return results, sessions, max(gaps)
+
+    results, sessions, worst_gap = asyncio.run(run())
+    for session_results in results:
+        assert len(session_results) == 2, session_results
+        first, second = session_results
+        assert abs(first.start - 0.5) < 0.05 and abs(second.start - 3.5) < 0.05
+        assert all(r.text for r in session_results)
+    assert all("initial_prompt" in s.context.transcribe_options() for s in sessions), "Each session carries its own prompt"
+    assert worst_gap < 0.1, f"Event loop blocked for {worst_gap * 1000:.0f}ms"
+    print(f"✅ 3 sessions x 2 utterances; longest loop stall {worst_gap * 1000:.0f}ms")
+
+
+def test_transcribe_file_in_order():
+    print("\n🧪 Testing file transcription order and offsets...")
+    audio = np.concatenate([silence(1.0), phrase(3.0), silence(3.0), phrase(2.0, 200),
+                            silence(3.0), phrase(2.5, 120), silence(1.0)])
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "dictation.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(RATE)
+            f.writeframes(audio.tobytes())
+
+        async def run():
+            async with fake_transcriber(max_concurrency=2) as transcriber:
+                return [r async for r in transcriber.transcribe_file(path, max_chunk_sec=4.0)]
+
+        results = asyncio.run(run())
+    starts = [r.start for r in results]
+    assert starts == sorted(starts) and len(results) >= 2, starts
+    assert results[0].start < 1.0 and results[-1].end > 11.0
+    for r in results:
+        assert all(r.start <= s <= e <= r.end + 0.01 for s, e, _ in r.segments), r
+    print(f"✅ {len(results)} chunks yielded in file order")
+
+
+def test_sparse_file_chunks_are_decoded():
+    print("\n🧪 Testing a long file with little speech...")
+    # 15 s of room tone with two short phrases: one chunk that is mostly silence
+    audio = np.concatenate([silence(0.5), phrase(1.2), silence(12.1), phrase(1.2, 200)])
+    audio = (audio + np.random.default_rng(0).normal(0, 150, len(audio))).astype(np.int16)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "sparse.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(RATE)
+            f.writeframes(audio.tobytes())
+
+        async def run():
+            async with fake_transcriber() as transcriber:
+                sparse = transcriber.gate.check(audio).reason
+                results = [r async for r in transcriber.transcribe_file(path)]
+                return sparse, results, transcriber.decodes
+
+        sparse, results, decodes = asyncio.run(run())
+    assert sparse == "sparse", "The whole file would not pass the gate"
+    assert len(results) == 1 and decodes == 1
+    assert results[0].skipped is None and results[0].text
+    print("✅ File chunks are decoded without the speech gate")
+
+
+if __name__ == "__main__":
+    test_import_has_no_side_effects()
+    test_lifecycle()
+    test_speech_gate_skips_noise()
+    test_concurrent_sessions_keep_loop_responsive()
+    test_transcribe_file_in_order()
+    test_sparse_file_chunks_are_decoded()
+    print("\n🎉 All transcriber tests passed!")
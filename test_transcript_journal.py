@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the transcript journal: appends, rotation, search and crash recovery.
+"""
+
+import os
+import tempfile
+import time
+
+from transcript_journal import TranscriptJournal, tokenize
+
+
+def test_tokenize():
+    print("🧪 Testing tokenizer...")
+    assert tokenize("Hello, World! Don't stop.") == ["hello", "world", "don't", "stop"]
+    print("✅ Tokenizer lowercases and splits on punctuation")
+
+
+def test_append_and_search():
+    print("\n🧪 Testing append and search...")
+    with tempfile.TemporaryDirectory() as directory:
+        journal = TranscriptJournal(directory)
+        journal.append("Schedule the team meeting for Friday", duration=2.1)
+        journal.append("Push the objective, team", duration=1.4)
+        journal.append("Meeting notes are in the shared drive", duration=2.5)
+
+        results = journal.search("meeting")
+        assert [r["text"] for r in results] == [
+            "Meeting notes are in the shared drive",
+            "Schedule the team meeting for Friday",
+        ]
+        assert journal.search("team meeting")[0]["duration"] == 2.1
+        assert journal.search("sched*")[0]["text"].startswith("Schedule")
+        assert journal.search("nothing here") == []
+        assert len(journal.recent(limit=2)) == 2
+        journal.close()
+    print("✅ Search returns newest matches first")
+
+
+def test_rotation_and_reopen():
+    print("\n🧪 Testing segment rotation and reopening...")
+    with tempfile.TemporaryDirectory() as directory:
+        journal = TranscriptJournal(directory, segment_max_bytes=200)
+        for i in range(20):
+            journal.append(f"utterance number {i} about rotation")
+        assert journal.stats()["segments"] > 1
+        journal.close()
+
+        reopened = TranscriptJournal(directory, segment_max_bytes=200)
+        assert reopened.stats()["entries"] == 20
+        assert reopened.search("number 7")[0]["text"] == "utterance number 7 about rotation"
+        reopened.close()
+    print("✅ Entries survive rotation and reopen")
+
+
+def test_recovers_unindexed_lines():
+    print("\n🧪 Testing recovery of lines missing from the index...")
+    with tempfile.TemporaryDirectory() as directory:
+        journal = TranscriptJournal(directory)
+        journal.append("first entry")
+        journal.close()
+
+        # Simulate a crash between the segment write and the index commit
+        with open(os.path.join(directory, "segment-000001.jsonl"), "a") as f:
+            f.write('{"ts": 1.0, "text": "orphaned entry"}\n')
+            f.write('{"ts": 2.0, "text": "torn')
+
+        journal = TranscriptJournal(directory)
+        assert journal.search("orphaned")[0]["text"] == "orphaned entry"
+        assert journal.stats()["entries"] == 2
+        journal.close()
+    print("✅ Unindexed tail lines are recovered, torn writes ignored")
+
+
+def test_resyncs_after_torn_record():
+    print("\n🧪 Testing that records after a torn write are kept...")
+    with tempfile.TemporaryDirectory() as directory:
+        segment = os.path.join(directory, "segment-000001.jsonl")
+        with open(segment, "w") as f:
+            f.write('{"ts": 1.0, "text": "before"}\n')
+            f.write('{"ts": 2.0, "text": "torn')  # Crash mid-write
+
+        journal = TranscriptJournal(directory)
+        journal.append("after the crash")
+        journal.append("later still")
+        journal.close()
+
+        # Written by an older version: the next record ran into the fragment
+        with open(segment, "a") as f:
+            f.write('{"ts": 3.0, "text": "tor{"ts": 4.0, "text": "glued record"}\n')
+            f.write('{"ts": 5.0, "text": "last record"}\n')
+        os.remove(os.path.join(directory, "index.sqlite3"))  # Rebuild from the segments
+
+        journal = TranscriptJournal(directory)
+        texts = [entry["text"] for entry in journal.recent(limit=10)]
+        assert texts == ["last record", "glued record", "later still", "after the crash", "before"], texts
+        assert journal.search("glued")[0]["ts"] == 4.0
+        journal.close()
+    print("✅ The scan resynchronises at the next record instead of losing it")
+
+
+def test_search_does_not_scan_log():
+    print("\n🧪 Testing search latency on a larger journal...")
+    with tempfile.TemporaryDirectory() as directory:
+        journal = TranscriptJournal(directory)
+        words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+        for i in range(5000):
+            journal.append(f"{words[i % 8]} {words[(i * 3) % 8]} entry {i}")
+        journal.append("unique needle phrase")
+
+        start = time.perf_counter()
+        results = journal.search("needle")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        journal.close()
+
+    assert len(results) == 1
+    assert elapsed_ms < 50, f"Search took {elapsed_ms:.1f}ms"
+    print(f"✅ Search over 5001 entries took {elapsed_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    test_tokenize()
+    test_append_and_search()
+    test_rotation_and_reopen()
+    test_recovers_unindexed_lines()
+    test_resyncs_after_torn_record()
+    test_search_does_not_scan_log()
+    print("\n🎉 All transcript journal tests passed!")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed transcription cache.
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from decoding_profiles import transcribe_with_profile
+from multiprocess_pipeline import FakeDecoder
+from transcription_cache import CachedModel, TranscriptionCache, cache_key
+
+
+class CountingDecoder(FakeDecoder):
+    def __init__(self, cost_per_audio_sec=0.0):
+        super().__init__(cost_per_audio_sec)
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        return super().transcribe(audio, **options)
+
+
+def audio(seconds, seed=0):
+    return np.random.default_rng(seed).normal(0, 0.1, int(seconds * 16000)).astype(np.float32)
+
+
+def test_key_covers_audio_and_settings():
+    print("🧪 Testing cache keys...")
+    a = audio(2.0)
+    key = cache_key(a, "small/cpu/int8", {"beam_size": 1, "language": "en"})
+    assert key == cache_key(a.copy(), "small/cpu/int8", {"language": "en", "beam_size": 1})
+    assert key != cache_key(audio(2.0, seed=1), "small/cpu/int8", {"beam_size": 1, "language": "en"})
+    assert key != cache_key(a, "base/cpu/int8", {"beam_size": 1, "language": "en"})
+    assert key != cache_key(a, "small/cpu/int8", {"beam_size": 5, "language": "en"})
+    assert key != cache_key(a, "small/cpu/int8", {"beam_size": 1, "language": "en",
+                                                   "initial_prompt": "Hello"})
+    assert key != cache_key((a * 32768).astype(np.int16), "small/cpu/int8",
+                            {"beam_size": 1, "language": "en"})
+    print("✅ Audio, dtype, model and every option change the key")
+
+
+def test_memory_tier_skips_the_model():
+    print("\n🧪 Testing memory hits and LRU bound...")
+    decoder = CountingDecoder(0.05)
+    cache = TranscriptionCache(max_entries=2)
+    model = CachedModel(decoder, cache, "fake")
+    clips = [audio(2.0, seed) for seed in range(3)]
+
+    first, info, _ = transcribe_with_profile(model, clips[0], "latency")
+    again, info_again, _ = transcribe_with_profile(model, clips[0], "latency")
+    assert decoder.calls == 1 and cache.hits == 1 and cache.misses == 1
+    assert [s.text for s in again] == [s.text for s in first]
+    assert [(s.start, s.end) for s in again] == [(s.start, s.end) for s in first]
+    assert info_again.language == "en"
+    assert model.replayed_sec >= 0.09, "Hits remember the original decode time"
+
+    for clip in clips[1:]:
+        transcribe_with_profile(model, clip, "latency")
+    transcribe_with_profile(model, clips[0], "latency")
+    assert decoder.calls == 4, "Least recently used entry was evicted"
+    assert model.cost_per_audio_sec == 0.05, "Other attributes pass through"
+    print(f"✅ {cache.summary()}")
+
+
+def test_hit_does_not_borrow_the_model():
+    print("\n🧪 Testing that a hit never borrows the model...")
+    decoder = CountingDecoder()
+    cache = TranscriptionCache()
+    borrows = []
+
+    def borrow():
+        borrows.append(1)
+        return decoder
+
+    clip = audio(2.0)
+    first = CachedModel(None, cache, "fake", borrow=borrow)
+    transcribe_with_profile(first, clip, "latency")
+    assert first.borrowed and len(borrows) == 1
+
+    again = CachedModel(None, cache, "fake", borrow=borrow)
+    segments, _, _ = transcribe_with_profile(again, clip, "latency")
+    assert segments and not again.borrowed and len(borrows) == 1 and decoder.calls == 1
+    print("✅ The model is borrowed on the first miss only")
+
+
+def test_batch_decodes_only_the_misses():
+    print("\n🧪 Testing batched decodes through the cache...")
+    decoder = CountingDecoder()
+    cache = TranscriptionCache()
+    clips = [audio(1.0, seed) for seed in range(3)]
+    decoded = []
+
+    def run(batch):
+        model = CachedModel(None, cache, "fake", borrow=lambda: decoder)
+
+        def decode(misses):  # Stand-in for batch_decoder.transcribe_batch
+            decoded.append(len(misses))
+            return [transcribe_with_profile(model.model, clip, "latency") + (0.1,) for clip in misses]
+
+        return model, model.transcribe_many(batch, decode, profile="latency", batched=True)
+
+    run(clips[:2])
+    model, (results, hits) = run(clips)
+    assert decoded == [2, 1] and hits == [True, True, False]
+    assert [len(segments) for segments, _, _, _ in results] == [1, 1, 1]
+    model, (results, hits) = run(clips[:1])
+    assert decoded == [2, 1] and hits == [True] and not model.borrowed
+    print("✅ Only utterances without a cached result are decoded")
+
+
+def test_partial_decode_is_not_cached():
+    print("\n🧪 Testing that an abandoned decode is not stored...")
+    decoder = CountingDecoder()
+    cache = TranscriptionCache()
+    model = CachedModel(decoder, cache, "fake")
+    clip = audio(3.0)
+    segments, _ = model.transcribe(clip)
+    next(segments)
+    del segments
+    list(model.transcribe(clip)[0])
+    assert decoder.calls == 2 and cache.stores == 1
+    list(model.transcribe(clip)[0])
+    assert decoder.calls == 2
+    print("✅ Only fully iterated results are cached")
+
+
+def test_disk_tier_survives_restart_and_evicts():
+    print("\n🧪 Testing the disk tier...")
+    with tempfile.TemporaryDirectory() as directory:
+        decoder = CountingDecoder()
+        clips = [audio(30.0, seed) for seed in range(40)]
+        model = CachedModel(decoder, TranscriptionCache(directory=directory), "fake")
+        for clip in clips[:3]:
+            list(model.transcribe(clip)[0])
+
+        # A fresh process: empty memory tier, same directory
+        restarted = TranscriptionCache(max_entries=8, directory=directory)
+        model = CachedModel(decoder, restarted, "fake")
+        start = time.perf_counter()
+        for clip in clips[:3]:
+            segments = list(model.transcribe(clip)[0])
+            assert len(segments) == 30
+        elapsed = time.perf_counter() - start
+        assert decoder.calls == 3 and restarted.disk_hits == 3
+        list(model.transcribe(clips[0])[0])
+        assert restarted.hits == 1, "Disk hits are promoted to memory"
+
+        record_size = restarted.disk_bytes / 3
+        small = TranscriptionCache(directory=directory, max_disk_mb=record_size * 10 / 1024 / 1024)
+        model = CachedModel(decoder, small, "fake")
+        for clip in clips:
+            list(model.transcribe(clip)[0])
+        files = [name for name in os.listdir(directory) if name.endswith(".json")]
+        assert small.evictions > 0 and len(files) <= 10
+        assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+        assert small.disk_bytes <= record_size * 10
+    print(f"✅ Restart hits from disk ({elapsed * 1000:.1f}ms for 3), size budget enforced")
+
+
+if __name__ == "__main__":
+    test_key_covers_audio_and_settings()
+    test_memory_tier_skips_the_model()
+    test_hit_does_not_borrow_the_model()
+    test_batch_decodes_only_the_misses()
+    test_partial_decode_is_not_cached()
+    test_disk_tier_survives_restart_and_evicts()
+    print("\n🎉 All transcription cache tests passed!")
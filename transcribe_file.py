@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Parallel transcription of long recordings.
+
+The WAV file is memory-mapped, a vectorized energy VAD finds the silences,
+and the speech is cut into chunks at the longest pauses. Chunks are decoded
+across a process pool (each worker maps the same file, so no audio is
+pickled) and the segments are merged with timestamps shifted back to file
+time. Long stretches of silence are never decoded at all, and pauses inside a chunk
+are shortened before encoding (pause_compression.py).
+
+Usage:
+    python transcribe_file.py meeting.wav --workers 4 -o meeting.srt
+    ffmpeg -i talk.mp3 -ac 1 -ar 16000 talk.wav   # convert other formats first
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from decoding_profiles import DECODING_PROFILES, transcribe_with_profile
+from pause_compression import TimeMap, compress_pauses
+from transcription_cache import DEFAULT_CACHE_DIR, cached_loader
+from model_store import ModelStore, load_model
+
+SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+VAD_BLOCK_FRAMES = 100_000  # Frames per VAD pass over the memmap (~50 min of audio)
+SPEECH_MARGIN_DB = 12.0  # Frames this far above the noise floor count as speech
+MIN_SILENCE_SEC = 0.5  # Shorter pauses never split a chunk
+MAX_CHUNK_SEC = 60.0
+SPEECH_PAD_SEC = 0.2  # Audio kept either side of each chunk's speech
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Memory-mapped input
+
+def map_wav(path):
+    """Memory-map the sample data of a 16 kHz mono 16-bit PCM WAV file."""
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path}: not a WAV file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path}: no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+    if fmt is None:
+        raise ValueError(f"{path}: no fmt chunk")
+    audio_format, channels, sample_rate, _, _, bits = fmt
+    if audio_format != 1 or channels != 1 or bits != 16 or sample_rate != SAMPLE_RATE:
+        raise ValueError(f"{path}: expected 16 kHz mono 16-bit PCM "
+                         f"(convert with: ffmpeg -i input -ac 1 -ar 16000 output.wav)")
+    # Some writers leave the data size as 0/0xFFFFFFFF when streaming; trust the file length
+    samples = (os.path.getsize(path) - offset) // 2
+    if samples == 0:
+        return np.zeros(0, dtype=np.int16)
+    return np.memmap(path, dtype=np.int16, mode="r", offset=offset, shape=(samples,))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# VAD and chunking
+
+def frame_energy_db(samples, frame_samples):
+    """Per-frame RMS level in dBFS, computed block by block over the memmap."""
+    frames = len(samples) // frame_samples
+    levels = np.empty(frames, dtype=np.float32)
+    block = VAD_BLOCK_FRAMES
+    for first in range(0, frames, block):
+        count = min(block, frames - first)
+        view = samples[first * frame_samples:(first + count) * frame_samples]
+        x = view.reshape(count, frame_samples).astype(np.float32)
+        power = np.einsum("ij,ij->i", x, x) / frame_samples
+        levels[first:first + count] = 10 * np.log10(power + 1.0) - 90.3  # 20*log10(32768)
+    return levels
+
+
+def speech_regions(samples, frame_ms=VAD_FRAME_MS, margin_db=SPEECH_MARGIN_DB,
+                   min_silence_sec=MIN_SILENCE_SEC):
+    """Return [(start, end)] sample ranges of speech separated by at least min_silence_sec."""
+    frame_samples = SAMPLE_RATE * frame_ms // 1000
+    levels = frame_energy_db(samples, frame_samples)
+    if not len(levels):
+        return []
+    noise_floor = np.percentile(levels, 10)
+    speech = levels > max(noise_floor + margin_db, -60.0)
+    if not speech.any():
+        return []
+
+    # Run boundaries of the speech mask
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.view(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+
+    # Bridge pauses shorter than min_silence_sec
+    min_gap = max(1, int(round(min_silence_sec * 1000 / frame_ms)))
+    keep = np.concatenate(([True], starts[1:] - ends[:-1] >= min_gap))
+    merged_starts = starts[keep]
+    merged_ends = np.concatenate((ends[:-1][keep[1:]], ends[-1:]))
+    return [(int(s) * frame_samples, int(e) * frame_samples)
+            for s, e in zip(merged_starts, merged_ends)]
+
+
+def plan_chunks(regions, total_samples, max_chunk_sec=MAX_CHUNK_SEC, pad_sec=SPEECH_PAD_SEC):
+    """Group speech regions into chunks no longer than max_chunk_sec.
+
+    Chunks are cut in the silence between regions, so words are not split;
+    a single region longer than the limit is cut at fixed intervals. Padding is
+    only added on the silence side of a chunk: chunks never overlap, so no word
+    is decoded (and output) twice.
+    """
+    max_len = int(max_chunk_sec * SAMPLE_RATE)
+    pad = int(pad_sec * SAMPLE_RATE)
+    pieces = []  # (start, end, start is a fixed-interval cut, end is a fixed-interval cut)
+    for start, end in regions:
+        cut = False
+        while end - start > max_len:
+            pieces.append((start, start + max_len, cut, True))
+            start += max_len
+            cut = True
+        pieces.append((start, end, cut, False))
+
+    chunks = []
+    for start, end, cut_start, cut_end in pieces:
+        if chunks and end - chunks[-1][0] <= max_len:
+            chunks[-1] = (chunks[-1][0], end, chunks[-1][2], cut_end)
+        else:
+            chunks.append((start, end, cut_start, cut_end))
+
+    padded = []
+    for start, end, cut_start, cut_end in chunks:
+        start = start if cut_start else max(0, start - pad)
+        end = end if cut_end else min(total_samples, end + pad)
+        if padded:
+            start = max(start, padded[-1][1])  # Pads of close neighbours must not overlap
+        padded.append((start, end))
+    return padded
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Process pool
+
+_worker = {}
+
+
+def _init_worker(path, loader):
+    _worker["samples"] = map_wav(path)
+    _worker["model"] = loader()
+
+
+def _decode_chunk(index, start, end, profile, options, compress=True):
+    audio = np.asarray(_worker["samples"][start:end], dtype=np.float32) / 32768.0
+    if compress:
+        audio, time_map = compress_pauses(audio)
+    else:
+        time_map = TimeMap.identity(len(audio))
+    model = _worker["model"]
+    replayed = getattr(model, "replayed_sec", 0.0)
+    decode_start = time.perf_counter()
+    segments, info, _ = transcribe_with_profile(model, audio, profile, **options)
+    offset = start / SAMPLE_RATE
+    return index, {
+        "segments": [{"start": round(offset + time_map.to_original(s.start), 3),
+                      "end": round(offset + time_map.to_original(s.end, end=True), 3),
+                      "text": s.text.strip()} for s in segments],
+        "language": getattr(info, "language", None),
+        "decode_time": time.perf_counter() - decode_start,
+        "decoded_sec": len(audio) / SAMPLE_RATE,
+        "cached": getattr(model, "replayed_sec", 0.0) > replayed,
+    }
+
+
+def whisper_loader(model_size, device, compute_type, cpu_threads):
+    return load_model(model_size, device=device, compute_type=compute_type,
+                      cpu_threads=cpu_threads)
+
+
+def transcribe_file(path, loader, workers=1, profile="balanced", max_chunk_sec=MAX_CHUNK_SEC,
+                    min_silence_sec=MIN_SILENCE_SEC, progress=None, compress=True, **options):
+    """Transcribe a long WAV file in parallel. Returns (segments, stats).
+
+    `loader` is a picklable callable that builds the model inside each worker.
+    Segments are dicts with file-relative start/end seconds, in time order.
+    With `compress`, pauses inside each chunk are shortened before decoding.
+    """
+    samples = map_wav(path)
+    total = len(samples)
+    vad_start = time.perf_counter()
+    regions = speech_regions(samples, min_silence_sec=min_silence_sec)
+    chunks = plan_chunks(regions, total, max_chunk_sec)
+    vad_time = time.perf_counter() - vad_start
+    del samples
+
+    options = dict(options)
+    options.setdefault("without_timestamps", False)  # Needed to place segments in the file
+    options.setdefault("condition_on_previous_text", False)  # Chunks are decoded independently
+
+    results = [None] * len(chunks)
+    decode_start = time.perf_counter()
+    if chunks:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(path, loader)) as pool:
+            futures = [pool.submit(_decode_chunk, i, start, end, profile, options, compress)
+                       for i, (start, end) in enumerate(chunks)]
+            for done, future in enumerate(futures, 1):
+                index, result = future.result()
+                results[index] = result
+                if progress:
+                    progress(done, len(chunks))
+    wall_time = time.perf_counter() - decode_start
+
+    segments = [segment for result in results for segment in result["segments"]]
+    audio_sec = total / SAMPLE_RATE
+    speech_sec = sum(end - start for start, end in chunks) / SAMPLE_RATE
+    decode_sum = sum(result["decode_time"] for result in results)
+    stats = {
+        "audio_sec": audio_sec,
+        "speech_sec": speech_sec,
+        "decoded_sec": sum(result["decoded_sec"] for result in results),
+        "chunks": len(chunks),
+        "cached_chunks": sum(result["cached"] for result in results),
+        "workers": workers,
+        "vad_time": vad_time,
+        "wall_time": wall_time,
+        "decode_time_sum": decode_sum,
+        "rtf": audio_sec / wall_time if wall_time else 0.0,  # Audio seconds per wall second
+        "speedup": decode_sum / wall_time if wall_time else 0.0,
+        "languages": sorted({r["language"] for r in results if r["language"]}),
+    }
+    return segments, stats
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Output
+
+def format_timestamp(seconds, separator=","):
+    ms = int(round(seconds * 1000))
+    hours, ms = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{ms:03d}"
+
+
+def write_output(segments, path):
+    """Write segments as .srt, .jsonl or plain text depending on the extension."""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith(".srt"):
+            for i, segment in enumerate(segments, 1):
+                f.write(f"{i}\n{format_timestamp(segment['start'])} --> "
+                        f"{format_timestamp(segment['end'])}\n{segment['text']}\n\n")
+        elif path.endswith(".jsonl"):
+            for segment in segments:
+                f.write(json.dumps(segment, ensure_ascii=False) + "\n")
+        else:
+            f.write("\n".join(segment["text"] for segment in segments) + "\n")
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Parallel transcription of a long WAV recording")
+    parser.add_argument("path", help="16 kHz mono 16-bit WAV file")
+    parser.add_argument("-o", "--output", help="Output file (.srt, .jsonl or .txt); default prints text")
+    parser.add_argument("--workers", type=int, default=max(1, cpu_count // 4),
+                        help="Decode processes (default: one per 4 cores)")
+    parser.add_argument("--cpu-threads", type=int, default=0,
+                        help="Threads per worker (default: cores / workers)")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--profile", default="balanced", choices=list(DECODING_PROFILES))
+    parser.add_argument("--language", default=None, help="Pin the language for every chunk")
+    parser.add_argument("--max-chunk", type=float, default=MAX_CHUNK_SEC, help="Max chunk seconds")
+    parser.add_argument("--keep-pauses", action="store_true",
+                        help="Decode chunks as-is instead of shortening long pauses")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_DIR, default=None,
+                        help="Reuse results for chunks already decoded with the same settings")
+    args = parser.parse_args()
+
+    cpu_threads = args.cpu_threads or max(1, cpu_count // args.workers)
+    loader = partial(whisper_loader, args.model, args.device, args.compute_type, cpu_threads)
+    if args.cache:
+        loader = partial(cached_loader, loader, f"{ModelStore().model_id(args.model)}/{args.device}/{args.compute_type}",
+                         args.cache)
+    options = {"language": args.language} if args.language else {}
+
+    print(f"🎧 {args.path}: {args.workers} workers x {cpu_threads} threads, model '{args.model}'",
+          file=sys.stderr)
+    segments, stats = transcribe_file(
+        args.path, loader, workers=args.workers, profile=args.profile,
+        max_chunk_sec=args.max_chunk, compress=not args.keep_pauses,
+        progress=lambda done, total: print(f"\r   {done}/{total} chunks", end="", file=sys.stderr),
+        **options,
+    )
+    print(file=sys.stderr)
+
+    if args.output:
+        write_output(segments, args.output)
+        print(f"💾 Saved {len(segments)} segments to {args.output}", file=sys.stderr)
+    else:
+        for segment in segments:
+            print(f"[{format_timestamp(segment['start'], '.')}] {segment['text']}")
+
+    print(f"📊 {stats['audio_sec'] / 60:.1f} min audio, {stats['speech_sec'] / 60:.1f} min speech "
+          f"in {stats['chunks']} chunks ({stats['decoded_sec'] / 60:.1f} min decoded) | VAD {stats['vad_time']:.2f}s | "
+          f"decode wall {stats['wall_time']:.1f}s (RTF {stats['rtf']:.1f}x) | "
+          f"parallel speedup {stats['speedup']:.1f}x", file=sys.stderr)
+    if args.cache:
+        print(f"🗃️  {stats['cached_chunks']}/{stats['chunks']} chunks from the result cache",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Embeddable asyncio transcription API.
+
+Importing this module has no side effects: no config file, no audio devices,
+no model. Heavy resources load in `await Transcriber.start()` (or `async with`),
+and every decode runs on an executor, so the event loop stays free for many
+concurrent sessions.
+
+    async with Transcriber(model_size="small") as transcriber:
+        result = await transcriber.transcribe(pcm_bytes)
+
+        session = transcriber.session(language="en")
+        async for result in session.stream(chunks):      # raw 16 kHz int16 PCM
+            print(result.start, result.text)
+
+        async for result in transcriber.transcribe_file("meeting.wav"):
+            print(result.start, result.text)
+
+A session endpoints its own stream with the VAD (webrtcvad when installed),
+pins its language and carries its prompt, like the live app. Utterances of one
+session decode in order; different sessions decode concurrently, up to
+`max_concurrency` at a time.
+"""
+
+import asyncio
+import collections
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from decoding_profiles import FallbackStats, transcribe_with_profile
+from endpointer import Endpointer, level_vad
+from model_manager import ModelManager
+from pause_compression import TimeMap, compress_pauses
+from session_context import SessionContext
+from speech_gate import SpeechGate
+from transcription_cache import CachedModel
+
+SAMPLE_RATE = 16000
+
+# start/end: seconds in the session stream (or file); segments: [(start, end, text)] in the
+# same time base; skipped: speech-gate reason when the audio was not decoded
+TranscriptionResult = collections.namedtuple(
+    "TranscriptionResult",
+    ["text", "start", "end", "language", "segments", "decode_time", "skipped"],
+    defaults=[None],
+)
+
+
+def whisper_loader(model_size, device, compute_type, workers):
+    from model_store import load_model
+    # num_workers lets CTranslate2 run that many decodes of one model in parallel
+    return load_model(model_size, device=device, compute_type=compute_type, num_workers=workers)
+
+
+def default_vad(sample_rate=SAMPLE_RATE):
+    try:
+        import webrtcvad
+        vad = webrtcvad.Vad(2)
+        return lambda frame: vad.is_speech(frame, sample_rate)
+    except ImportError:
+        return level_vad
+
+
+def as_int16(pcm):
+    if isinstance(pcm, (bytes, bytearray, memoryview)):
+        return np.frombuffer(pcm, dtype=np.int16)
+    return np.asarray(pcm, dtype=np.int16)
+
+
+class Transcriber:
+    """Asyncio front end to the decode pipeline; the model loads in start()."""
+
+    def __init__(self, model_size="small", device="cpu", compute_type="int8", profile="latency",
+                 loader=None, max_concurrency=1, executor=None, speech_gate=True,
+                 pause_compression=True, idle_unload_sec=0, warmup=True, cache=None):
+        self.loader = loader or partial(whisper_loader, model_size, device, compute_type,
+                                        max_concurrency)
+        self.profile = profile
+        self.max_concurrency = max_concurrency
+        self.pause_compression = pause_compression
+        self.idle_unload_sec = idle_unload_sec
+        self.warmup = warmup
+        self.gate = SpeechGate() if speech_gate else None
+        self.cache = cache  # Optional TranscriptionCache in front of the model
+        self.model_id = f"{model_size}/{device}/{compute_type}"
+        self.stats = FallbackStats()
+        self.model_manager = None
+        self._executor = executor
+        self._own_executor = executor is None
+        self.decodes = 0
+
+    @property
+    def started(self):
+        return self.model_manager is not None
+
+    async def start(self):
+        """Create the executor and load the model (off the event loop)."""
+        if self.started:
+            return self
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_concurrency,
+                                                thread_name_prefix="transcriber")
+        manager = ModelManager(self.loader, idle_unload_sec=self.idle_unload_sec,
+                               warmup=self.warmup)
+        await asyncio.get_running_loop().run_in_executor(self._executor, manager.load)
+        self.model_manager = manager
+        return self
+
+    async def close(self):
+        """Wait for running decodes, then release the model and executor."""
+        if not self.started:
+            return
+        manager, self.model_manager = self.model_manager, None
+        if self._own_executor:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+        manager.close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # ── decoding ─────────────────────────────────────────────────────────────
+    async def transcribe(self, pcm, language=None, offset=0.0, context=None, gate=True,
+                         compress=True):
+        """Transcribe one utterance of 16 kHz int16 PCM (bytes or array).
+
+        gate=False skips the speech gate, for audio already cut to speech. compress=False
+        skips pause compression, for utterances the VAD endpointer already cut.
+        """
+        if not self.started:
+            raise RuntimeError("Transcriber not started; await start() or use 'async with'")
+        samples = as_int16(pcm)
+        end = offset + len(samples) / SAMPLE_RATE
+        if gate and self.gate is not None:
+            check = self.gate.check(samples)
+            if not check.passed:
+                return TranscriptionResult("", offset, end, None, [], 0.0, check.reason)
+        options = context.transcribe_options() if context is not None else {}
+        if language:
+            options["language"] = language
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._decode, samples, offset, options, context, compress
+        )
+
+    def _decode(self, samples, offset, options, context, compress=True):
+        """Runs on the executor."""
+        if compress and self.pause_compression:
+            kept, time_map = compress_pauses(samples)
+        else:
+            kept, time_map = samples, TimeMap.identity(len(samples))
+        audio = kept.astype(np.float32) / 32768.0
+        start = time.perf_counter()
+        with self.model_manager.use() as model:
+            if self.cache is not None:
+                model = CachedModel(model, self.cache, self.model_id)
+            segments, info, _ = transcribe_with_profile(model, audio, self.profile,
+                                                        stats=self.stats, **options)
+        decode_time = time.perf_counter() - start
+        text = " ".join(segment.text for segment in segments).strip()
+        audio_sec = len(samples) / SAMPLE_RATE
+        if context is not None:
+            context.update(info, text, decode_time, audio_sec)
+        self.decodes += 1
+        timed = [(round(offset + time_map.to_original(s.start), 3),
+                  round(offset + time_map.to_original(s.end, end=True), 3), s.text.strip())
+                 for s in segments]
+        return TranscriptionResult(text, offset, offset + audio_sec, getattr(info, "language", None),
+                                   timed, decode_time)
+
+    async def transcribe_file(self, path, language=None, max_chunk_sec=30.0):
+        """Yield one result per speech chunk of a 16 kHz mono WAV, in file order.
+
+        All chunks are queued at once, so up to max_concurrency decode in parallel.
+        Chunks are not speech-gated: they are cut around speech already, and a chunk
+        groups every region within max_chunk_sec, silence between them included.
+        """
+        from transcribe_file import map_wav, plan_chunks, speech_regions
+
+        samples = map_wav(path)
+        chunks = plan_chunks(speech_regions(samples), len(samples), max_chunk_sec)
+        tasks = [asyncio.ensure_future(self.transcribe(np.array(samples[start:end]), language,
+                                                       offset=start / SAMPLE_RATE, gate=False))
+                 for start, end in chunks]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def session(self, language=None, carry_prompt=True, silence_sec=1.0, is_speech=None,
+                frame_ms=30):
+        """A new stream with its own endpointer, language lock and prompt."""
+        return TranscriptionSession(self, language, carry_prompt, silence_sec, is_speech, frame_ms)
+
+
+class TranscriptionSession:
+    """One audio stream: VAD endpointing, pinned language and carried prompt."""
+
+    def __init__(self, transcriber, language=None, carry_prompt=True, silence_sec=1.0,
+                 is_speech=None, frame_ms=30):
+        self.transcriber = transcriber
+        self.context = SessionContext(language=language, carry_prompt=carry_prompt)
+        self.endpointer = Endpointer(sample_rate=SAMPLE_RATE, frame_ms=frame_ms,
+                                     silence_sec=silence_sec)
+        self.is_speech = is_speech or default_vad()
+        self._pending = bytearray()
+
+    async def push(self, pcm):
+        """Add raw int16 PCM; returns results for the utterances it completed."""
+        self._pending.extend(pcm if isinstance(pcm, (bytes, bytearray)) else as_int16(pcm).tobytes())
+        frame_bytes = self.endpointer.frame_bytes
+        usable = len(self._pending) - len(self._pending) % frame_bytes
+        data, self._pending = bytes(self._pending[:usable]), self._pending[usable:]
+
+        results = []
+        for offset in range(0, usable, frame_bytes):
+            frame = data[offset:offset + frame_bytes]
+            utterance = self.endpointer.push(frame, self.is_speech(frame))
+            if utterance is not None:
+                results.append(await self._transcribe(utterance))
+        return results
+
+    async def flush(self):
+        """End of stream: transcribe whatever speech is still buffered."""
+        utterance = self.endpointer.flush()
+        return [await self._transcribe(utterance)] if utterance is not None else []
+
+    async def stream(self, chunks):
+        """Yield results for an iterable or async iterable of PCM chunks, then flush."""
+        if hasattr(chunks, "__aiter__"):
+            async for chunk in chunks:
+                for result in await self.push(chunk):
+                    yield result
+        else:
+            for chunk in chunks:
+                for result in await self.push(chunk):
+                    yield result
+        for result in await self.flush():
+            yield result
+
+    async def _transcribe(self, utterance):
+        # Cut to speech by the endpointer: a soft phrase must not be trimmed as a pause
+        return await self.transcriber.transcribe(utterance.pcm, offset=utterance.start,
+                                                 context=self.context, compress=False)
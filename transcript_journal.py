@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Searchable transcript journal.
+
+Every utterance is appended as one JSON line to a size-rotated segment file
+(segment-000001.jsonl, segment-000002.jsonl, ...). Segments are never rewritten.
+An inverted index (term -> entry ids) lives next to them in SQLite and is
+updated incrementally on every append, so a search only touches the postings
+for the query terms and then seeks straight to the matching lines.
+
+Usage:
+    python transcript_journal.py search meeting notes
+    python transcript_journal.py search "deploy*" --limit 50
+    python transcript_journal.py recent --limit 10
+    python transcript_journal.py stats
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcripts")
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024  # Rotate segment files at 16 MB
+INDEX_FILE = "index.sqlite3"
+RECORD_START = b'{"ts": '  # Every line starts like this (see append)
+
+TOKEN_RE = re.compile(r"[\w']+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    entry_id INTEGER NOT NULL,
+    PRIMARY KEY (term, entry_id)
+) WITHOUT ROWID;
+"""
+
+
+def tokenize(text):
+    """Split text into lowercase index terms."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def parse_line(line):
+    """Return (start, record) for a segment line, or (0, None) if it holds no record.
+
+    A torn write followed by later appends leaves the fragment and the next
+    record on one line; the scan then resynchronises at the last record start.
+    """
+    try:
+        return 0, json.loads(line)
+    except ValueError:
+        pass
+    start = line.rfind(RECORD_START, 1)
+    if start > 0:
+        try:
+            return start, json.loads(line[start:])
+        except ValueError:
+            pass
+    return 0, None
+
+
+class TranscriptJournal:
+    """Append-only, segment-rotated utterance log with an on-disk inverted index."""
+
+    def __init__(self, directory=DEFAULT_JOURNAL_DIR, segment_max_bytes=SEGMENT_MAX_BYTES):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(directory, INDEX_FILE), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+        segments = self._segment_numbers()
+        self._segment = segments[-1] if segments else 1
+        self._file = open(self._segment_path(self._segment), "ab")
+        self._terminate_torn_tail()
+        self._recover()
+
+    # ── segment files ────────────────────────────────────────────────────────
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"segment-{number:06d}.jsonl")
+
+    def _segment_numbers(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = re.fullmatch(r"segment-(\d{6})\.jsonl", name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _rotate_if_needed(self):
+        if self._file.tell() >= self.segment_max_bytes:
+            self._file.close()
+            self._segment += 1
+            self._file = open(self._segment_path(self._segment), "ab")
+
+    def _terminate_torn_tail(self):
+        """End a torn last line so the next append does not run into it."""
+        if self._file.tell() == 0:
+            return
+        with open(self._segment_path(self._segment), "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                self._file.write(b"\n")
+                self._file.flush()
+
+    # ── indexing ─────────────────────────────────────────────────────────────
+    def _index_entry(self, record, segment, offset, length):
+        cursor = self._db.execute(
+            "INSERT INTO entries (segment, offset, length, ts) VALUES (?, ?, ?, ?)",
+            (segment, offset, length, record.get("ts", 0.0)),
+        )
+        entry_id = cursor.lastrowid
+        terms = set(tokenize(record.get("text", "")))
+        self._db.executemany(
+            "INSERT OR IGNORE INTO postings (term, entry_id) VALUES (?, ?)",
+            [(term, entry_id) for term in terms],
+        )
+        return entry_id
+
+    def _recover(self):
+        """Index any lines appended after the last indexed entry (e.g. after a crash)."""
+        row = self._db.execute(
+            "SELECT segment, offset + length FROM entries ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        start_segment, start_offset = row if row else (1, 0)
+
+        recovered = 0
+        for number in self._segment_numbers():
+            if number < start_segment:
+                continue
+            offset = start_offset if number == start_segment else 0
+            with open(self._segment_path(number), "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn write at the tail, ignore it
+                    start, record = parse_line(line)
+                    if record is not None:
+                        self._index_entry(record, number, offset + start, len(line) - start)
+                        recovered += 1
+                    offset += len(line)
+        if recovered:
+            self._db.commit()
+        return recovered
+
+    # ── public API ───────────────────────────────────────────────────────────
+    def append(self, text, **fields):
+        """Append one utterance and index it. Returns its entry id."""
+        record = {"ts": time.time(), "text": text}
+        record.update(fields)
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+        with self._lock:
+            self._rotate_if_needed()
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            entry_id = self._index_entry(record, self._segment, offset, len(line))
+            self._db.commit()
+        return entry_id
+
+    def _read_entries(self, entry_ids):
+        if not entry_ids:
+            return []
+        placeholders = ",".join("?" * len(entry_ids))
+        rows = self._db.execute(
+            f"SELECT id, segment, offset, length FROM entries WHERE id IN ({placeholders}) "
+            "ORDER BY id DESC",
+            entry_ids,
+        ).fetchall()
+
+        results = []
+        handles = {}
+        try:
+            for entry_id, segment, offset, length in rows:
+                if segment not in handles:
+                    handles[segment] = open(self._segment_path(segment), "rb")
+                handle = handles[segment]
+                handle.seek(offset)
+                record = json.loads(handle.read(length))
+                record["id"] = entry_id
+                results.append(record)
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return results
+
+    def search(self, query, limit=20):
+        """Return the newest entries containing every query term (a trailing * matches a prefix)."""
+        terms = query.lower().split()
+        clauses = []
+        params = []
+        for term in terms:
+            if term.endswith("*") and len(term) > 1:
+                prefix = tokenize(term[:-1])
+                if not prefix:
+                    continue
+                clauses.append("SELECT entry_id FROM postings WHERE term >= ? AND term < ?")
+                params.extend([prefix[0], prefix[0] + "\uffff"])
+            else:
+                for token in tokenize(term):
+                    clauses.append("SELECT entry_id FROM postings WHERE term = ?")
+                    params.append(token)
+        if not clauses:
+            return []
+
+        sql = " INTERSECT ".join(clauses) + " ORDER BY entry_id DESC LIMIT ?"
+        with self._lock:
+            entry_ids = [row[0] for row in self._db.execute(sql, params + [limit])]
+            return self._read_entries(entry_ids)
+
+    def get(self, entry_id):
+        """Return a single entry by id, or None."""
+        with self._lock:
+            records = self._read_entries([entry_id])
+        return records[0] if records else None
+
+    def recent(self, limit=20):
+        """Return the newest entries."""
+        with self._lock:
+            entry_ids = [row[0] for row in self._db.execute(
+                "SELECT id FROM entries ORDER BY id DESC LIMIT ?", (limit,)
+            )]
+            return self._read_entries(entry_ids)
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            terms = self._db.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+        segments = self._segment_numbers()
+        size = sum(os.path.getsize(self._segment_path(n)) for n in segments)
+        return {"entries": entries, "terms": terms, "segments": len(segments), "bytes": size}
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._db.close()
+
+
+def print_entries(entries):
+    for entry in entries:
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["ts"]))
+        duration = entry.get("duration")
+        extra = f" ({duration:.1f}s)" if duration is not None else ""
+        print(f"[{entry['id']}] {stamp}{extra}: {entry['text']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the transcript journal")
+    parser.add_argument("--dir", default=DEFAULT_JOURNAL_DIR, help="Journal directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = sub.add_parser("search", help="Find entries containing all terms")
+    search_parser.add_argument("terms", nargs="+")
+    search_parser.add_argument("--limit", type=int, default=20)
+
+    recent_parser = sub.add_parser("recent", help="Show the newest entries")
+    recent_parser.add_argument("--limit", type=int, default=20)
+
+    sub.add_parser("stats", help="Show journal size")
+    args = parser.parse_args()
+
+    journal = TranscriptJournal(args.dir)
+    try:
+        start = time.perf_counter()
+        if args.command == "search":
+            results = journal.search(" ".join(args.terms), limit=args.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+            print_entries(results)
+            print(f"\n🔎 {len(results)} match(es) in {elapsed:.1f}ms")
+        elif args.command == "recent":
+            print_entries(journal.recent(limit=args.limit))
+        else:
+            stats = journal.stats()
+            print(f"📚 {stats['entries']} entries, {stats['terms']} distinct terms, "
+                  f"{stats['segments']} segment(s), {stats['bytes'] / 1024**2:.1f} MB")
+    finally:
+        journal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of transcription results.
+
+Replays, benchmark reruns and batch re-processing decode the same audio with
+the same settings again and again. CachedModel sits in front of
+model.transcribe(). Its key is a BLAKE2b hash of the audio samples plus the
+model identity and every decoding option, including the prompt and language,
+so any change in input or settings is a miss. Results are kept in two tiers:
+  - memory: a bounded LRU of recent results
+  - disk (optional): one small JSON file per result; once the directory is
+    past its size budget the least recently used files are deleted
+Writes go through a temp file and os.replace, so several processes (e.g. the
+transcribe_file.py workers) can share one cache directory.
+
+A miss stays lazy: segments are passed through as the model produces them,
+and the result is stored only once the caller has iterated all of them. A
+decode that is cancelled part-way through is therefore never cached.
+
+Usage:
+    python transcription_cache.py stats --dir .transcription_cache
+    python transcription_cache.py clear --dir .transcription_cache
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".transcription_cache")
+CACHE_VERSION = 1  # Bump when the stored record format changes
+
+# Segment and info attributes kept in a cached result (what the pipeline reads)
+SEGMENT_FIELDS = ("id", "start", "end", "text", "avg_logprob", "compression_ratio", "no_speech_prob",
+                  "temperature")
+INFO_FIELDS = ("language", "language_probability", "duration", "duration_after_vad")
+
+# After disk eviction the directory is trimmed down to this fraction of the budget
+EVICT_TARGET_RATIO = 0.75
+
+
+def audio_key(audio):
+    """Hash of the samples, dtype and length; no copy for contiguous arrays."""
+    audio = np.ascontiguousarray(audio)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{audio.dtype.str}:{audio.shape}".encode())
+    digest.update(memoryview(audio).cast("B"))
+    return digest.hexdigest()
+
+
+def options_key(model_id, options):
+    """Stable text form of the model identity and decoding options."""
+    return json.dumps({"v": CACHE_VERSION, "model": model_id, "options": options},
+                      sort_keys=True, default=repr)
+
+
+def cache_key(audio, model_id, options):
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(audio_key(audio).encode())
+    digest.update(options_key(model_id, options).encode())
+    return digest.hexdigest()
+
+
+def to_record(segments, info, decode_time):
+    return {
+        "segments": [{field: getattr(s, field) for field in SEGMENT_FIELDS if hasattr(s, field)}
+                     for s in segments],
+        "info": {field: getattr(info, field) for field in INFO_FIELDS if hasattr(info, field)},
+        "decode_time": decode_time,
+    }
+
+
+def from_record(record):
+    return ([SimpleNamespace(**segment) for segment in record["segments"]],
+            SimpleNamespace(**record["info"]))
+
+
+class TranscriptionCache:
+    """Two-tier (memory LRU, optional disk) store of transcription records. Thread-safe."""
+
+    def __init__(self, max_entries=512, directory=None, max_disk_mb=200):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.saved_sec = 0.0  # Decode time the hits would have cost
+        self._disk_bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    # ── lookup ───────────────────────────────────────────────────────────────
+    def get(self, key):
+        """The cached record for `key`, or None (counted as a miss)."""
+        with self._lock:
+            record = self._memory.get(key)
+            if record is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.saved_sec += record["decode_time"]
+                return record
+        record = self._read(key)
+        with self._lock:
+            if record is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self.saved_sec += record["decode_time"]
+            self._remember(key, record)
+        return record
+
+    def put(self, key, record):
+        with self._lock:
+            self.stores += 1
+            self._remember(key, record)
+        if self.directory:
+            self._write(key, record)
+
+    def _remember(self, key, record):
+        self._memory[key] = record
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ── disk tier ────────────────────────────────────────────────────────────
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                record = json.load(f)
+            os.utime(path)  # Recency for eviction
+            return record
+        except (OSError, ValueError):
+            return None  # Missing, evicted by another process, or a torn file
+
+    def _write(self, key, record):
+        path = self._path(key)
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            size = os.path.getsize(temp)
+            os.replace(temp, path)
+        except OSError as e:
+            print(f"⚠️  Transcription cache write failed: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += size
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._evict()
+
+    def _disk_files(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict(self):
+        """Delete least recently used files until the directory is under its target size."""
+        files = sorted(self._disk_files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * EVICT_TARGET_RATIO
+        evicted = 0
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Another process got there first
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.evictions += evicted
+
+    @property
+    def disk_bytes(self):
+        with self._lock:
+            return self._disk_bytes
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = 0
+        if self.directory:
+            for path, _, _ in self._disk_files():
+                os.remove(path)
+
+    def summary(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            if not lookups:
+                return "No cache lookups"
+            text = (f"{self.hits + self.disk_hits}/{lookups} hits "
+                    f"({(self.hits + self.disk_hits) / lookups:.0%}, {self.disk_hits} from disk) | "
+                    f"{self.saved_sec:.1f}s of decoding skipped | {len(self._memory)} in memory")
+            if self.directory:
+                text += f", {self._disk_bytes / 1024 / 1024:.1f} MB on disk"
+            return text
+
+
+class CachedModel:
+    """Wraps a model so transcribe() consults `cache` first. Other attributes pass through.
+
+    With model=None, `borrow()` is called for the model on the first miss, so a hit
+    never loads or waits for one (e.g. borrow enters ModelManager.use()).
+    """
+
+    def __init__(self, model, cache, model_id, borrow=None):
+        self._model = model
+        self._borrow = borrow
+        self.cache = cache
+        self.model_id = model_id
+        self.replayed_sec = 0.0  # Original decode time of results served from the cache
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self._borrow()
+        return self._model
+
+    @property
+    def borrowed(self):
+        """False while every transcribe() so far was a hit (no model needed)."""
+        return self._model is not None
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def transcribe(self, audio, **options):
+        key = cache_key(audio, self.model_id, options)
+        record = self.cache.get(key)
+        if record is not None:
+            self.replayed_sec += record["decode_time"]
+            segments, info = from_record(record)
+            return iter(segments), info
+        start = time.perf_counter()
+        segments, info = self.model.transcribe(audio, **options)
+        return self._store_when_done(key, segments, info, start), info
+
+    def transcribe_many(self, audios, decode, **options):
+        """Cached results for utterances decoded together, e.g. by batch_decoder.transcribe_batch.
+
+        decode(misses) -> [(segments, info, used_fallback, decode_time)] is called once, with
+        only the audios that missed (it reaches the model through self.model). `options`
+        key the results and must cover every setting that changes them.
+        Returns (results, hits), both in input order.
+        """
+        keys = [cache_key(audio, self.model_id, options) for audio in audios]
+        results, hits, misses = [None] * len(audios), [False] * len(audios), []
+        for i, key in enumerate(keys):
+            start = time.perf_counter()
+            record = self.cache.get(key)
+            if record is None:
+                misses.append(i)
+                continue
+            self.replayed_sec += record["decode_time"]
+            segments, info = from_record(record)
+            results[i] = (segments, info, False, time.perf_counter() - start)
+            hits[i] = True
+        if misses:
+            for i, result in zip(misses, decode([audios[i] for i in misses])):
+                segments, info, _, decode_time = result
+                self.cache.put(keys[i], to_record(segments, info, decode_time))
+                results[i] = result
+        return results, hits
+
+    def _store_when_done(self, key, segments, info, start):
+        collected = []
+        for segment in segments:
+            collected.append(segment)
+            yield segment
+        self.cache.put(key, to_record(collected, info, time.perf_counter() - start))
+
+
+def cached_loader(loader, model_id, directory=DEFAULT_CACHE_DIR, max_entries=512, max_disk_mb=200):
+    """Picklable loader wrapper for worker processes: loader() behind a disk-backed cache."""
+    return CachedModel(loader(), TranscriptionCache(max_entries, directory, max_disk_mb), model_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the on-disk transcription cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--dir", default=DEFAULT_CACHE_DIR, help="Cache directory")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print(f"📭 No cache at {args.dir}")
+        return
+    cache = TranscriptionCache(directory=args.dir)
+    files = cache._disk_files()
+    if args.command == "clear":
+        cache.clear()
+        print(f"🧹 Removed {len(files)} cached results from {args.dir}")
+        return
+    print(f"🗃️  {len(files)} cached results, {cache.disk_bytes / 1024 / 1024:.1f} MB in {args.dir}")
+    if files:
+        oldest = min(mtime for _, _, mtime in files)
+        print(f"   Least recently used: {time.strftime('%Y-%m-%d %H:%M', time.localtime(oldest))}")
+
+
+if __name__ == "__main__":
+    main()
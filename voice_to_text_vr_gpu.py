@@ -1,7 +1,9 @@
+import collections
 import os
 import queue
 import threading
 import warnings
+from contextlib import ExitStack
 
 # Suppress all warnings before importing libraries
 warnings.filterwarnings('ignore', category=UserWarning)
@@ -9,17 +11,40 @@ warnings.filterwarnings('ignore', message='.*pkg_resources.*')
 warnings.filterwarnings('ignore', message='.*CUDA capability.*')
 
 import webrtcvad
-from faster_whisper import WhisperModel
 import sounddevice as sd
 import numpy as np
 import pyperclip
 import pyautogui
 import time
-import tempfile
-import wave
 import pvporcupine
 import torch
 
+from decoding_profiles import FallbackStats, transcribe_with_profile
+from decode_scheduler import (
+    CONTINUOUS_PRIORITY,
+    HOTKEY_PRIORITY,
+    DecodeCancelled,
+    DecodeScheduler,
+)
+from transcript_journal import DEFAULT_JOURNAL_DIR, TranscriptJournal
+from audio_archive import DEFAULT_ARCHIVE_DIR, AudioArchive
+from pipeline_state import PipelineStateMachine, State
+from session_context import SessionContext
+from model_manager import ModelManager
+from multiprocess_pipeline import ProcessDecodePool
+from endpointer import Endpointer
+from remote_workers import RemoteDecodeError, RemoteDecodePool
+from shadow_decoding import DEFAULT_SHADOW_LOG, SHADOW_KIND, ShadowDecoder
+from speech_gate import SpeechGate
+from pause_compression import compress_pauses
+from batch_decoder import transcribe_batch
+from resampler import FrameChunker, PolyphaseResampler, to_int16
+from sampling_profiler import SamplingProfiler, install_signal_toggle
+from stream_health import AdaptiveLatency, StreamHealth
+from incremental_features import FeatureStats, IncrementalLogMel, attach_precomputed_features
+from transcription_cache import DEFAULT_CACHE_DIR, CachedModel, TranscriptionCache
+from model_store import DEFAULT_STORE_DIR, ModelStore, load_model
+
 # Try to import pynput for global hotkeys, fallback if not available
 try:
     from pynput import keyboard
@@ -53,24 +78,38 @@ def load_config():
         print(f"❌ Error reading config.txt: {e}")
         exit(1)
 
-# Load configuration
-config = load_config()
-PORCUPINE_ACCESS_KEY = config.get('PORCUPINE_ACCESS_KEY', '')
-
-if not PORCUPINE_ACCESS_KEY:
-    print("❌ Error: PORCUPINE_ACCESS_KEY not found in config.txt")
-    print("   Please add your key to config.txt")
-    print("   Get your free key from: https://picovoice.ai/platform/porcupine/")
-    exit(1)
+def load_access_key():
+    """The Porcupine key from config.txt (read by main(), not on import)."""
+    access_key = load_config().get('PORCUPINE_ACCESS_KEY', '')
+    if not access_key:
+        print("❌ Error: PORCUPINE_ACCESS_KEY not found in config.txt")
+        print("   Please add your key to config.txt")
+        print("   Get your free key from: https://picovoice.ai/platform/porcupine/")
+        exit(1)
+    return access_key
 
 # ─────────────────────────────────────────────────────────────────────────────
 # CONFIGURATION
 SAMPLE_RATE = 16000
 CHANNELS = 1
 FRAME_MS = 30
+FRAME_SAMPLES = int(SAMPLE_RATE * FRAME_MS / 1000)
+# Open the mic at its native rate (e.g. 44.1/48 kHz) and resample to 16 kHz ourselves;
+# one stream then feeds VAD, Porcupine and Whisper. CAPTURE_RATE None = device default.
+NATIVE_RATE_CAPTURE = True
+CAPTURE_RATE = None
+# Raise stream latency/block size after input overflows, lower it again once stable
+ADAPTIVE_LATENCY = True
 VAD_AGGRESSIVENESS = 2
+# Skip buffers the VAD passed that hold no real speech (coughs, keyboard, noise bursts)
+SPEECH_GATE = True
+SPEECH_GATE_MIN_VOICED_SEC = 0.25
+SPEECH_GATE_MIN_VOICED_RATIO = 0.2  # Of the buffer with leading/trailing silence trimmed
+SPEECH_GATE_MAX_FLATNESS = 0.4
 SILENCE_DURATION_SEC = 1.0
 ONE_TIME_RECORD_DURATION_SEC = 10.0  # Maximum recording time for one-time transcription
+HOTKEY_DEBOUNCE_SEC = 0.4  # Presses closer together than this are ignored
+PASTE_SETTLE_SEC = 0.2  # Pause after Ctrl+V so the target app reads the clipboard
 WAKE_WORD = "computer"
 SLEEP_WORD = "terminator"  # Using available keyword instead of "twizzlers"
 # Storage optimization settings
@@ -80,83 +119,458 @@ BUFFER_CHECK_INTERVAL = 100  # Check buffer size every N frames
 WHISPER_MODEL_SIZE = "small"  # Options: tiny, base, small, medium, large-v2, large-v3
 COMPUTE_TYPE = "float16"  # Use FP16 for faster inference on RTX GPUs
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+# Converted models (python model_store.py import small --quantization int8); models not
+# in the store are loaded through the download cache instead
+MODEL_STORE_DIR = DEFAULT_STORE_DIR
+# Decoding profile: latency (greedy + beam fallback), balanced, accuracy (beam 5)
+DECODING_PROFILE = "latency"
+# Session language: None = detect once and pin it, or e.g. "en" to never detect
+SESSION_LANGUAGE = None
+CARRY_PROMPT = True  # Feed the tail of earlier utterances to the decoder as a prompt
+# Unload the model after this many idle seconds (0 = keep it resident); it is
+# reloaded in the background as soon as the wake word or hotkey fires
+MODEL_IDLE_UNLOAD_SEC = 15 * 60
+# threaded: decode in this process; multiprocess: capture/VAD/wake word stay here
+# and Whisper runs in DECODE_WORKERS separate processes fed through shared memory.
+# The scheduler still hands out one decode at a time (results paste in order), so more
+# than one worker adds memory but no parallelism here.
+PIPELINE_MODE = "threaded"
+DECODE_WORKERS = 1
+# Remote worker nodes ("host:port", run: python remote_workers.py serve). Utterances go to
+# the least-loaded healthy node; the local model is used if none answers in time.
+REMOTE_WORKERS = []
+REMOTE_TIMEOUT_SEC = 5.0
+# Compute log-mel features while the user is still speaking (threaded mode only)
+PRECOMPUTE_FEATURES = True
+# Trim silence around the speech and shorten long pauses in hotkey dictations before encoding
+# (continuous utterances are already cut to speech by the VAD)
+PAUSE_COMPRESSION = True
+PAUSE_MARGIN_SEC = 0.2
+PAUSE_MAX_SEC = 0.6
+# When continuous utterances queue up behind a decode, up to this many are decoded in one
+# batched call (1 = always one at a time), capped at DECODE_BATCH_MAX_SEC of audio so the
+# first of them is not held back for long. Batched utterances share one language and prompt.
+# Off until measured: run batch_decoder.py with your model and pick the fastest size.
+DECODE_BATCH_SIZE = 1
+DECODE_BATCH_MAX_SEC = 60
+FEATURE_MELS = 128 if "large-v3" in WHISPER_MODEL_SIZE or "turbo" in WHISPER_MODEL_SIZE else 80
+# Shadow A/B: also decode every utterance with a candidate config (never pasted)
+# and log both results; compare with: python shadow_decoding.py
+SHADOW_ENABLED = False
+SHADOW_MODEL_SIZE = "medium"
+SHADOW_COMPUTE_TYPE = COMPUTE_TYPE
+SHADOW_PROFILE = DECODING_PROFILE
+SHADOW_MAX_SHARE = 0.25  # Max fraction of wall time the shadow may spend decoding
+SHADOW_LOG = DEFAULT_SHADOW_LOG
+# Transcript journal (searchable with: python transcript_journal.py search <words>)
+JOURNAL_ENABLED = True
+JOURNAL_DIR = DEFAULT_JOURNAL_DIR
+# Utterance audio archive for replay/regression corpora (python audio_archive.py list)
+ARCHIVE_AUDIO = False
+ARCHIVE_DIR = DEFAULT_ARCHIVE_DIR
+ARCHIVE_MAX_MB = 500  # Oldest utterances are evicted beyond this size
+ARCHIVE_COMPRESS = False  # Delta + zlib per utterance (disables zero-copy reads)
+# Sampling profiler, toggled with Ctrl+Alt+P or SIGUSR1 (Ctrl+Break on Windows)
+PROFILE_WINDOW_SEC = 15
+PROFILE_DIR = "profiles"
+# Reuse results for audio already decoded with identical settings (replays, re-runs);
+# TRANSCRIPTION_CACHE_DIR None keeps the cache in memory only
+TRANSCRIPTION_CACHE = False
+TRANSCRIPTION_CACHE_DIR = DEFAULT_CACHE_DIR
+TRANSCRIPTION_CACHE_ENTRIES = 256
+TRANSCRIPTION_CACHE_MAX_MB = 100
 # ─────────────────────────────────────────────────────────────────────────────
 
-# Load Whisper model once with GPU acceleration
-print(f"🔧 Loading Whisper model '{WHISPER_MODEL_SIZE}' on {DEVICE.upper()}...")
-if DEVICE == "cuda":
-    print(f"   🎮 GPU: {torch.cuda.get_device_name(0)}")
-    print(f"   💾 VRAM Available: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
+def load_whisper_model():
+    """Load the Whisper model with GPU acceleration."""
+    print(f"🔧 Loading Whisper model '{WHISPER_MODEL_SIZE}' on {DEVICE.upper()}...")
+    if DEVICE == "cuda":
+        print(f"   🎮 GPU: {torch.cuda.get_device_name(0)}")
+        print(f"   💾 VRAM Available: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
+
+    with stream_health.activity("loading model"):
+        model = load_model(
+            WHISPER_MODEL_SIZE,
+            device=DEVICE,
+            compute_type=COMPUTE_TYPE if DEVICE == "cuda" else "int8",
+            store=MODEL_STORE_DIR,
+        )
+    # Lets decodes reuse features computed during capture
+    attach_precomputed_features(model)
+    return model
+
+def load_shadow_model():
+    """Load the candidate model used for shadow decoding."""
+    print(f"🔧 Loading shadow model '{SHADOW_MODEL_SIZE}' on {DEVICE.upper()}...")
+    return load_model(
+        SHADOW_MODEL_SIZE,
+        device=DEVICE,
+        compute_type=SHADOW_COMPUTE_TYPE if DEVICE == "cuda" else "int8",
+        store=MODEL_STORE_DIR,
+    )
+
+# Single owner of the pipeline mode (idle / listening / transcribing / one-time)
+pipeline = PipelineStateMachine()
+
+# Overflow/gap accounting for both input streams, tagged with what the app was doing
+# (created before the model load, which is tagged as an activity)
+stream_latency = AdaptiveLatency(enabled=ADAPTIVE_LATENCY)
+stream_health = StreamHealth(stream_latency, state_provider=lambda: pipeline.state.value)
+
+# Created by start_pipeline() (called from main()), so importing this module loads
+# no model, starts no threads and opens nothing on disk
+model_manager = None
+scheduler = None
+shadow = None
+result_cache = None
+cache_model_id = None
+journal = None
+audio_archive = None
+porcupine = None
+decode_pool = None
+remote_pool = None
+capture_resampler = None  # Set up per stream in open_input_streams (native-rate capture)
+wakeword_chunker = None
+vad_chunker = None
+remote_fallbacks = 0
+batched_results = {}  # Queued DecodeJob -> its result, decoded in an earlier job's batch
+decode_batches = 0
+batched_utterances = 0
+pause_trimmed_sec = 0.0  # Audio cut by pause compression before decoding
+
+# One decode as the app uses it: the result, plus the PCM (after pause compression) and the
+# options that were decoded, which the shadow decoder reuses. cached: served by the result cache.
+Decoded = collections.namedtuple(
+    "Decoded", ["segments", "info", "used_fallback", "decode_time", "pcm", "options", "cached"],
+    defaults=[False],
+)
+
+# Fallback counters for the decoding profile
+decode_stats = FallbackStats()
+feature_stats = FeatureStats()
+
+# Pinned language and carried prompt shared by every utterance in this session
+session = SessionContext(language=SESSION_LANGUAGE, carry_prompt=CARRY_PROMPT)
 
-model = WhisperModel(
-    WHISPER_MODEL_SIZE,
-    device=DEVICE,
-    compute_type=COMPUTE_TYPE if DEVICE == "cuda" else "int8"
+# Idle until toggled; writes a flamegraph .folded file and a Chrome trace per window
+profiler = SamplingProfiler(
+    output_dir=PROFILE_DIR,
+    on_done=lambda folded, trace: print(f"🔬 Profile saved: {folded}, {trace}\n   {profiler.summary()}"),
 )
-print("✅ Model loaded successfully!")
 
 # VAD instance
 vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
 
-# Queue to pass audio frames
+# Queue to pass audio frames (None wakes the consumer after a state change)
 audio_queue = queue.Queue()
-
-# Global state for transcription mode
-transcribing = False
-one_time_transcribing = False
 one_time_audio_queue = queue.Queue()
 
-# Wake-word and sleep-word detectors
-porcupine = pvporcupine.create(
-    access_key=PORCUPINE_ACCESS_KEY,
-    keywords=[WAKE_WORD, SLEEP_WORD]
-)
+speech_gate = SpeechGate(
+    sample_rate=SAMPLE_RATE,
+    frame_ms=FRAME_MS,
+    min_voiced_sec=SPEECH_GATE_MIN_VOICED_SEC,
+    min_voiced_ratio=SPEECH_GATE_MIN_VOICED_RATIO,
+    max_flatness=SPEECH_GATE_MAX_FLATNESS,
+) if SPEECH_GATE else None
+
+last_hotkey_press = 0.0
+last_hotkey_job = None
+
+def start_pipeline():
+    """Create the decode side: model, scheduler, result cache, journal, archive and shadow."""
+    global model_manager, scheduler, shadow, result_cache, cache_model_id, journal, audio_archive
+
+    # Load Whisper model once at startup; it is evicted and reloaded around idle periods.
+    # In multiprocess mode the decode workers load their own copy in main() instead, and
+    # with remote workers the local model is only loaded if a fallback is needed.
+    model_manager = ModelManager(load_whisper_model, idle_unload_sec=MODEL_IDLE_UNLOAD_SEC)
+    if PIPELINE_MODE == "threaded" and not REMOTE_WORKERS:
+        model_manager.load()
+        print("✅ Model loaded successfully!")
+
+    # Everything besides the audio and decode options that changes the output
+    cache_model_id = (f"{ModelStore(MODEL_STORE_DIR).model_id(WHISPER_MODEL_SIZE)}/{DEVICE}/"
+                      f"{COMPUTE_TYPE if DEVICE == 'cuda' else 'int8'}")
+    result_cache = (TranscriptionCache(TRANSCRIPTION_CACHE_ENTRIES, TRANSCRIPTION_CACHE_DIR,
+                                       TRANSCRIPTION_CACHE_MAX_MB) if TRANSCRIPTION_CACHE else None)
+
+    # Searchable record of everything transcribed
+    journal = TranscriptJournal(JOURNAL_DIR) if JOURNAL_ENABLED else None
+
+    # Optional copy of every decoded utterance's audio
+    audio_archive = AudioArchive(
+        ARCHIVE_DIR, max_bytes=ARCHIVE_MAX_MB * 1024 * 1024, compress=ARCHIVE_COMPRESS
+    ) if ARCHIVE_AUDIO else None
+
+    # One decode worker: hotkey jobs run ahead of queued continuous jobs, and
+    # shadow decodes only run when nothing else is waiting
+    scheduler = DecodeScheduler(preemptible_kinds=(SHADOW_KIND,))
+
+    # Candidate configuration decoded in the background for comparison
+    shadow = ShadowDecoder(
+        scheduler,
+        ModelManager(load_shadow_model, idle_unload_sec=MODEL_IDLE_UNLOAD_SEC),
+        SHADOW_PROFILE,
+        primary_label=f"{WHISPER_MODEL_SIZE}/{COMPUTE_TYPE}/{DECODING_PROFILE}",
+        shadow_label=f"{SHADOW_MODEL_SIZE}/{SHADOW_COMPUTE_TYPE}/{SHADOW_PROFILE}",
+        log_path=SHADOW_LOG,
+        max_share=SHADOW_MAX_SHARE,
+        sample_rate=SAMPLE_RATE,
+    ) if SHADOW_ENABLED and PIPELINE_MODE == "threaded" else None
+
+def journal_utterance(text, buffer, decode_time, info, used_fallback, source):
+    """Append a transcribed utterance and its decode stats to the journal."""
+    if journal is None:
+        return -1
+    try:
+        return journal.append(
+            text,
+            source=source,
+            duration=len(buffer) / (2 * SAMPLE_RATE),
+            decode_time=round(decode_time, 4),
+            profile=DECODING_PROFILE,
+            fallback=used_fallback,
+            language=getattr(info, "language", None),
+        )
+    except Exception as e:
+        print(f"⚠️  Warning: Could not write transcript journal: {e}")
+        return -1
 
-def transcribe_audio_buffer(buffer, message_prefix="📝 You said", check_sleep_word=False):
-    """Transcribe audio buffer with temp file handling and text output."""
-    global transcribing
-    
-    temp_file = None
+def archive_utterance(buffer, entry_id):
+    """Keep a copy of the utterance audio before the temp file is deleted."""
+    if audio_archive is None:
+        return
+    try:
+        audio_archive.append(buffer, SAMPLE_RATE, entry_id=entry_id)
+    except Exception as e:
+        print(f"⚠️  Warning: Could not archive utterance audio: {e}")
+
+def new_feature_accumulator():
+    """Incremental log-mel for one utterance, or None when features are computed at decode time."""
+    if not PRECOMPUTE_FEATURES or PIPELINE_MODE != "threaded":
+        return None
+    return IncrementalLogMel(FEATURE_MELS, stats=feature_stats)
+
+def decode_buffer(buffer, cancel_event=None, features=None, compress=False):
+    """Decode PCM in this process or in a worker. Returns a Decoded.
+
+    `features` is the (audio, log-mel) pair from an IncrementalLogMel, if any.
+    `compress` applies pause compression (hotkey dictations, not VAD-endpointed audio).
+    """
+    global remote_fallbacks, pause_trimmed_sec
+    options = session.transcribe_options()
+    if compress and PAUSE_COMPRESSION:
+        samples, time_map = compress_pauses(np.frombuffer(buffer, dtype=np.int16), SAMPLE_RATE,
+                                            FRAME_MS, PAUSE_MARGIN_SEC, PAUSE_MAX_SEC)
+        if time_map.removed_sec:
+            # Segment times are only used for text here, so time_map is not applied
+            buffer = samples.tobytes()
+            features = None  # Precomputed features no longer match the audio
+            pause_trimmed_sec += time_map.removed_sec
+    if decode_pool is not None:
+        # PCM goes through shared memory; no model in this process
+        with stream_health.activity("decoding"):
+            return Decoded(*decode_pool.transcribe(buffer, DECODING_PROFILE, options,
+                                                   stats=decode_stats, cancel_event=cancel_event),
+                           buffer, options)
+    if remote_pool is not None:
+        try:
+            with stream_health.activity("decoding"):
+                return Decoded(*remote_pool.transcribe(buffer, DECODING_PROFILE, options,
+                                                       stats=decode_stats, cancel_event=cancel_event),
+                               buffer, options)
+        except RemoteDecodeError as e:
+            remote_fallbacks += 1
+            print(f"⚠️  Remote transcription failed ({e}), using the local model")
+
+    if features is not None:
+        audio, mel = features
+    else:
+        audio, mel = np.frombuffer(buffer, dtype=np.int16).astype(np.float32) / 32768.0, None
+
+    with ExitStack() as borrowed, stream_health.activity("decoding"):
+        waited = 0.0  # Time spent borrowing (and maybe reloading) the model, not decoding
+
+        def borrow():
+            nonlocal waited
+            start = time.perf_counter()
+            model = borrowed.enter_context(model_manager.use())
+            if mel is not None:
+                borrowed.enter_context(model.feature_extractor.provide(audio, mel))
+            waited += time.perf_counter() - start
+            return model
+
+        decode_start = time.perf_counter()
+        # A cache hit never touches the model, so it cannot trigger a reload after idle
+        model = (CachedModel(None, result_cache, cache_model_id, borrow=borrow)
+                 if result_cache is not None else borrow())
+        segments, info, used_fallback = transcribe_with_profile(
+            model, audio, DECODING_PROFILE, stats=decode_stats,
+            cancel_event=cancel_event, **options
+        )
+        decode_time = time.perf_counter() - decode_start - waited
+        return Decoded(segments, info, used_fallback, decode_time, buffer, options,
+                       getattr(model, "replayed_sec", 0.0) > 0)
+
+def decode_buffers(buffers, cancel_event=None, features=None):
+    """Decode several utterances in one batched call. Returns Decoded results in order.
+
+    `features` holds each utterance's (audio, log-mel) pair or None, as in decode_buffer.
+    Like decode_buffer, cached utterances are not decoded and need no model. Batches are
+    continuous utterances, already cut to speech, so there is no pause compression here.
+    """
+    options = session.transcribe_options()
+    pcms, audios, precomputed = [], [], []
+    for buffer, pair in zip(buffers, features or [None] * len(buffers)):
+        pcms.append(buffer)
+        if pair is not None:
+            audios.append(pair[0])
+            precomputed.append(pair)
+        else:
+            audios.append(np.frombuffer(buffer, dtype=np.int16).astype(np.float32) / 32768.0)
+
+    with ExitStack() as borrowed, stream_health.activity("decoding"):
+        def borrow():
+            model = borrowed.enter_context(model_manager.use())
+            if precomputed:
+                borrowed.enter_context(model.feature_extractor.provide_many(precomputed))
+            return model
+
+        def decode(model, clips):
+            return transcribe_batch(model, clips, DECODING_PROFILE, stats=decode_stats,
+                                    cancel_event=cancel_event, batch_size=DECODE_BATCH_SIZE,
+                                    **options)
+
+        if result_cache is None:
+            results, hits = decode(borrow(), audios), [False] * len(audios)
+        else:
+            # Keyed apart from single decodes: the batched pipeline decodes differently
+            model = CachedModel(None, result_cache, cache_model_id, borrow=borrow)
+            results, hits = model.transcribe_many(audios, lambda misses: decode(model.model, misses),
+                                                  profile=DECODING_PROFILE, batched=True, **options)
+    return [Decoded(*result, pcm, options, hit) for result, pcm, hit in zip(results, pcms, hits)]
+
+def decode_with_queued(job, buffer, features=None):
+    """Batch this utterance with continuous jobs waiting behind it. Returns its result or None.
+
+    The queued jobs keep their place in the scheduler and only paste their stored result.
+    """
+    global decode_batches, batched_utterances
+    if DECODE_BATCH_SIZE < 2 or decode_pool is not None or remote_pool is not None:
+        return None
+    followers, seconds = [], len(buffer) / (2 * SAMPLE_RATE)
+    for queued in scheduler.peek("continuous", DECODE_BATCH_SIZE - 1):
+        queued_seconds = len(queued.args[0]) / (2 * SAMPLE_RATE)
+        if seconds + queued_seconds > DECODE_BATCH_MAX_SEC:
+            break
+        followers.append(queued)
+        seconds += queued_seconds
+    if not followers:
+        return None
+    results = decode_buffers([buffer] + [queued.args[0] for queued in followers], job.cancel_event,
+                             [features] + [queued.args[1] for queued in followers])
+    for queued, result in zip(followers, results[1:]):
+        if queued.cancelled:
+            continue  # A cancelled job never runs, so nothing would take its result
+        batched_results[queued] = result
+        if queued.cancelled:
+            # Cancelled while storing; the clear on IDLE may already have run
+            batched_results.pop(queued, None)
+    decode_batches += 1
+    batched_utterances += len(results)
+    print(f"📦 Decoded {len(results)} queued utterances ({seconds:.1f}s) in one batch")
+    return results[0]
+
+def transcribe_audio_buffer(buffer, message_prefix="📝 You said", check_sleep_word=False,
+                            cancel_event=None, features=None, decoded=None, compress=False):
+    """Transcribe audio buffer and handle the text output.
+
+    `decoded` is a result already produced by a batched decode, if any; `compress` is
+    passed to decode_buffer.
+    """
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            temp_file = tmp.name
-            with wave.open(tmp.name, "wb") as wf:
-                wf.setnchannels(CHANNELS)
-                wf.setsampwidth(2)
-                wf.setframerate(SAMPLE_RATE)
-                wf.writeframes(buffer)
-
-        segments, info = model.transcribe(temp_file, beam_size=5)
+        with profiler.stage("decode"):
+            if decoded is None:
+                decoded = decode_buffer(buffer, cancel_event, features, compress)
+            segments, info, used_fallback, decode_time = decoded[:4]
+        if used_fallback:
+            print("🔁 Low-confidence result, re-decoded with beam search")
         text = " ".join([segment.text for segment in segments]).strip()
+        session.update(info, text, decode_time, len(buffer) / (2 * SAMPLE_RATE))
         
+        entry_id = -1
+        if text:
+            source = "one-time" if "one-time" in message_prefix.lower() else "continuous"
+            entry_id = journal_utterance(text, buffer, decode_time, info, used_fallback, source)
+        archive_utterance(buffer, entry_id)
+        if shadow is not None:
+            # Same audio and options as the primary decode, so only the configuration differs
+            shadow.submit(decoded.pcm, text, decode_time, getattr(info, "language", None),
+                          decoded.options, decoded.cached)
+
         if text:
             if check_sleep_word and SLEEP_WORD.lower() in text.lower():
                 print(f"{message_prefix}: {text}")
                 print("💤 Sleep word detected in transcription! Stopping...")
-                transcribing = False
-                clear_queue_fast(audio_queue)
+                pipeline.sleep()
                 return True  # Sleep word detected
             
+            if cancel_event is not None and cancel_event.is_set():
+                raise DecodeCancelled()
             print(f"{message_prefix}: {text}")
-            pyperclip.copy(text)
-            pyautogui.hotkey("ctrl", "v")
-            time.sleep(0.2)
+            with stream_health.activity("pasting"), profiler.stage("paste"):
+                pyperclip.copy(text)
+                pyautogui.hotkey("ctrl", "v")
+                time.sleep(PASTE_SETTLE_SEC)
         else:
             if "one-time" in message_prefix.lower():
                 print("❌ No text detected in one-time transcription")
     
+    except DecodeCancelled:
+        print("⏹️  Decode cancelled")
+    
     except Exception as e:
         print(f"❌ Error during transcription: {e}")
     
-    finally:
-        if temp_file and os.path.exists(temp_file):
-            try:
-                os.unlink(temp_file)
-            except OSError as e:
-                print(f"⚠️  Warning: Could not delete temp file {temp_file}: {e}")
-    
     return False  # No sleep word detected
 
+def worth_decoding(buffer, source):
+    """Run the speech gate on a buffer before it is queued for a decode."""
+    if speech_gate is None:
+        return True
+    with profiler.stage("speech gate"):
+        result = speech_gate.check(buffer)
+    if not result.passed:
+        print(f"🚧 Skipped {source} audio ({result.reason}, "
+              f"{len(buffer) / (2 * SAMPLE_RATE):.1f}s, voiced {result.voiced_sec:.2f}s)")
+    return result.passed
+
+def continuous_decode_job(job, buffer, features=None):
+    """Scheduler job for one continuous-mode utterance."""
+    profiler.span("queue wait", job.submitted_at, job.started_at)
+    pipeline.begin_decode()
+    try:
+        decoded = batched_results.pop(job, None)
+        if decoded is None:
+            try:
+                with profiler.stage("decode"):
+                    decoded = decode_with_queued(job, buffer, features)
+            except DecodeCancelled:
+                print("⏹️  Decode cancelled")
+                return False
+            except Exception as e:
+                print(f"⚠️  Batched decode failed ({e}), decoding one at a time")
+        return transcribe_audio_buffer(buffer, check_sleep_word=True, cancel_event=job.cancel_event,
+                                       features=features, decoded=decoded)
+    finally:
+        pipeline.end_decode()  # No-op if the sleep word moved us to IDLE
+
+def one_time_decode_job(job, buffer, features=None):
+    """Scheduler job for one hotkey dictation."""
+    profiler.span("queue wait", job.submitted_at, job.started_at)
+    return transcribe_audio_buffer(buffer, "📝 One-time transcription",
+                                   cancel_event=job.cancel_event, features=features, compress=True)
+
 def reset_audio_state(buffer, silence_start_ref=None, frame_count_ref=None):
     """Reset audio processing state variables."""
     buffer.clear()
@@ -167,7 +581,6 @@ def reset_audio_state(buffer, silence_start_ref=None, frame_count_ref=None):
 
 def clear_queue_fast(q):
     """Fast queue clearing using collections.deque for better performance."""
-    import collections
     temp_items = collections.deque()
     try:
         while True:
@@ -176,85 +589,145 @@ def clear_queue_fast(q):
         pass
     temp_items.clear()
 
-def wakeword_listener():
-    """Wait for the wake word to begin or sleep word to stop transcription."""
-    global transcribing
-    
-    if not transcribing:
+def on_pipeline_transition(event, old, new):
+    """React to state changes: announce them and wake the record loop."""
+    if new is State.IDLE:
+        # Wake record_and_transcribe so it drops its partial buffer
+        audio_queue.put(None)
+        session.reset_prompt()
+        # Queued or running continuous decodes are no longer wanted
+        scheduler.cancel("continuous")
+        batched_results.clear()
         print("🎤 Say 'computer' to begin transcribing...")
-    
-    with sd.InputStream(
-        samplerate=porcupine.sample_rate,
-        blocksize=porcupine.frame_length,
-        dtype='int16',
-        channels=1,
-        callback=None
-    ) as stream:
-        while True:
-            pcm = stream.read(porcupine.frame_length)[0].flatten()
-            result = porcupine.process(pcm)
-            
-            if result == 0:  # Wake word detected
-                if not transcribing:
-                    transcribing = True
-                    print("✅ Wake word detected! Now transcribing...")
-                    return
-            elif result == 1:  # Sleep word detected
-                if transcribing:
-                    transcribing = False
-                    print("💤 Sleep word detected! Stopping transcription...")
-                    clear_queue_fast(audio_queue)
-                    return
+    elif event == "wake":
+        print("✅ Wake word detected! Now transcribing...")
+        if decode_pool is None and remote_pool is None:
+            model_manager.preload()  # Reload in the background if evicted while idle
+
+def detect_wake_words(frame):
+    """Run Porcupine on one frame; fires wake/sleep events on the state machine."""
+    result = porcupine.process(frame)
+    if result == 0:  # Wake word detected
+        pipeline.wake()
+    elif result == 1:  # Sleep word detected
+        if pipeline.continuous_active:
+            print("💤 Sleep word detected! Stopping transcription...")
+            pipeline.sleep()
+
+def wakeword_callback(indata, frames, time_info, status):
+    """Wake-word stream callback (used when NATIVE_RATE_CAPTURE is off)."""
+    stream_health.record("wakeword", status, time_info.inputBufferAdcTime, frames,
+                         porcupine.sample_rate)
+    # Blocks may hold several Porcupine frames when the stream latency was raised
+    for offset in range(0, frames - porcupine.frame_length + 1, porcupine.frame_length):
+        detect_wake_words(indata[offset:offset + porcupine.frame_length, 0])
+
+def queue_frames(frames):
+    """Queue int16 VAD frames for the modes that consume them."""
+    continuous = pipeline.continuous_active
+    one_time = pipeline.one_time_active
+    if not (continuous or one_time):
+        return
+    for frame in frames:
+        pcm_data = frame.tobytes()
+        if continuous:
+            audio_queue.put(pcm_data)
+        if one_time:
+            one_time_audio_queue.put(pcm_data)
 
 def audio_callback(indata, frames, time_info, status):
-    global one_time_transcribing
-    if status:
-        print(f"[Warning] {status}")
-    pcm_data = (indata[:, 0] * 32767).astype(np.int16).tobytes()
-    audio_queue.put(pcm_data)
-    
-    # Also put in one-time queue if one-time transcription is active
-    if one_time_transcribing:
-        one_time_audio_queue.put(pcm_data)
+    with profiler.stage("capture"):
+        # Counted here, reported from the main thread (printing in the callback adds to the problem)
+        stream_health.record("mic", status, time_info.inputBufferAdcTime, frames, SAMPLE_RATE)
+        if pipeline.continuous_active or pipeline.one_time_active:
+            pcm = (indata[:, 0] * 32767).astype(np.int16)
+            queue_frames(pcm[offset:offset + FRAME_SAMPLES]
+                         for offset in range(0, frames, FRAME_SAMPLES))
+
+def native_capture_callback(indata, frames, time_info, status):
+    """Native-rate stream callback: resample to 16 kHz, then feed Porcupine and the VAD."""
+    with profiler.stage("capture"):
+        stream_health.record("mic", status, time_info.inputBufferAdcTime, frames,
+                             capture_resampler.in_rate)
+        # Always resampled, so the filter state stays continuous across mode changes
+        pcm = to_int16(capture_resampler.process(indata[:, 0]))
+        for frame in wakeword_chunker.push(pcm):
+            detect_wake_words(frame)
+        queue_frames(vad_chunker.push(pcm))
 
 def one_time_transcribe():
-    """Perform one-time transcription triggered by hotkey."""
-    global one_time_transcribing
-    
-    if one_time_transcribing:
-        return  # Already in progress
+    """Record one hotkey dictation and queue it ahead of continuous decodes."""
+    global last_hotkey_job
     
     print("🎤 One-time transcription started...")
-    one_time_transcribing = True
-    
-    # Clear the one-time queue
     clear_queue_fast(one_time_audio_queue)
     
     buffer = bytearray()
-    start_time = time.time()
+    mel = new_feature_accumulator()
+    deadline = time.monotonic() + ONE_TIME_RECORD_DURATION_SEC
     
-    # Record for up to ONE_TIME_RECORD_DURATION_SEC seconds
-    while time.time() - start_time < ONE_TIME_RECORD_DURATION_SEC:
-        try:
-            frame = one_time_audio_queue.get(timeout=0.1)
+    # Record for up to ONE_TIME_RECORD_DURATION_SEC seconds, waking only when audio arrives
+    recording_start = time.perf_counter()
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                frame = one_time_audio_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if frame is None:
+                break  # Stopped early by another hotkey press
             buffer.extend(frame)
-        except queue.Empty:
-            continue
-    
-    one_time_transcribing = False
+            if mel is not None:
+                mel.push(frame)
+    finally:
+        pipeline.end_one_time()
+        clear_queue_fast(one_time_audio_queue)
+        profiler.span("hotkey recording", recording_start, time.perf_counter())
     
     if not buffer:
         print("❌ No audio recorded for one-time transcription")
         return
+    if not worth_decoding(buffer, "one-time"):
+        print("❌ No speech detected in one-time transcription")
+        return
     
     # Transcribe the recorded audio
-    transcribe_audio_buffer(buffer, "📝 One-time transcription")
+    features = mel.finalize() if mel is not None else None
+    last_hotkey_job = scheduler.submit("hotkey", HOTKEY_PRIORITY, one_time_decode_job,
+                                       bytes(buffer), features)
 
 def on_hotkey_pressed():
     """Handle the Ctrl+- hotkey press."""
-    # Run one-time transcription in a separate thread to avoid blocking
+    global last_hotkey_press
+    
+    now = time.monotonic()
+    if now - last_hotkey_press < HOTKEY_DEBOUNCE_SEC:
+        return  # Debounce key repeat and double presses
+    last_hotkey_press = now
+    
+    if not pipeline.begin_one_time():
+        # Pressed again while recording: stop recording now and decode what we have
+        print("⏹️  One-time recording stopped")
+        one_time_audio_queue.put(None)
+        return
+    
+    # A new dictation supersedes a previous one that is still waiting or decoding
+    if last_hotkey_job is not None and not last_hotkey_job.done:
+        last_hotkey_job.cancel()
+    
+    if decode_pool is None and remote_pool is None:
+        model_manager.preload()  # Start loading while the user is still speaking
+    # Recording runs on its own short-lived thread; begin_one_time() guarantees only one
     threading.Thread(target=one_time_transcribe, daemon=True).start()
 
+def toggle_profiler():
+    """Start a profiling window, or end the current one early."""
+    if profiler.toggle(PROFILE_WINDOW_SEC):
+        print(f"🔬 Profiling all threads for {PROFILE_WINDOW_SEC}s...")
+
 def setup_global_hotkey():
     """Set up global hotkey listener for Ctrl+- (Ctrl + numpad minus)."""
     if not HOTKEY_AVAILABLE:
@@ -268,7 +741,8 @@ def setup_global_hotkey():
         
         # Register the hotkey combination
         hotkey_listener = keyboard.GlobalHotKeys({
-            '<ctrl>+<alt>+t': hotkey_handler  # Ctrl + Alt + T
+            '<ctrl>+<alt>+t': hotkey_handler,  # Ctrl + Alt + T
+            '<ctrl>+<alt>+p': toggle_profiler,  # Ctrl + Alt + P
         })
         
         hotkey_listener.start()
@@ -279,91 +753,186 @@ def setup_global_hotkey():
 
 
 def record_and_transcribe():
-    global transcribing
-    buffer = bytearray()
-    silence_start = None
-    frame_count = 0
+    endpointer = Endpointer(
+        sample_rate=SAMPLE_RATE,
+        frame_ms=FRAME_MS,
+        silence_sec=SILENCE_DURATION_SEC,
+        max_buffer_bytes=MAX_BUFFER_SIZE_MB * 1024 * 1024,
+        check_interval=BUFFER_CHECK_INTERVAL,
+        features=new_feature_accumulator,
+    )
 
     while True:
-        if not transcribing:
-            # Clear any accumulated audio when not transcribing
-            clear_queue_fast(audio_queue)
-            buffer.clear()
-            silence_start = None
-            frame_count = 0
-            wakeword_listener()
-            # Clear queue again after wake word detection to avoid processing old audio
+        if not pipeline.continuous_active:
+            endpointer.reset()
+            # Block (no polling) until the wake word fires
+            pipeline.wait_until_active()
+            # Drop anything queued around the transition to avoid processing old audio
             clear_queue_fast(audio_queue)
             continue
 
-        try:
-            frame = audio_queue.get(timeout=0.1)
-        except queue.Empty:
-            continue
-
-        is_speech = vad.is_speech(frame, SAMPLE_RATE)
+        frame = audio_queue.get()
+        if frame is None:
+            continue  # State changed; re-check at the top of the loop
 
-        if is_speech:
-            buffer.extend(frame)
-            silence_start = None
-            
-            # Check buffer size periodically to prevent excessive memory usage
-            frame_count += 1
-            if frame_count % BUFFER_CHECK_INTERVAL == 0:
-                buffer_size_mb = len(buffer) / (1024 * 1024)
-                if buffer_size_mb > MAX_BUFFER_SIZE_MB:
-                    print(f"⚠️  Buffer size ({buffer_size_mb:.1f}MB) exceeded limit. Processing current audio...")
-                    # Force processing of current buffer to free memory
-                    if buffer:
-                        transcribe_audio_buffer(buffer)
-                        buffer.clear()
-                        frame_count = 0
-        else:
-            if buffer:
-                if silence_start is None:
-                    silence_start = time.time()
-                elif time.time() - silence_start > SILENCE_DURATION_SEC:
-                    # Transcribe audio and check for sleep word
-                    if transcribe_audio_buffer(buffer, check_sleep_word=True):
-                        buffer.clear()
-                        frame_count = 0
-                        continue
-                    
-                    buffer.clear()
-                    silence_start = None
-                    frame_count = 0
+        forced_before = endpointer.forced
+        with profiler.stage("vad"):
+            utterance = endpointer.push(frame, vad.is_speech(frame, SAMPLE_RATE))
+        if utterance is None:
+            continue
+        if endpointer.forced != forced_before:
+            size_mb = len(utterance.pcm) / (1024 * 1024)
+            print(f"⚠️  Buffer size ({size_mb:.1f}MB) exceeded limit. Processing current audio...")
+        if not worth_decoding(utterance.pcm, "continuous"):
+            continue
+        # Queue the utterance; the decode job checks for the sleep word
+        scheduler.submit("continuous", CONTINUOUS_PRIORITY, continuous_decode_job,
+                         utterance.pcm, utterance.features)
+
+def open_input_streams(stack):
+    """Open the capture and wake-word streams at the current adaptive latency level."""
+    global capture_resampler, wakeword_chunker, vad_chunker
+    blocks = stream_latency.blocks
+    stream_health.reset_stream()  # The time between close and reopen is not lost audio
+    if NATIVE_RATE_CAPTURE:
+        rate = CAPTURE_RATE or int(sd.query_devices(kind="input")["default_samplerate"])
+        # Porcupine also runs at 16 kHz, so both consumers share the resampled stream
+        capture_resampler = PolyphaseResampler(rate, SAMPLE_RATE)
+        wakeword_chunker = FrameChunker(porcupine.frame_length)
+        vad_chunker = FrameChunker(FRAME_SAMPLES)
+        stack.enter_context(sd.InputStream(
+            samplerate=rate,
+            channels=CHANNELS,
+            blocksize=int(rate * FRAME_MS / 1000) * blocks,
+            latency=stream_latency.latency,
+            callback=native_capture_callback
+        ))
+        return
+    stack.enter_context(sd.InputStream(
+        samplerate=SAMPLE_RATE,
+        channels=CHANNELS,
+        blocksize=FRAME_SAMPLES * blocks,
+        latency=stream_latency.latency,
+        callback=audio_callback
+    ))
+    stack.enter_context(sd.InputStream(
+        samplerate=porcupine.sample_rate,
+        blocksize=porcupine.frame_length * blocks,
+        latency=stream_latency.latency,
+        dtype='int16',
+        channels=1,
+        callback=wakeword_callback
+    ))
 
 def main():
-    global transcribing
-    
+    global decode_pool, remote_pool, porcupine
+    access_key = load_access_key()
+    start_pipeline()
+    # Wake-word and sleep-word detectors
+    porcupine = pvporcupine.create(
+        access_key=access_key,
+        keywords=[WAKE_WORD, SLEEP_WORD]
+    )
+
     print("🔊 Starting GPU-accelerated voice system with wake/sleep words...")
     print("🎤 Wake word: 'computer' (starts transcribing)")
     print("💤 Sleep word: 'terminator' (stops transcribing)")
+    print(f"🎛️  Decoding profile: {DECODING_PROFILE}")
+    
+    if PIPELINE_MODE == "multiprocess":
+        print(f"🧩 Starting {DECODE_WORKERS} decode worker process(es)...")
+        if DECODE_WORKERS > 1:
+            print("   ℹ️  Decodes run one at a time; the extra workers will be idle")
+        decode_pool = ProcessDecodePool(
+            workers=DECODE_WORKERS,
+            model_size=WHISPER_MODEL_SIZE,
+            device=DEVICE,
+            compute_type=COMPUTE_TYPE if DEVICE == "cuda" else "int8",
+            store=MODEL_STORE_DIR,
+        )
+        if not decode_pool.wait_ready():
+            print("❌ A decode worker failed to start (see its output above)")
+            decode_pool.close()
+            return
+        print("✅ Decode workers ready!")
+    elif REMOTE_WORKERS:
+        remote_pool = RemoteDecodePool(REMOTE_WORKERS, timeout=REMOTE_TIMEOUT_SEC)
+        print(f"🛰️  Remote workers: {remote_pool.healthy_nodes}/{len(REMOTE_WORKERS)} reachable")
     
     # Set up global hotkey listener
     hotkey_listener = setup_global_hotkey()
     if hotkey_listener:
-        print("✅ Global hotkey: Ctrl+Alt+T (one-time transcription)")
+        print("✅ Global hotkey: Ctrl+Alt+T (one-time transcription), Ctrl+Alt+P (profile)")
     else:
         print("❌ Global hotkey not available")
     
-    # Start with transcription off
-    transcribing = False
+    signal_name = install_signal_toggle(profiler, PROFILE_WINDOW_SEC)
+    if signal_name:
+        print(f"🔬 Send {signal_name} to profile for {PROFILE_WINDOW_SEC}s")
     
+    # Start with transcription off; transitions are announced by the listener
+    pipeline.add_listener(on_pipeline_transition)
+    print("🎤 Say 'computer' to begin transcribing...")
+    
+    streams = ExitStack()
     try:
-        with sd.InputStream(
-            samplerate=SAMPLE_RATE,
-            channels=CHANNELS,
-            blocksize=int(SAMPLE_RATE * FRAME_MS / 1000),
-            callback=audio_callback
-        ):
-            record_and_transcribe()
+        open_input_streams(streams)
+        if capture_resampler is not None:
+            print(f"🎙️  Capturing at {capture_resampler.in_rate} Hz, resampled to {SAMPLE_RATE} Hz")
+        # The record loop blocks on queue/condition waits, which Ctrl+C cannot
+        # interrupt on Windows, so it runs on a worker and the main thread just joins
+        worker = threading.Thread(target=record_and_transcribe, daemon=True)
+        worker.start()
+        while worker.is_alive():
+            worker.join(timeout=1.0)
+            warning = stream_health.tick()
+            if warning:
+                print(f"[Warning] {warning}")
+            if stream_latency.take_change():
+                # Reopen both streams at the new latency level
+                streams.close()
+                streams = ExitStack()
+                open_input_streams(streams)
+                print(f"🎚️  Audio stream: {stream_latency.describe()}")
     except KeyboardInterrupt:
         print("\n🛑 Stopping voice system...")
     finally:
+        streams.close()
         # Clean up hotkey listener
         if hotkey_listener:
             hotkey_listener.stop()
+        print(f"📊 Decoding stats: {decode_stats.summary()}")
+        print(f"🌐 Session: {session.summary()}")
+        print(f"🧠 Model: {model_manager.summary()}")
+        if PRECOMPUTE_FEATURES and decode_pool is None:
+            print(f"🎼 Features: {feature_stats.summary()}")
+        print(f"🗂️  Scheduler: {scheduler.summary()}")
+        if decode_batches:
+            print(f"📦 Batched decoding: {batched_utterances} utterances in {decode_batches} batches")
+        if pause_trimmed_sec:
+            print(f"✂️  Pause compression: {pause_trimmed_sec:.1f}s of silence not decoded")
+        print(f"🎙️  Audio input: {stream_health.summary()}")
+        if speech_gate is not None:
+            print(f"🚧 Speech gate: {speech_gate.summary()}")
+        if result_cache is not None:
+            print(f"🗃️  Result cache: {result_cache.summary()}")
+        if remote_pool:
+            print(f"🛰️  Remote: {remote_pool.summary()} | {remote_fallbacks} local fallbacks")
+        if shadow:
+            print(f"🔬 Shadow: {shadow.summary()}")
+        scheduler.stop()
+        model_manager.close()
+        if shadow:
+            shadow.model_manager.close()
+            shadow.close()
+        if decode_pool:
+            decode_pool.close()
+        if remote_pool:
+            remote_pool.close()
+        if journal:
+            journal.close()
+        if audio_archive:
+            audio_archive.close()
 
 if __name__ == "__main__":
     main()